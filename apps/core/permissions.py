@@ -3,8 +3,24 @@ HR_ADMIN = "HR_ADMIN"
 EXEC = "EXEC"
 MANAGER = "MANAGER"
 
+# Cache de grupos memorizado sobre el objeto user (request.user vive lo que dura la peticion).
+ROLE_CACHE_ATTR = "_role_names_cache"
+
+def role_names(user) -> frozenset:
+    if not user.is_authenticated:
+        return frozenset()
+    cached = getattr(user, ROLE_CACHE_ATTR, None)
+    if cached is None:
+        cached = frozenset(user.groups.values_list("name", flat=True))
+        setattr(user, ROLE_CACHE_ATTR, cached)
+    return cached
+
+def clear_role_cache(user) -> None:
+    if hasattr(user, ROLE_CACHE_ATTR):
+        delattr(user, ROLE_CACHE_ATTR)
+
 def in_group(user, name: str) -> bool:
-    return user.is_authenticated and user.groups.filter(name=name).exists()
+    return name in role_names(user)
 
 def is_hr(user) -> bool:
     return in_group(user, HR) or user.is_superuser
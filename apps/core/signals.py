@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from apps.core.permissions import clear_role_cache
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_role_cache(sender, instance, action, reverse, **kwargs):
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+    # reverse=True: group.user_set.add(...); los usuarios afectados se recargan en su
+    # siguiente peticion, solo hay que limpiar la instancia cuando es el propio user.
+    if not reverse:
+        clear_role_cache(instance)
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+
+from apps.core.permissions import (
+    HR,
+    MANAGER,
+    can_evaluate,
+    can_manage_employees,
+    is_hr,
+    is_manager,
+    role_names,
+)
+
+
+class RoleCacheTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="roles", password="x")
+        Group.objects.get_or_create(name=MANAGER)[0].user_set.add(self.user)
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def test_groups_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(is_manager(self.user))
+            self.assertFalse(is_hr(self.user))
+            self.assertTrue(can_evaluate(self.user))
+            self.assertFalse(can_manage_employees(self.user))
+        self.assertEqual(role_names(self.user), frozenset({MANAGER}))
+
+    def test_group_change_invalidates_cache(self):
+        self.assertFalse(is_hr(self.user))
+        self.user.groups.add(Group.objects.get_or_create(name=HR)[0])
+        self.assertTrue(is_hr(self.user))
+        self.user.groups.clear()
+        self.assertFalse(is_manager(self.user))
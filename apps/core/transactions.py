@@ -0,0 +1,32 @@
+from django.db import transaction
+
+
+def pending_on_commit(key, using=None) -> bool:
+    """True si la transaccion en curso ya tiene registrado (sin ejecutar) el callback `key`."""
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return False
+    for entry in connection.run_on_commit:
+        pending = entry[1]
+        # `done`: captureOnCommitCallbacks(execute=True) ejecuta sin vaciar la lista.
+        if getattr(pending, "commit_key", None) == key and not pending.done:
+            return True
+    return False
+
+
+def on_commit_once(key, func, *args, using=None) -> None:
+    """
+    transaction.on_commit que se registra una sola vez por `key` en la transaccion en curso:
+    N guardados de un import acaban en una sola escritura al hacer commit. Fuera de una
+    transaccion se ejecuta en el momento, como on_commit.
+    """
+    if pending_on_commit(key, using):
+        return
+
+    def callback():
+        callback.done = True
+        func(*args)
+
+    callback.commit_key = key
+    callback.done = False
+    transaction.on_commit(callback, using=using)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EvaluationPeriod, Evaluation, EvaluationScore
+from .models import EvaluationPeriod, Evaluation, EvaluationScore, EvaluationSummary, ExportJob
 
 
 @admin.register(EvaluationPeriod)
@@ -36,3 +36,26 @@ class EvaluationScoreAdmin(admin.ModelAdmin):
         "evaluation__employee__dni",
     )
 
+
+
+@admin.register(EvaluationSummary)
+class EvaluationSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "evaluation",
+        "answered_count",
+        "required_missing_count",
+        "final_score",
+        "last_answer_at",
+    )
+    list_filter = ("evaluation__period",)
+    search_fields = (
+        "evaluation__employee__full_name",
+        "evaluation__employee__dni",
+    )
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "period", "requested_by", "status", "rows_done", "rows_total", "created_at")
+    list_filter = ("status", "kind")
+    search_fields = ("requested_by__username",)
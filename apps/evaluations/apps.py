@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class EvaluationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.evaluations"
+
+    def ready(self):
+        from apps.evaluations import signals  # noqa: F401
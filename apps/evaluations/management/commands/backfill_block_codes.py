@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.evaluations.models import EvaluationItem
+from apps.templates_eval.models import (
+    TemplateSection,
+    block_code_from_title,
+    block_weight_from_title,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rellena block_code/weight en TemplateSection y EvaluationItem a partir del titulo de seccion. "
+        "DRY-RUN por defecto; usa --apply para escribir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--apply", action="store_true", help="Aplica cambios en BD (si no, DRY-RUN).")
+
+    def handle(self, *args, **options):
+        apply_changes = bool(options["apply"])
+
+        sections = list(TemplateSection.objects.filter(block_code="").only("id", "title", "weight_percent"))
+        for section in sections:
+            section.block_code = block_code_from_title(section.title)
+            if section.weight_percent is None:
+                section.weight_percent = block_weight_from_title(section.title)
+
+        # Los items se agrupan por titulo: un UPDATE por titulo distinto en lugar de uno por fila.
+        titles = list(
+            EvaluationItem.objects.filter(block_code="")
+            .order_by()
+            .values_list("section_title", flat=True)
+            .distinct()
+        )
+        items_updated = 0
+        with transaction.atomic():
+            if apply_changes:
+                TemplateSection.objects.bulk_update(sections, ["block_code", "weight_percent"], batch_size=500)
+                for title in titles:
+                    items_updated += EvaluationItem.objects.filter(block_code="", section_title=title).update(
+                        block_code=block_code_from_title(title),
+                        block_weight=block_weight_from_title(title),
+                    )
+
+        self.stdout.write(self.style.SUCCESS("RESUMEN"))
+        self.stdout.write(f"  secciones:          {len(sections)}")
+        self.stdout.write(f"  titulos de items:   {len(titles)}")
+        self.stdout.write(f"  items actualizados: {items_updated}")
+        if not apply_changes:
+            self.stdout.write(self.style.NOTICE("DRY-RUN: no se ha escrito nada. Usa --apply para aplicar."))
@@ -1,13 +1,30 @@
+from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
 
 from apps.evaluations.models import EvaluationPeriod
+from apps.evaluations.services.provisioning import provision_period, provisioning_candidates
 
 
 class Command(BaseCommand):
-    help = "Abre un periodo de evaluacion (is_closed=False) y limpia closed_at."
+    help = (
+        "Abre un periodo de evaluacion (is_closed=False) y limpia closed_at. "
+        "Con --provision crea ademas las evaluaciones de todos los empleados activos."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument("period_id", type=int)
+        parser.add_argument(
+            "--provision",
+            action="store_true",
+            help="Crea evaluaciones e items para empleados activos con puesto de evaluacion.",
+        )
+        parser.add_argument("--apply", action="store_true", help="Con --provision: escribe en BD (si no, DRY-RUN).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Evaluaciones por lote. Por defecto 500.")
+        parser.add_argument(
+            "--evaluator",
+            default="",
+            help="Username evaluador para empleados sin manager (si no, se omiten).",
+        )
 
     def handle(self, *args, **options):
         period_id = options["period_id"]
@@ -15,11 +32,39 @@ class Command(BaseCommand):
         if not period:
             raise CommandError("No existe el periodo indicado.")
 
+        provision = bool(options["provision"])
+        if provision and not options["apply"]:
+            pending = provisioning_candidates(period)
+            self.stdout.write(
+                f"DRY-RUN: {pending.count()} evaluaciones por crear "
+                f"({pending.filter(manager__isnull=True).count()} empleados sin manager). "
+                "Usa --apply para escribir."
+            )
+            return
+
+        evaluator = None
+        if options["evaluator"]:
+            evaluator = get_user_model().objects.filter(username=options["evaluator"]).first()
+            if not evaluator:
+                raise CommandError("No existe el usuario evaluador indicado.")
+
         if not period.is_closed:
             self.stdout.write(self.style.WARNING("El periodo ya esta abierto."))
+        else:
+            period.is_closed = False
+            period.closed_at = None
+            period.save(update_fields=["is_closed", "closed_at"])
+            self.stdout.write(self.style.SUCCESS(f"Periodo abierto: {period.id} - {period.name}"))
+
+        if not provision:
             return
 
-        period.is_closed = False
-        period.closed_at = None
-        period.save(update_fields=["is_closed", "closed_at"])
-        self.stdout.write(self.style.SUCCESS(f"Periodo abierto: {period.id} - {period.name}"))
+        created = skipped = 0
+        progress = provision_period(period, chunk_size=options["chunk_size"], default_evaluator=evaluator)
+        for created, skipped in progress:
+            self.stdout.write(f"  evaluaciones: {created} (omitidas: {skipped})")
+        self.stdout.write(self.style.SUCCESS(f"Evaluaciones creadas: {created}"))
+        if skipped:
+            self.stdout.write(
+                self.style.WARNING(f"Omitidas (sin plantilla activa, sin evaluador o ya creadas): {skipped}")
+            )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.evaluations.models import EvaluationPeriod
+from apps.evaluations.services.summary import rebuild_period_summaries
+
+
+class Command(BaseCommand):
+    help = "Reconstruye EvaluationSummary para todas las evaluaciones de un periodo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("period_id", type=int)
+        parser.add_argument("--chunk-size", type=int, default=500, help="Evaluaciones por lote. Por defecto 500.")
+
+    def handle(self, *args, **options):
+        period_id = options["period_id"]
+        period = EvaluationPeriod.objects.filter(id=period_id).first()
+        if not period:
+            raise CommandError("No existe el periodo indicado.")
+
+        done = 0
+        for done in rebuild_period_summaries(period, chunk_size=options["chunk_size"]):
+            self.stdout.write(f"  resumenes: {done}")
+        self.stdout.write(self.style.SUCCESS(f"Resumenes reconstruidos: {done} ({period.id} - {period.name})"))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.evaluations.models import ExportJob
+from apps.evaluations.services.export_jobs import claim_next_job, cleanup_export_jobs, run_export_job
+
+
+CLEANUP_EVERY_SECONDS = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Procesa los exports en segundo plano (ExportJob). Sin --once queda escuchando la cola."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Procesa lo pendiente y termina.")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Segundos entre sondeos. Por defecto 5.")
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=None,
+            help="Dias que se conservan los ficheros (por defecto EXPORT_JOB_RETENTION_DAYS o 7).",
+        )
+
+    def handle(self, *args, **options):
+        last_cleanup = None
+        while True:
+            if last_cleanup is None or time.monotonic() - last_cleanup > CLEANUP_EVERY_SECONDS:
+                removed = cleanup_export_jobs(options["retention_days"])
+                if removed:
+                    self.stdout.write(f"  limpieza: {removed} exports caducados eliminados")
+                last_cleanup = time.monotonic()
+
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["sleep"])
+                continue
+
+            self.stdout.write(f"Export {job.id}: {job.get_kind_display()} {job.period}")
+            job = run_export_job(job)
+            if job.status == ExportJob.Status.DONE:
+                self.stdout.write(self.style.SUCCESS(f"  terminado: {job.rows_total} filas -> {job.file.name}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"  error: {job.error}"))
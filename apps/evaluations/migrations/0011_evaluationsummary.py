@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0010_evaluationscore_template_question'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvaluationSummary',
+            fields=[
+                ('evaluation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='evaluations.evaluation')),
+                ('items_count', models.PositiveIntegerField(default=0)),
+                ('answered_count', models.PositiveIntegerField(default=0)),
+                ('required_missing_count', models.PositiveIntegerField(default=0)),
+                ('block_scores', models.JSONField(blank=True, default=dict)),
+                ('final_score', models.DecimalField(blank=True, decimal_places=3, max_digits=7, null=True)),
+                ('last_answer_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
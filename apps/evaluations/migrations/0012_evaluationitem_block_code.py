@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0011_evaluationsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluationitem',
+            name='block_code',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='evaluationitem',
+            name='block_weight',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='evaluationitem',
+            index=models.Index(fields=['evaluation', 'block_code'], name='evaluations_evaluat_4e3955_idx'),
+        ),
+    ]
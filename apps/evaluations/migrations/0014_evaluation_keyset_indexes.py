@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0013_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['period', 'status', 'id'], name='eval_period_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['period', 'final_score', 'id'], name='eval_period_score_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['period', 'status_changed_at', 'id'], name='eval_period_changed_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['period', 'submitted_at', 'id'], name='eval_period_submitted_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['period', 'finalized_at', 'id'], name='eval_period_finalized_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0014_evaluation_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluationperiod',
+            name='report_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
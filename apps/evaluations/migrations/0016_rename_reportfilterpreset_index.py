@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Nombre del indice de ReportFilterPreset alineado con el que genera el modelo; la
+    migracion 0008 lo creo con otro nombre.
+    """
+
+    dependencies = [
+        ('evaluations', '0015_evaluationperiod_report_version'),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='reportfilterpreset',
+            new_name='evaluations_scope_7a3691_idx',
+            old_name='evaluations_scope_cr_1f9b7b_idx',
+        ),
+    ]
@@ -13,12 +13,23 @@ class EvaluationPeriod(TimeStampedModel):
     end_date = models.DateField()
     is_closed = models.BooleanField(default=False)
     closed_at = models.DateTimeField(null=True, blank=True)
+    # Sello de las caches del informe de periodo; cambia con cada evaluacion que afecta al informe.
+    report_version = models.BigIntegerField(default=0, editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=["is_closed", "start_date", "end_date"]),
         ]
 
+    def save(self, *args, **kwargs):
+        # report_version solo cambia con bump_period_report_version (UPDATE directo): un guardado
+        # completo con una instancia antigua no debe devolverla a una version anterior.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != "report_version"
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return self.name
 
@@ -65,6 +76,12 @@ class Evaluation(TimeStampedModel):
         indexes = [
             models.Index(fields=["period", "status"]),
             models.Index(fields=["evaluator", "period"]),
+            # Paginacion por cursor del informe de periodo: (period, clave de orden, id).
+            models.Index(fields=["period", "status", "id"], name="eval_period_status_id_idx"),
+            models.Index(fields=["period", "final_score", "id"], name="eval_period_score_id_idx"),
+            models.Index(fields=["period", "status_changed_at", "id"], name="eval_period_changed_id_idx"),
+            models.Index(fields=["period", "submitted_at", "id"], name="eval_period_submitted_id_idx"),
+            models.Index(fields=["period", "finalized_at", "id"], name="eval_period_finalized_id_idx"),
         ]
 
     def __str__(self) -> str:
@@ -96,6 +113,8 @@ class EvaluationItem(models.Model):
         related_name="items",
     )
     section_title = models.CharField(max_length=255)
+    block_code = models.CharField(max_length=10, blank=True, default="")
+    block_weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     question_text = models.TextField()
     question_type = models.CharField(max_length=20)
     is_required = models.BooleanField(default=False)
@@ -106,6 +125,30 @@ class EvaluationItem(models.Model):
 
     class Meta:
         ordering = ["display_order"]
+        indexes = [
+            models.Index(fields=["evaluation", "block_code"]),
+        ]
+
+
+class EvaluationSummary(models.Model):
+    """Resumen materializado por evaluacion; se recalcula al guardar respuestas o cambiar estado."""
+
+    evaluation = models.OneToOneField(
+        Evaluation,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="summary",
+    )
+    items_count = models.PositiveIntegerField(default=0)
+    answered_count = models.PositiveIntegerField(default=0)
+    required_missing_count = models.PositiveIntegerField(default=0)
+    block_scores = models.JSONField(default=dict, blank=True)
+    final_score = models.DecimalField(max_digits=7, decimal_places=3, null=True, blank=True)
+    last_answer_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Resumen {self.evaluation_id}"
 
 
 class EvaluationScore(TimeStampedModel):
@@ -180,3 +223,52 @@ class ReportFilterPreset(TimeStampedModel):
 
     def __str__(self) -> str:
         return f"{self.scope}: {self.name}"
+
+
+class ExportJob(TimeStampedModel):
+    """Export de periodo en segundo plano; lo procesa el comando run_export_jobs."""
+
+    class Kind(models.TextChoices):
+        CSV_SUMMARY = "CSV_SUMMARY", "CSV resumen"
+        CSV_ITEMS = "CSV_ITEMS", "CSV items"
+        XLSX = "XLSX", "XLSX"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pendiente"
+        RUNNING = "RUNNING", "En curso"
+        DONE = "DONE", "Terminado"
+        FAILED = "FAILED", "Error"
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="export_jobs"
+    )
+    period = models.ForeignKey(EvaluationPeriod, on_delete=models.CASCADE, related_name="export_jobs")
+    kind = models.CharField(max_length=12, choices=Kind.choices)
+    query_params = models.TextField(blank=True, default="")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    rows_total = models.PositiveIntegerField(default=0)
+    rows_done = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="exports/", blank=True)
+    error = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Lo renueva el worker mientras escribe; sin latido en EXPORT_JOB_LEASE_MINUTES se reintenta.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["requested_by", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} {self.period} ({self.status})"
+
+    @property
+    def progress_percent(self) -> int:
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.rows_total:
+            return 0
+        return min(100, int(self.rows_done * 100 / self.rows_total))
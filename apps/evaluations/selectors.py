@@ -0,0 +1,301 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    FilteredRelation,
+    IntegerField,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Trim
+from django.utils.dateparse import parse_datetime
+
+from apps.core.permissions import can_manage_employees
+from apps.evaluations.models import Evaluation, EvaluationItem
+from apps.org.models import Employee
+from apps.org.selectors import employee_search_q
+from apps.templates_eval.models import TemplateQuestion
+
+
+ALERT_CODES = ["NOT_STARTED", "OVERDUE", "DRAFT", "MISSING_REQUIRED", "BLOCKED"]
+
+
+def item_complete_expression():
+    """1 si el item tiene respuesta valida para su tipo, 0 en otro caso (mismo criterio que la vista)."""
+    return Case(
+        When(question_type=TemplateQuestion.SCALE_1_5, value_scale__isnull=False, then=Value(1)),
+        When(question_type=TemplateQuestion.YES_NO, value_yes_no__isnull=False, then=Value(1)),
+        When(question_type=TemplateQuestion.TEXT, value_text_trim__gt="", then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def missing_required_items(evaluation_ref) -> QuerySet[EvaluationItem]:
+    return (
+        EvaluationItem.objects.filter(evaluation=evaluation_ref, is_required=True)
+        .annotate(value_text_trim=Trim("value_text"))
+        .annotate(is_complete=item_complete_expression())
+        .filter(is_complete=0)
+    )
+
+
+def missing_required_count_subquery(evaluation_ref):
+    qs = (
+        missing_required_items(evaluation_ref)
+        .order_by()
+        .values("evaluation")
+        .annotate(c=Count("id"))
+        .values("c")
+    )
+    return Coalesce(Subquery(qs, output_field=IntegerField()), Value(0))
+
+
+def team_overview_queryset(employees: QuerySet[Employee], period) -> QuerySet[Employee]:
+    """
+    Anota cada empleado con los datos de su evaluacion en `period` y el numero de
+    obligatorias pendientes, calculado en SQL desde EvaluationItem.
+    """
+    # unique_together (employee, period): el LEFT JOIN aporta como mucho una fila por empleado.
+    return employees.annotate(
+        period_eval=FilteredRelation("evaluations", condition=Q(evaluations__period=period)),
+    ).annotate(
+        ev_id=F("period_eval__id"),
+        ev_status=F("period_eval__status"),
+        ev_final_score=F("period_eval__final_score"),
+        # El resumen materializado manda; el subquery solo cubre evaluaciones sin resumen.
+        missing_required=Coalesce(
+            F("period_eval__summary__required_missing_count"),
+            missing_required_count_subquery(OuterRef("period_eval__id")),
+        ),
+    )
+
+
+def alert_conditions(period, *, today, user_can_edit_drafts: bool) -> dict:
+    """Condiciones SQL equivalentes a las alertas de my_team, por codigo."""
+    period_overdue = bool(period.end_date and today > period.end_date)
+    has_eval = Q(ev_id__isnull=False)
+    # Siempre falso; pk__in=[] vaciaria tambien el aggregate de alert_counts.
+    none = Q(pk__isnull=True)
+    if user_can_edit_drafts:
+        blocked = has_eval & ~Q(ev_status=Evaluation.Status.DRAFT)
+    else:
+        blocked = has_eval
+    draft = has_eval & Q(ev_status=Evaluation.Status.DRAFT)
+    return {
+        "NOT_STARTED": Q(ev_id__isnull=True),
+        "OVERDUE": draft if period_overdue else none,
+        "DRAFT": none if period_overdue else draft,
+        "MISSING_REQUIRED": has_eval & Q(missing_required__gt=0),
+        "BLOCKED": blocked,
+    }
+
+
+def alert_counts(qs: QuerySet[Employee], conditions: dict) -> dict:
+    return qs.aggregate(
+        TOTAL=Count("id"),
+        **{code: Count("id", filter=cond) for code, cond in conditions.items()},
+    )
+
+
+def visible_evaluations(user) -> QuerySet[Evaluation]:
+    """
+    Evaluaciones visibles para `user` (mismo criterio que employees_visible_to).
+    Para alcance RRHH/Direccion no se anade la subconsulta de visibilidad.
+    """
+    qs = Evaluation.objects.all()
+    if can_manage_employees(user):
+        return qs
+    return qs.filter(employee__manager=user, employee__is_active=True)
+
+
+def visible_period_evaluations(period, user) -> QuerySet[Evaluation]:
+    return visible_evaluations(user).filter(period=period)
+
+
+def visibility_scope(user) -> str:
+    """Clave del alcance de visibilidad: 'all' o el manager concreto."""
+    return "all" if can_manage_employees(user) else f"manager:{user.pk}"
+
+
+def period_report_filters(params):
+    """(Q de filtros, status, q) a partir de los parametros GET del informe de periodo."""
+    filters = Q()
+    status = (params.get("status") or "").strip().upper()
+    if status in {Evaluation.Status.DRAFT, Evaluation.Status.SUBMITTED, Evaluation.Status.FINAL}:
+        filters &= Q(status=status)
+
+    q = (params.get("q") or "").strip()
+    if q:
+        filters &= employee_search_q(q, prefix="employee__")
+    return filters, status, q
+
+
+# Claves de orden del informe de periodo; todas con `id` como desempate.
+PERIOD_REPORT_SORTS = {
+    "employee": "employee__full_name",
+    "status": "status",
+    "score": "final_score",
+    "updated": "status_changed_at",
+    "submitted": "submitted_at",
+    "finalized": "finalized_at",
+}
+
+REPORT_CURSOR_SALT = "evaluations.report_cursor"
+
+
+def keyset_ordering(field: str, ascending: bool) -> list:
+    """Orden (field, id) con NULL como el valor mas pequeno en ambos sentidos."""
+    if ascending:
+        return [F(field).asc(nulls_first=True), "id"]
+    return [F(field).desc(nulls_last=True), "-id"]
+
+
+def keyset_filter(field: str, value, pk: int, ascending: bool) -> Q:
+    """Filas estrictamente posteriores a (value, pk) en el orden de keyset_ordering."""
+    if ascending:
+        if value is None:
+            return Q(**{f"{field}__isnull": True, "id__gt": pk}) | Q(**{f"{field}__isnull": False})
+        return Q(**{f"{field}__gt": value}) | Q(**{field: value, "id__gt": pk})
+    if value is None:
+        return Q(**{f"{field}__isnull": True, "id__lt": pk})
+    return (
+        Q(**{f"{field}__lt": value})
+        | Q(**{field: value, "id__lt": pk})
+        | Q(**{f"{field}__isnull": True})
+    )
+
+
+def sort_value(row, field: str):
+    for attr in field.split("__"):
+        row = getattr(row, attr)
+    return row
+
+
+def encode_report_cursor(sort: str, direction: str, row, *, backwards: bool = False) -> str:
+    value = sort_value(row, PERIOD_REPORT_SORTS[sort])
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    payload = {"s": sort, "d": direction, "v": value, "i": row.pk, "b": int(backwards)}
+    return signing.dumps(payload, salt=REPORT_CURSOR_SALT, compress=True)
+
+
+def decode_report_cursor(cursor: str, sort: str, direction: str):
+    """(value, pk, backwards) del cursor, o None si falta, no es valido o es de otro orden."""
+    if not cursor:
+        return None
+    try:
+        payload = signing.loads(cursor, salt=REPORT_CURSOR_SALT)
+        if payload["s"] != sort or payload["d"] != direction:
+            return None
+        value = payload["v"]
+        if value is not None and sort == "score":
+            value = Decimal(value)
+        elif value is not None and sort in {"updated", "submitted", "finalized"}:
+            value = parse_datetime(value)
+        return value, int(payload["i"]), bool(payload["b"])
+    except (signing.BadSignature, KeyError, TypeError, ValueError, ArithmeticError):
+        return None
+
+
+@dataclass(frozen=True)
+class ReportPage:
+    rows: list
+    next_cursor: str
+    prev_cursor: str
+
+
+def period_report_page(qs, sort: str, direction: str, cursor: str, page_size: int) -> ReportPage:
+    """
+    Pagina por seek (sin OFFSET ni COUNT) sobre el queryset de period_report_queryset.
+    `cursor` es el valor opaco de next_cursor/prev_cursor de una pagina anterior.
+    """
+    field = PERIOD_REPORT_SORTS[sort]
+    ascending = direction == "asc"
+    position = decode_report_cursor(cursor, sort, direction)
+    backwards = bool(position and position[2])
+    scan_ascending = ascending != backwards
+
+    page_qs = qs.order_by(*keyset_ordering(field, scan_ascending))
+    if position:
+        page_qs = page_qs.filter(keyset_filter(field, position[0], position[1], scan_ascending))
+    rows = list(page_qs[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if backwards:
+        if not has_more:
+            # Se ha llegado al principio: se sirve la primera pagina completa.
+            return period_report_page(qs, sort, direction, "", page_size)
+        rows.reverse()
+        has_prev, has_next = True, True
+    else:
+        has_prev, has_next = position is not None, has_more
+
+    return ReportPage(
+        rows=rows,
+        next_cursor=encode_report_cursor(sort, direction, rows[-1]) if rows and has_next else "",
+        prev_cursor=(
+            encode_report_cursor(sort, direction, rows[0], backwards=True) if rows and has_prev else ""
+        ),
+    )
+
+
+def period_report_queryset(period, user, params):
+    """Evaluaciones de `period` visibles para `user`, con los filtros y orden de `params` (GET)."""
+    filters, status, q = period_report_filters(params)
+    qs = (
+        visible_period_evaluations(period, user)
+        .filter(filters)
+        .select_related("employee", "period", "summary")
+    )
+
+    sort = (params.get("sort") or "employee").strip().lower()
+    if sort not in PERIOD_REPORT_SORTS:
+        sort = "employee"
+    direction = (params.get("dir") or "asc").strip().lower()
+    if direction not in {"asc", "desc"}:
+        direction = "asc"
+
+    qs = qs.order_by(*keyset_ordering(PERIOD_REPORT_SORTS[sort], direction == "asc"))
+    return qs, {"status": status, "q": q, "sort": sort, "dir": direction}
+
+
+TREND_FILTERS = ("employee", "department", "position", "q")
+
+
+def has_trend_filter(params) -> bool:
+    return any((params.get(name) or "").strip() for name in TREND_FILTERS)
+
+
+def trend_queryset(user, params) -> QuerySet[Evaluation]:
+    """
+    Evaluaciones (todos los periodos) de los empleados visibles para `user`, filtradas por
+    `params`: employee (id), department (id), position (codigo congelado) y q (nombre/DNI).
+    """
+    qs = visible_evaluations(user)
+    employee_id = (params.get("employee") or "").strip()
+    if employee_id.isdigit():
+        qs = qs.filter(employee_id=int(employee_id))
+    department_id = (params.get("department") or "").strip()
+    if department_id.isdigit():
+        qs = qs.filter(employee__evaluation_position__department_id=int(department_id))
+    position = (params.get("position") or "").strip().upper()
+    if position:
+        qs = qs.filter(frozen_position_code=position)
+    q = (params.get("q") or "").strip()
+    if q:
+        qs = qs.filter(employee_search_q(q, prefix="employee__"))
+    return qs
+
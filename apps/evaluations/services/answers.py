@@ -0,0 +1,65 @@
+from django.db import transaction
+
+from apps.evaluations.models import EvaluationItem
+from apps.templates_eval.models import TemplateQuestion
+
+
+ANSWER_FIELDS = ["value_scale", "value_yes_no", "value_text"]
+
+
+def answer_values(item) -> tuple:
+    return (item.value_scale, item.value_yes_no, item.value_text)
+
+
+def answer_error(item, val):
+    """Mensaje de error si `val` no es valido para el tipo del item; None si es valido."""
+    if item.question_type == TemplateQuestion.SCALE_1_5:
+        if val and val not in {"1", "2", "3", "4", "5"}:
+            return "La escala debe ser un valor entre 1 y 5."
+    elif item.question_type == TemplateQuestion.YES_NO:
+        if val not in {"0", "1"}:
+            return "Si/No debe ser 1 o 0."
+    return None
+
+
+def apply_answer(item, val) -> bool:
+    """Aplica un valor recibido del formulario al item. Devuelve True si cambia."""
+    before = answer_values(item)
+
+    if item.question_type == TemplateQuestion.SCALE_1_5:
+        item.value_scale = int(val) if val else None
+        item.value_yes_no = None
+        item.value_text = None
+
+    elif item.question_type == TemplateQuestion.YES_NO:
+        item.value_yes_no = True if val == "1" else False
+        item.value_scale = None
+        item.value_text = None
+
+    elif item.question_type == TemplateQuestion.TEXT:
+        item.value_text = val or ""
+        item.value_scale = None
+        item.value_yes_no = None
+
+    return answer_values(item) != before
+
+
+def save_answers(items, data, *, prefix: str = "q_") -> int:
+    """
+    Guarda en bloque las respuestas de `data` (p.ej. request.POST) sobre `items`.
+
+    Solo se escriben los items cuyo valor cambia, en una unica transaccion y con un
+    bulk_update limitado a los campos value_*. Devuelve el numero de items cambiados.
+    """
+    changed = []
+    for item in items:
+        key = f"{prefix}{item.id}"
+        if key not in data:
+            continue
+        if apply_answer(item, data.get(key)):
+            changed.append(item)
+
+    if changed:
+        with transaction.atomic():
+            EvaluationItem.objects.bulk_update(changed, ANSWER_FIELDS)
+    return len(changed)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from apps.core.transactions import on_commit_once
+from apps.evaluations.models import Evaluation, EvaluationPeriod
+from apps.evaluations.selectors import (
+    ReportPage,
+    period_report_filters,
+    period_report_page,
+    period_report_queryset,
+    visibility_scope,
+    visible_period_evaluations,
+)
+from apps.evaluations.services.stats import position_block_stats
+
+# Sin cambios en el periodo la cabecera y las paginas se recalculan igualmente cada
+# REPORT_CACHE_TIMEOUT (cubre cambios de manager o de empleados, que no invalidan).
+# La version vive en EvaluationPeriod.report_version, comun a todos los procesos; la cache
+# solo guarda resultados bajo claves que la incluyen.
+REPORT_CACHE_TIMEOUT = 5 * 60
+
+# Campos de Evaluation que afectan a filtros, orden o totales del informe de periodo.
+REPORT_FIELDS = frozenset(
+    {"status", "final_score", "status_changed_at", "submitted_at", "finalized_at", "employee"}
+)
+
+
+def period_report_version(period_id) -> int:
+    return EvaluationPeriod.objects.filter(pk=period_id).values_list("report_version", flat=True).first() or 0
+
+
+def write_period_report_version(period_id) -> None:
+    # time_ns y no +1: una base de datos restaurada no reutiliza versiones ya cacheadas.
+    EvaluationPeriod.objects.filter(pk=period_id).update(report_version=time.time_ns())
+
+
+def bump_period_report_version(period_id) -> None:
+    # Al hacer commit y una vez por transaccion: el UPDATE de la fila del periodo (muy
+    # concurrida) no queda bloqueado durante la transaccion del usuario.
+    on_commit_once(("period_report_version", period_id), write_period_report_version, period_id)
+
+
+def report_cache_key(kind: str, period, user, filters, version=None) -> str:
+    if version is None:
+        version = period_report_version(period.pk)
+    filters_hash = hashlib.sha1(json.dumps(filters, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return (
+        f"evaluations:period_report_{kind}:{period.pk}:{version}:"
+        f"{visibility_scope(user)}:{filters_hash}"
+    )
+
+
+def period_totals(period, user, params, *, version=None) -> dict:
+    """
+    Totales por estado, TOTAL del periodo (sin filtros) y FILTERED (con filtros de `params`)
+    en una sola consulta de agregacion condicional. Cacheado por periodo, alcance de
+    visibilidad y filtros; se invalida con la version del periodo.
+    """
+    filters, status, q = period_report_filters(params)
+    key = report_cache_key("totals", period, user, [status, q], version)
+    totals = cache.get(key)
+    if totals is not None:
+        return totals
+
+    aggregates = {
+        "DRAFT": Count("id", filter=Q(status=Evaluation.Status.DRAFT)),
+        "SUBMITTED": Count("id", filter=Q(status=Evaluation.Status.SUBMITTED)),
+        "FINAL": Count("id", filter=Q(status=Evaluation.Status.FINAL)),
+        "TOTAL": Count("id"),
+    }
+    if filters:
+        aggregates["FILTERED"] = Count("id", filter=filters)
+    totals = visible_period_evaluations(period, user).aggregate(**aggregates)
+    totals.setdefault("FILTERED", totals["TOTAL"])
+    cache.set(key, totals, REPORT_CACHE_TIMEOUT)
+    return totals
+
+
+def period_position_stats(period, user, params, *, version=None) -> list[dict]:
+    """
+    position_block_stats de las evaluaciones filtradas, cacheado como period_totals. Las
+    respuestas editadas sin cambio de estado se reflejan al caducar (REPORT_CACHE_TIMEOUT).
+    """
+    _, status, q = period_report_filters(params)
+    key = report_cache_key("position_stats", period, user, [status, q], version)
+    stats = cache.get(key)
+    if stats is None:
+        qs, _ = period_report_queryset(period, user, params)
+        stats = position_block_stats(qs)
+        cache.set(key, stats, REPORT_CACHE_TIMEOUT)
+    return stats
+
+
+def period_report_results(period, user, params, filters_key, *, page_size: int):
+    """
+    Pagina del informe de periodo (ReportPage), totales y filtros aplicados.
+
+    Se cachean los ids de la pagina, los cursores y los totales por periodo, version del
+    periodo (leida una vez), alcance de visibilidad y `filters_key` (normalize_filters). Con
+    cache caliente solo se leen la version y las evaluaciones de la pagina por id.
+    """
+    qs, applied_filters = period_report_queryset(period, user, params)
+    version = period_report_version(period.pk)
+    key = report_cache_key("page", period, user, filters_key, version)
+    cached = cache.get(key)
+    if cached is None:
+        page = period_report_page(
+            qs, applied_filters["sort"], applied_filters["dir"], params.get("cursor") or "", page_size
+        )
+        totals = period_totals(period, user, params, version=version)
+        cache.set(
+            key,
+            {
+                "ids": [ev.id for ev in page.rows],
+                "next_cursor": page.next_cursor,
+                "prev_cursor": page.prev_cursor,
+                "totals": totals,
+            },
+            REPORT_CACHE_TIMEOUT,
+        )
+        return page, totals, applied_filters
+
+    by_id = qs.in_bulk(cached["ids"])
+    page = ReportPage(
+        rows=[by_id[pk] for pk in cached["ids"] if pk in by_id],
+        next_cursor=cached["next_cursor"],
+        prev_cursor=cached["prev_cursor"],
+    )
+    return page, cached["totals"], applied_filters
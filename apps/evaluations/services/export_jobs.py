@@ -0,0 +1,183 @@
+import logging
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F
+from django.http import QueryDict
+from django.utils import timezone
+
+from apps.evaluations.models import EvaluationItem, ExportJob
+from apps.evaluations.selectors import period_report_queryset
+from apps.evaluations.services.exports import (
+    EXPORT_CHUNK_SIZE,
+    ITEM_HEADER,
+    SUMMARY_HEADER,
+    SUMMARY_VALUES,
+    item_rows,
+    stream_csv,
+    summary_rows,
+    write_period_workbook,
+)
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_EVERY = 1000
+
+# Intentos antes de dar por fallido un trabajo cuyo worker desaparece a mitad.
+MAX_ATTEMPTS = 2
+
+
+def export_retention_days() -> int:
+    return int(getattr(settings, "EXPORT_JOB_RETENTION_DAYS", 7))
+
+
+def export_lease() -> timedelta:
+    return timedelta(minutes=int(getattr(settings, "EXPORT_JOB_LEASE_MINUTES", 30)))
+
+
+def enqueue_export(user, period, kind: str, query_params: str = "") -> ExportJob:
+    return ExportJob.objects.create(
+        requested_by=user,
+        period=period,
+        kind=kind,
+        query_params=query_params or "",
+    )
+
+
+def release_stale_jobs() -> int:
+    """
+    Trabajos RUNNING sin latido durante export_lease() (worker caido o matado): vuelven a
+    PENDING o, si ya agotaron MAX_ATTEMPTS, pasan a FAILED. Devuelve cuantos.
+    """
+    now = timezone.now()
+    stale = ExportJob.objects.filter(status=ExportJob.Status.RUNNING, heartbeat_at__lt=now - export_lease())
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=ExportJob.Status.FAILED,
+        error="El proceso del export se interrumpio sin terminar.",
+        finished_at=now,
+    )
+    retried = stale.update(status=ExportJob.Status.PENDING, rows_done=0, started_at=None, heartbeat_at=None)
+    return failed + retried
+
+
+def claim_next_job():
+    """Marca como RUNNING el trabajo pendiente mas antiguo. Seguro con varios workers."""
+    release_stale_jobs()
+    pending = ExportJob.objects.filter(status=ExportJob.Status.PENDING).order_by("created_at", "id")
+    for job_id in pending.values_list("id", flat=True)[:10]:
+        now = timezone.now()
+        claimed = ExportJob.objects.filter(id=job_id, status=ExportJob.Status.PENDING).update(
+            status=ExportJob.Status.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return ExportJob.objects.select_related("period", "requested_by").get(id=job_id)
+    return None
+
+
+def save_progress(job, done: int) -> None:
+    # Progreso y latido del trabajo (ver release_stale_jobs).
+    ExportJob.objects.filter(id=job.id).update(rows_done=done, heartbeat_at=timezone.now())
+
+
+def report_progress(job, rows):
+    """Pasa las filas tal cual, guardando rows_done cada PROGRESS_EVERY filas."""
+    done = 0
+    for row in rows:
+        yield row
+        done += 1
+        if done % PROGRESS_EVERY == 0:
+            save_progress(job, done)
+
+
+def write_export(job, fileobj) -> int:
+    """Escribe el export de `job` en `fileobj` (binario). Devuelve el total de filas."""
+    eval_qs, _ = period_report_queryset(job.period, job.requested_by, QueryDict(job.query_params))
+    eval_ids = eval_qs.values_list("id", flat=True)
+
+    if job.kind == ExportJob.Kind.XLSX:
+        total = EvaluationItem.objects.filter(evaluation_id__in=eval_ids).count()
+        ExportJob.objects.filter(id=job.id).update(rows_total=total)
+        return write_period_workbook(
+            fileobj,
+            job.period,
+            eval_qs,
+            eval_ids,
+            progress=lambda done: save_progress(job, done),
+            progress_every=PROGRESS_EVERY,
+        )
+
+    if job.kind == ExportJob.Kind.CSV_ITEMS:
+        total = EvaluationItem.objects.filter(evaluation_id__in=eval_ids).count()
+        header, rows = ITEM_HEADER, item_rows(eval_ids, job.period)
+    else:
+        total = eval_qs.count()
+        values = eval_qs.values_list(*SUMMARY_VALUES).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        header, rows = SUMMARY_HEADER, summary_rows(values, job.period)
+
+    ExportJob.objects.filter(id=job.id).update(rows_total=total)
+    for chunk in stream_csv(header, report_progress(job, rows)):
+        fileobj.write(chunk.encode("utf-8"))
+    return total
+
+
+def export_filename(job) -> str:
+    ext = "xlsx" if job.kind == ExportJob.Kind.XLSX else "csv"
+    return f"period_{job.period_id}_{job.kind.lower()}_{job.id}.{ext}"
+
+
+def run_export_job(job) -> ExportJob:
+    start = time.monotonic()
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            total = write_export(job, tmp)
+            tmp.seek(0)
+            job.file.save(export_filename(job), File(tmp), save=False)
+    except Exception as exc:
+        logger.exception("Export job %s fallido", job.id)
+        job.status = ExportJob.Status.FAILED
+        job.error = str(exc)[:2000]
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at", "updated_at"])
+        return job
+
+    job.status = ExportJob.Status.DONE
+    job.rows_total = job.rows_done = total
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "file", "rows_total", "rows_done", "finished_at", "updated_at"])
+    logger.info(
+        "report_export",
+        extra={
+            "event": "report_export",
+            "export_type": f"job_{job.kind.lower()}",
+            "period_id": job.period_id,
+            "export_scope": "filtered",
+            "rows": total,
+            "user_id": job.requested_by_id,
+            "job_id": job.id,
+            "duration_ms": int((time.monotonic() - start) * 1000),
+        },
+    )
+    return job
+
+
+def cleanup_export_jobs(days=None) -> int:
+    """
+    Borra trabajos (y sus ficheros) creados hace mas de `days` dias. Devuelve cuantos. Los
+    RUNNING abandonados se liberan antes, asi que solo se respetan los que siguen vivos.
+    """
+    release_stale_jobs()
+    days = export_retention_days() if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    removed = 0
+    for job in ExportJob.objects.filter(created_at__lt=cutoff).exclude(status=ExportJob.Status.RUNNING):
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        removed += 1
+    return removed
@@ -0,0 +1,347 @@
+import csv
+import hashlib
+import json
+import zipfile
+import zlib
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from apps.evaluations.models import EvaluationItem
+from apps.evaluations.services.stats import position_block_stats
+from apps.evaluations.services.summary import format_block_scores
+from apps.templates_eval.models import TemplateQuestion
+
+try:
+    import openpyxl
+except Exception:  # pragma: no cover
+    openpyxl = None
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+SUMMARY_HEADER = [
+    "period_name",
+    "employee_dni",
+    "employee_full_name",
+    "position_code",
+    "status",
+    "score_total",
+    "overall_comment",
+    "submitted_at",
+    "finalized_at",
+    "reopened_at",
+    "answered_count",
+    "required_missing_count",
+    "block_scores",
+]
+
+SUMMARY_VALUES = [
+    "employee__dni",
+    "employee__full_name",
+    "frozen_position_code",
+    "status",
+    "final_score",
+    "overall_comment",
+    "submitted_at",
+    "finalized_at",
+    "reopened_at",
+    "summary__answered_count",
+    "summary__required_missing_count",
+    "summary__block_scores",
+]
+
+ITEM_HEADER = [
+    "period",
+    "employee_dni",
+    "employee_full_name",
+    "position_code",
+    "evaluation_status",
+    "section",
+    "question_text",
+    "question_type",
+    "is_required",
+    "answer_value",
+    "display_order",
+]
+
+ITEM_VALUES = [
+    "evaluation__employee__dni",
+    "evaluation__employee__full_name",
+    "evaluation__frozen_position_code",
+    "evaluation__status",
+    "section_title",
+    "question_text",
+    "question_type",
+    "is_required",
+    "value_scale",
+    "value_yes_no",
+    "value_text",
+    "display_order",
+]
+
+
+def answer_text(question_type, value_scale, value_yes_no, value_text) -> str:
+    if question_type == TemplateQuestion.SCALE_1_5:
+        return "" if value_scale is None else str(value_scale)
+    if question_type == TemplateQuestion.YES_NO:
+        if value_yes_no is None:
+            return ""
+        return "YES" if value_yes_no else "NO"
+    if question_type == TemplateQuestion.TEXT:
+        return value_text or ""
+    return ""
+
+
+def blank_if_none(value):
+    return "" if value is None else value
+
+
+def summary_rows(values_qs, period):
+    """Filas del CSV resumen a partir de un queryset values_list(*SUMMARY_VALUES)."""
+    for (
+        dni, full_name, position_code, status, final_score, overall_comment,
+        submitted_at, finalized_at, reopened_at, answered, missing, block_scores,
+    ) in values_qs:
+        yield (
+            period.name,
+            dni,
+            full_name,
+            position_code,
+            status,
+            final_score or "",
+            overall_comment or "",
+            submitted_at or "",
+            finalized_at or "",
+            reopened_at or "",
+            blank_if_none(answered),
+            blank_if_none(missing),
+            "" if block_scores is None else format_block_scores(block_scores),
+        )
+
+
+def item_values(eval_ids):
+    """Tuplas ITEM_VALUES de los items de `eval_ids`, en streaming."""
+    values_qs = (
+        EvaluationItem.objects.filter(evaluation_id__in=eval_ids)
+        .order_by("evaluation_id", "display_order", "id")
+        .values_list(*ITEM_VALUES)
+    )
+    return values_qs.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def item_row(period, values_row) -> tuple:
+    (
+        dni, full_name, position_code, status, section, question, question_type,
+        is_required, value_scale, value_yes_no, value_text, display_order,
+    ) = values_row
+    return (
+        period.name,
+        dni,
+        full_name,
+        position_code,
+        status,
+        section,
+        question,
+        question_type,
+        int(is_required),
+        answer_text(question_type, value_scale, value_yes_no, value_text),
+        display_order,
+    )
+
+
+def item_rows(eval_ids, period):
+    """Filas del CSV de items de las evaluaciones `eval_ids`, sin instanciar modelos."""
+    for values_row in item_values(eval_ids):
+        yield item_row(period, values_row)
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: devuelve la linea en lugar de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows, *, on_done=None, chunk_rows: int = 500):
+    """
+    Genera el CSV (con BOM) en trozos de `chunk_rows` filas. Al terminar llama a
+    on_done(row_count), p.ej. para registrar la exportacion.
+    """
+    writer = csv.writer(Echo())
+    yield "\ufeff" + writer.writerow(header)
+    buf = []
+    row_count = 0
+    for row in rows:
+        buf.append(writer.writerow(row))
+        row_count += 1
+        if len(buf) >= chunk_rows:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+    if on_done is not None:
+        on_done(row_count)
+
+
+def stream_ndjson(header, rows, *, on_done=None, chunk_rows: int = 500):
+    """Como stream_csv, pero una linea JSON por fila con las claves de `header`."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    buf = []
+    row_count = 0
+    for row in rows:
+        buf.append(encoder.encode(dict(zip(header, row))) + "\n")
+        row_count += 1
+        if len(buf) >= chunk_rows:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+    if on_done is not None:
+        on_done(row_count)
+
+
+def gzip_stream(chunks, *, level: int = 6):
+    """Comprime en gzip los trozos de texto segun llegan; nunca guarda el fichero entero."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# ?format= -> (generador de texto, content type, extension).
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv; charset=utf-8", "csv"),
+    "csv.gz": (stream_csv, "application/gzip", "csv.gz"),
+    "ndjson": (stream_ndjson, "application/x-ndjson; charset=utf-8", "ndjson"),
+    "ndjson.gz": (stream_ndjson, "application/gzip", "ndjson.gz"),
+}
+
+
+def stream_export(export_format, header, rows, *, on_done=None):
+    """(iterador, content type, extension) del export en `export_format` (clave de EXPORT_FORMATS)."""
+    stream, content_type, extension = EXPORT_FORMATS[export_format]
+    chunks = stream(header, rows, on_done=on_done)
+    if export_format.endswith(".gz"):
+        chunks = gzip_stream(chunks)
+    return chunks, content_type, extension
+
+
+class ZipStreamBuffer:
+    """Destino sin seek para zipfile: guarda lo escrito hasta que drain() lo entrega."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(files):
+    """
+    Genera un ZIP a partir de `files`, iterable de (nombre, trozos de texto). Cada fichero se
+    comprime segun llegan sus trozos; en memoria solo queda el trozo en curso.
+    """
+    buf = ZipStreamBuffer()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, chunks in files:
+            with zf.open(name, "w", force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk.encode("utf-8"))
+                    data = buf.drain()
+                    if data:
+                        yield data
+            yield buf.drain()
+    yield buf.drain()
+
+
+def bundle_files(exports, manifest: dict):
+    """
+    Ficheros CSV del paquete a partir de `exports`, iterable de (nombre, cabecera, filas,
+    extra para el manifiesto). Se anaden a manifest["files"] las filas, bytes y sha256 de cada
+    uno y, al final, manifest.json.
+    """
+    manifest.setdefault("files", [])
+
+    def tracked(entry, header, rows):
+        digest = hashlib.sha256()
+        size = 0
+
+        def done(row_count):
+            entry["rows"] = row_count
+
+        for chunk in stream_csv(header, rows, on_done=done):
+            data = chunk.encode("utf-8")
+            digest.update(data)
+            size += len(data)
+            yield chunk
+        entry.update(bytes=size, sha256=digest.hexdigest())
+        manifest["files"].append(entry)
+
+    for name, header, rows, extra in exports:
+        yield name, tracked({"name": name, **extra}, header, rows)
+    yield "manifest.json", iter([json.dumps(manifest, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)])
+
+
+def to_naive(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    return value
+
+
+STATS_HEADER = [
+    "position_code",
+    "block",
+    "avg_score",
+    "min_score",
+    "max_score",
+    "evaluations_count",
+]
+
+
+def write_period_workbook(fileobj, period, eval_qs, eval_ids, *, progress=None, progress_every: int = 1000) -> int:
+    """
+    Escribe el XLSX del periodo (Resumen, Detalle, Stats) en `fileobj` con hojas
+    write-only: las filas van a disco segun se generan, sin libro en memoria.
+
+    Stats sale de stats.position_block_stats, la misma consulta GROUP BY que
+    el informe de periodo y stats.json.
+    `progress(n)` se llama cada `progress_every` filas de detalle. Devuelve el numero
+    de items escritos.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws_summary = wb.create_sheet("Resumen")
+    ws_detail = wb.create_sheet("Detalle")
+    ws_stats = wb.create_sheet("Stats")
+
+    ws_summary.append(SUMMARY_HEADER)
+    values = eval_qs.values_list(*SUMMARY_VALUES).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in summary_rows(values, period):
+        ws_summary.append([to_naive(v) for v in row])
+
+    ws_detail.append(ITEM_HEADER)
+    done = 0
+    for values_row in item_values(eval_ids):
+        ws_detail.append(item_row(period, values_row))
+        done += 1
+        if progress is not None and done % progress_every == 0:
+            progress(done)
+
+    ws_stats.append(STATS_HEADER)
+    for row in position_block_stats(eval_qs):
+        ws_stats.append([row[key] for key in STATS_HEADER])
+
+    wb.save(fileobj)
+    return done
@@ -0,0 +1,121 @@
+from django.db import transaction
+from django.db.models import QuerySet
+
+from apps.evaluations.models import Evaluation, EvaluationItem, EvaluationSummary
+from apps.evaluations.services.dashboard import bump_period_report_version
+from apps.evaluations.services.summary import summary_values
+from apps.evaluations.signals import period_evaluations_changed
+from apps.org.models import Employee
+from apps.templates_eval.services import get_template_snapshot, resolve_active_template
+
+
+def build_items_from_snapshot(evaluation: Evaluation, snapshot) -> list:
+    items = []
+    order = 1
+    for section in snapshot.sections:
+        for q in section.questions:
+            items.append(
+                EvaluationItem(
+                    evaluation=evaluation,
+                    section_title=section.title,
+                    block_code=section.block_code,
+                    block_weight=section.weight_percent,
+                    question_text=q.text,
+                    question_type=q.question_type,
+                    is_required=q.is_required,
+                    display_order=order,
+                )
+            )
+            order += 1
+    return items
+
+
+def create_items_from_template(evaluation: Evaluation, template) -> None:
+    items = build_items_from_snapshot(evaluation, get_template_snapshot(template))
+    if items:
+        EvaluationItem.objects.bulk_create(items)
+
+
+def provisioning_candidates(period) -> QuerySet[Employee]:
+    """Empleados activos con puesto de evaluacion y sin evaluacion en `period`."""
+    return (
+        Employee.objects.filter(is_active=True, evaluation_position__isnull=False)
+        .exclude(evaluations__period=period)
+    )
+
+
+def provision_period(period, *, chunk_size: int = 500, default_evaluator=None):
+    """
+    Crea en bloque las evaluaciones de `period` (con sus items y resumen) para los
+    empleados de provisioning_candidates.
+
+    Cada lote va en su propia transaccion; al relanzar se retoma por los empleados que
+    aun no tienen evaluacion. El evaluador es el manager del empleado o, si no tiene,
+    `default_evaluator`. Genera (creadas, omitidas) acumulados tras cada lote; las que
+    ya existian (creadas a la vez desde la vista) cuentan como omitidas.
+    """
+    employee_ids = list(provisioning_candidates(period).order_by("id").values_list("id", flat=True))
+    templates_by_code = {}
+    snapshots_by_template_id = {}
+    created = 0
+    skipped = 0
+    for start in range(0, len(employee_ids), chunk_size):
+        chunk_ids = employee_ids[start:start + chunk_size]
+        # Se vuelve a filtrar: una evaluacion pudo crearse desde la vista entre lotes.
+        employees = (
+            provisioning_candidates(period)
+            .filter(id__in=chunk_ids)
+            .select_related("evaluation_position")
+            .order_by("id")
+        )
+
+        evaluations = []
+        for employee in employees:
+            code = employee.evaluation_position.code
+            if code not in templates_by_code:
+                templates_by_code[code] = resolve_active_template(code)
+            template = templates_by_code[code]
+            if template is not None and template.pk not in snapshots_by_template_id:
+                snapshots_by_template_id[template.pk] = get_template_snapshot(template)
+            evaluator_id = employee.manager_id or getattr(default_evaluator, "pk", None)
+            if template is None or evaluator_id is None:
+                skipped += 1
+                continue
+            evaluations.append(
+                Evaluation(
+                    employee=employee,
+                    period=period,
+                    evaluator_id=evaluator_id,
+                    template=template,
+                    frozen_position_code=code,
+                    frozen_position_name=employee.evaluation_position.name,
+                )
+            )
+
+        with transaction.atomic():
+            # ignore_conflicts no devuelve ids: se releen las recien creadas (sin items ni
+            # resumen). Un choque con (employee, period) se omite en lugar de abortar el lote.
+            Evaluation.objects.bulk_create(evaluations, ignore_conflicts=True)
+            inserted = list(
+                Evaluation.objects.filter(
+                    period=period,
+                    employee_id__in=[ev.employee_id for ev in evaluations],
+                    items__isnull=True,
+                    summary__isnull=True,
+                ).order_by("id")
+            )
+            skipped += len(evaluations) - len(inserted)
+            items = []
+            summaries = []
+            for evaluation in inserted:
+                ev_items = build_items_from_snapshot(evaluation, snapshots_by_template_id[evaluation.template_id])
+                items.extend(ev_items)
+                summaries.append(EvaluationSummary(evaluation=evaluation, **summary_values(ev_items)))
+            EvaluationItem.objects.bulk_create(items, batch_size=1000)
+            EvaluationSummary.objects.bulk_create(summaries)
+            # bulk_create no emite post_save.
+            bump_period_report_version(period.pk)
+            period_evaluations_changed.send(sender=Evaluation, period_id=period.pk)
+
+        created += len(inserted)
+        yield created, skipped
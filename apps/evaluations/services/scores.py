@@ -0,0 +1,48 @@
+from collections import defaultdict
+
+from apps.templates_eval.models import TemplateQuestion, block_code_from_title
+
+
+def block_from_section(title: str) -> str:
+    return block_code_from_title(title)
+
+
+def item_block_code(item) -> str:
+    # Items anteriores al backfill no tienen block_code persistido.
+    return item.block_code or block_from_section(item.section_title)
+
+
+def is_item_complete(item) -> bool:
+    qtype = item.question_type
+    if qtype == TemplateQuestion.SCALE_1_5:
+        return item.value_scale is not None
+    if qtype == TemplateQuestion.YES_NO:
+        return item.value_yes_no is not None
+    if qtype == TemplateQuestion.TEXT:
+        return bool((item.value_text or "").strip())
+    return False
+
+
+def compute_final_score(items):
+    scores = []
+    for item in items:
+        if item.question_type == TemplateQuestion.SCALE_1_5 and item.value_scale is not None:
+            scores.append(item.value_scale)
+    if not scores:
+        return None
+    return round(sum(scores) / len(scores), 2)
+
+
+def compute_block_scores(items):
+    by_block = defaultdict(list)
+    for item in items:
+        if item.question_type != TemplateQuestion.SCALE_1_5:
+            continue
+        if item.value_scale is None:
+            continue
+        by_block[item_block_code(item)].append(item.value_scale)
+
+    scores = {}
+    for block, values in by_block.items():
+        scores[block] = round(sum(values) / len(values), 2) if values else None
+    return scores
@@ -0,0 +1,90 @@
+from django.db.models import Avg, Count, Max, Min
+
+from apps.evaluations.models import EvaluationItem
+from apps.templates_eval.models import UNKNOWN_BLOCK, TemplateQuestion
+
+
+def position_block_stats(evaluations) -> list[dict]:
+    """
+    Estadisticas de las preguntas SCALE_1_5 contestadas de `evaluations` (queryset),
+    agrupadas por puesto congelado y bloque, en una sola consulta GROUP BY.
+    """
+    rows = (
+        EvaluationItem.objects.filter(
+            evaluation_id__in=evaluations.values("id"),
+            question_type=TemplateQuestion.SCALE_1_5,
+            value_scale__isnull=False,
+        )
+        .values("evaluation__frozen_position_code", "block_code")
+        .annotate(
+            avg_score=Avg("value_scale"),
+            min_score=Min("value_scale"),
+            max_score=Max("value_scale"),
+            evaluations_count=Count("evaluation_id", distinct=True),
+        )
+        .order_by("evaluation__frozen_position_code", "block_code")
+    )
+    return [
+        {
+            "position_code": row["evaluation__frozen_position_code"],
+            "block": row["block_code"] or UNKNOWN_BLOCK,
+            "avg_score": round(float(row["avg_score"]), 2),
+            "min_score": row["min_score"],
+            "max_score": row["max_score"],
+            "evaluations_count": row["evaluations_count"],
+        }
+        for row in rows
+    ]
+
+
+TREND_VALUES = [
+    "employee_id",
+    "employee__dni",
+    "employee__full_name",
+    "period_id",
+    "period__name",
+    "period__start_date",
+    "status",
+    "frozen_position_code",
+    "summary__final_score",
+    "summary__block_scores",
+]
+
+
+def score_trend(evaluations) -> dict:
+    """
+    Puntuacion final y por bloque de cada empleado en cada periodo, a partir de los
+    resumenes (EvaluationSummary) de `evaluations`, en una sola consulta.
+
+    Devuelve {"periods": [...], "employees": [{..., "points": [...]}]}, con empleados por
+    nombre e id y puntos por fecha de inicio del periodo.
+    """
+    rows = (
+        evaluations.order_by("employee__full_name", "employee_id", "period__start_date", "period_id")
+        .values_list(*TREND_VALUES)
+        .iterator(chunk_size=2000)
+    )
+    periods = {}
+    employees = []
+    current = None
+    for (
+        employee_id, dni, full_name, period_id, period_name, start_date,
+        status, position_code, final_score, block_scores,
+    ) in rows:
+        periods.setdefault(period_id, {"id": period_id, "name": period_name, "start_date": start_date})
+        if current is None or current["id"] != employee_id:
+            current = {"id": employee_id, "dni": dni, "full_name": full_name, "points": []}
+            employees.append(current)
+        current["points"].append(
+            {
+                "period_id": period_id,
+                "status": status,
+                "position_code": position_code,
+                "final_score": None if final_score is None else float(final_score),
+                "block_scores": block_scores or {},
+            }
+        )
+    return {
+        "periods": sorted(periods.values(), key=lambda p: (p["start_date"], p["id"])),
+        "employees": employees,
+    }
@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from apps.evaluations.models import Evaluation, EvaluationItem, EvaluationSummary
+from apps.evaluations.services.scores import (
+    compute_block_scores,
+    compute_final_score,
+    is_item_complete,
+)
+from apps.evaluations.signals import period_evaluations_changed
+
+
+SUMMARY_FIELDS = [
+    "items_count",
+    "answered_count",
+    "required_missing_count",
+    "block_scores",
+    "final_score",
+]
+
+
+def summary_values(items) -> dict:
+    answered = 0
+    required_missing = 0
+    for item in items:
+        if is_item_complete(item):
+            answered += 1
+        elif item.is_required:
+            required_missing += 1
+
+    final = compute_final_score(items)
+    return {
+        "items_count": len(items),
+        "answered_count": answered,
+        "required_missing_count": required_missing,
+        "block_scores": compute_block_scores(items),
+        "final_score": None if final is None else Decimal(str(final)),
+    }
+
+
+def refresh_summary(evaluation, items=None, *, answered: bool = False) -> EvaluationSummary:
+    """
+    Recalcula el resumen de `evaluation` a partir de sus items.
+
+    Debe llamarse dentro de la misma transaccion que guarda las respuestas o el estado.
+    `answered=True` marca last_answer_at con la hora actual.
+    """
+    if items is None:
+        items = list(evaluation.items.all())
+    defaults = summary_values(items)
+    if answered:
+        defaults["last_answer_at"] = timezone.now()
+    summary, _ = EvaluationSummary.objects.update_or_create(
+        evaluation=evaluation,
+        defaults=defaults,
+    )
+    evaluation.summary = summary
+    return summary
+
+
+def summary_scores(evaluation, items):
+    """(score_total, block_scores) desde el resumen; si aun no existe, se calcula desde `items`."""
+    summary = getattr(evaluation, "summary", None)
+    if summary is None:
+        return compute_final_score(items), compute_block_scores(items)
+    final = None if summary.final_score is None else float(summary.final_score)
+    return final, summary.block_scores
+
+
+def format_block_scores(block_scores) -> str:
+    return " ".join(f"{block}={val}" for block, val in sorted((block_scores or {}).items()))
+
+
+def rebuild_period_summaries(period, *, chunk_size: int = 500):
+    """Reconstruye los resumenes de todas las evaluaciones de `period`. Genera el total acumulado."""
+    eval_ids = list(
+        Evaluation.objects.filter(period=period).order_by("id").values_list("id", flat=True)
+    )
+    done = 0
+    for start in range(0, len(eval_ids), chunk_size):
+        chunk_ids = eval_ids[start:start + chunk_size]
+        evaluations = Evaluation.objects.filter(id__in=chunk_ids).prefetch_related(
+            Prefetch("items", queryset=EvaluationItem.objects.order_by("display_order", "id"))
+        )
+        rows = [
+            EvaluationSummary(evaluation=ev, **summary_values(list(ev.items.all())))
+            for ev in evaluations
+        ]
+        EvaluationSummary.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["evaluation"],
+            update_fields=SUMMARY_FIELDS + ["updated_at"],
+        )
+        done += len(rows)
+        if rows:
+            # bulk_create no emite post_save: se avisa a quien agregue el periodo (cuadro de mando).
+            period_evaluations_changed.send(sender=Evaluation, period_id=period.pk)
+        yield done
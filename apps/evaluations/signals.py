@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from apps.evaluations.models import Evaluation
+from apps.evaluations.services.dashboard import REPORT_FIELDS, bump_period_report_version
+
+# Cambios masivos (bulk_create) en las evaluaciones de un periodo, que no emiten post_save.
+# Argumento: period_id. Lo escuchan otras apps (reporting) sin que evaluations dependa de ellas.
+period_evaluations_changed = Signal()
+
+
+@receiver(post_save, sender=Evaluation)
+def bump_report_version_on_save(sender, instance, created, update_fields=None, **kwargs):
+    # Los guardados parciales que no tocan filtros ni orden (comentarios, plantilla) no invalidan.
+    # La version se escribe al hacer commit (on_commit), una vez por transaccion y periodo.
+    if not created and update_fields is not None and not REPORT_FIELDS & set(update_fields):
+        return
+    bump_period_report_version(instance.period_id)
+
+
+@receiver(post_delete, sender=Evaluation)
+def bump_report_version_on_delete(sender, instance, **kwargs):
+    bump_period_report_version(instance.period_id)
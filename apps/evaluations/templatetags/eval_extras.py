@@ -1,7 +1,7 @@
-import re
-
 from django import template
 
+from apps.templates_eval.models import block_code_from_title
+
 register = template.Library()
 
 @register.filter
@@ -13,5 +13,4 @@ def get_item(d, key):
 
 @register.filter
 def block_code_from_section(title):
-    match = re.search(r"bloque\s+([a-e])\b", title or "", re.IGNORECASE)
-    return match.group(1).upper() if match else "UNK"
+    return block_code_from_title(title)
@@ -1,16 +1,46 @@
 import csv
-from io import StringIO
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
 from unittest import mock
 
+import openpyxl
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
-from apps.core.permissions import HR_ADMIN, MANAGER
-from apps.evaluations.models import Evaluation, EvaluationItem, EvaluationPeriod
+from apps.core.permissions import HR_ADMIN, MANAGER, role_names
+from apps.evaluations.models import (
+    Evaluation,
+    EvaluationItem,
+    EvaluationPeriod,
+    EvaluationSummary,
+    ExportJob,
+)
+from apps.evaluations.selectors import keyset_ordering, period_report_page
+from apps.evaluations.services.answers import save_answers
+from apps.evaluations.services.dashboard import period_report_version, period_totals
+from apps.evaluations.services.export_jobs import claim_next_job, cleanup_export_jobs
+from apps.evaluations.services.exports import STATS_HEADER
+from apps.evaluations.services.provisioning import provision_period
+from apps.evaluations.services.stats import position_block_stats, score_trend
+from apps.evaluations.services.summary import refresh_summary
 from apps.org.models import Department, Employee, Position
+from apps.templates_eval.models import EvaluationTemplate, TemplateQuestion, TemplateSection
+from apps.templates_eval.services import get_template_snapshot
 
 
 class ReportExportsTests(TestCase):
@@ -41,14 +71,15 @@ class ReportExportsTests(TestCase):
             evaluation_position=self.position,
             manager=manager,
         )
-        ev = Evaluation.objects.create(
-            employee=emp,
-            evaluator=self.manager,
-            period=self.period,
-            status=Evaluation.Status.DRAFT,
-            frozen_position_code=self.position.code,
-            frozen_position_name=self.position.name,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ev = Evaluation.objects.create(
+                employee=emp,
+                evaluator=self.manager,
+                period=self.period,
+                status=Evaluation.Status.DRAFT,
+                frozen_position_code=self.position.code,
+                frozen_position_name=self.position.name,
+            )
         return emp, ev
 
     def test_manager_scope_csv(self):
@@ -59,7 +90,8 @@ class ReportExportsTests(TestCase):
         url = reverse("report_period_export_csv", args=[self.period.id])
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        content = resp.content.decode("utf-8")
+        self.assertTrue(resp.streaming)
+        content = resp.getvalue().decode("utf-8")
         self.assertIn(emp1.dni, content)
         self.assertNotIn(emp2.dni, content)
 
@@ -68,21 +100,135 @@ class ReportExportsTests(TestCase):
             self._make_employee_eval(f"Emp {i:02d}", f"DNI{i:02d}", self.manager)
 
         self.client.force_login(self.manager)
+        resp = self.client.get(reverse("report_period_detail", args=[self.period.id]))
+        cursor = resp.context["page"].next_cursor
+        self.assertTrue(cursor)
+
         url = reverse("report_period_export_csv", args=[self.period.id])
         resp = self.client.get(
             url,
             {
-                "page": "2",
+                "cursor": cursor,
                 "page_size": "25",
                 "export_scope": "page",
             },
         )
         self.assertEqual(resp.status_code, 200)
-        content = resp.content.decode("utf-8")
+        content = resp.getvalue().decode("utf-8")
         reader = csv.reader(StringIO(content.lstrip("\ufeff")))
         rows = list(reader)
         # header + 5 rows
         self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][1], "DNI25")
+
+    def test_score_trend_json(self):
+        emp1, ev1 = self._make_employee_eval("Alice", "DNI1", self.manager)
+        _, ev2 = self._make_employee_eval("Bob", "DNI2", self.hr_admin)
+        earlier = EvaluationPeriod.objects.create(name="2024 Anual", start_date="2024-01-01", end_date="2024-12-31")
+        ev0 = Evaluation.objects.create(
+            employee=emp1,
+            evaluator=self.manager,
+            period=earlier,
+            frozen_position_code="P99",
+            frozen_position_name="Pos",
+        )
+        EvaluationSummary.objects.create(evaluation=ev0, final_score="2.500", block_scores={"A": 2.5})
+        EvaluationSummary.objects.create(evaluation=ev1, final_score="4.000", block_scores={"A": 4.0})
+        EvaluationSummary.objects.create(evaluation=ev2, final_score="3.000", block_scores={"A": 3.0})
+
+        with self.assertNumQueries(1):
+            trend = score_trend(Evaluation.objects.all())
+        self.assertEqual([p["name"] for p in trend["periods"]], ["2024 Anual", "2025 Anual"])
+        self.assertEqual([e["full_name"] for e in trend["employees"]], ["Alice", "Bob"])
+        self.assertEqual(
+            [(p["period_id"], p["final_score"], p["block_scores"]) for p in trend["employees"][0]["points"]],
+            [(earlier.id, 2.5, {"A": 2.5}), (self.period.id, 4.0, {"A": 4.0})],
+        )
+
+        self.client.force_login(self.manager)
+        url = reverse("report_score_trend_json")
+        data = self.client.get(url).json()
+        self.assertEqual([e["dni"] for e in data["employees"]], ["DNI1"])
+        data = self.client.get(url, {"employee": ev2.employee_id}).json()
+        self.assertEqual(data["employees"], [])
+
+        self.client.force_login(self.hr_admin)
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {"q": " "}).status_code, 400)
+        data = self.client.get(url, {"q": "bob"}).json()
+        self.assertEqual([e["dni"] for e in data["employees"]], ["DNI2"])
+        self.assertEqual(data["periods"][0]["start_date"], "2025-01-01")
+
+    def test_report_page_result_cache(self):
+        _, ev1 = self._make_employee_eval("Alice", "DNI1", self.manager)
+        self._make_employee_eval("Bob", "DNI2", self.manager)
+        cache.clear()
+        self.client.force_login(self.manager)
+        url = reverse("report_period_detail", args=[self.period.id])
+        params = {"sort": "status", "dir": "desc"}
+
+        with mock.patch(
+            "apps.evaluations.services.dashboard.period_report_page", wraps=period_report_page
+        ) as page_query, mock.patch(
+            "apps.evaluations.services.dashboard.position_block_stats", wraps=position_block_stats
+        ) as stats_query:
+            first = self.client.get(url, params)
+            second = self.client.get(url, params)
+            self.assertEqual(page_query.call_count, 1)
+            self.assertEqual(stats_query.call_count, 1)
+            self.assertEqual(
+                [ev.id for ev in first.context["evaluations"]],
+                [ev.id for ev in second.context["evaluations"]],
+            )
+
+            # Un guardado que no afecta a filtros ni orden no invalida.
+            ev1.overall_comment = "ok"
+            ev1.save(update_fields=["overall_comment", "updated_at"])
+            self.client.get(url, params)
+            self.assertEqual(page_query.call_count, 1)
+
+            ev1.set_status(Evaluation.Status.SUBMITTED)
+            with self.captureOnCommitCallbacks(execute=True):
+                ev1.save(update_fields=["status", "submitted_at", "status_changed_at", "updated_at"])
+            resp = self.client.get(url, params)
+            self.assertEqual(page_query.call_count, 2)
+            self.assertEqual(stats_query.call_count, 2)
+            self.assertEqual(resp.context["evaluations"][0].id, ev1.id)
+            self.assertEqual(resp.context["totals"]["SUBMITTED"], 1)
+
+    def test_keyset_pagination_stable_across_status_changes(self):
+        evaluations = [
+            self._make_employee_eval(f"Emp {i:02d}", f"DNI{i:02d}", self.manager)[1] for i in range(7)
+        ]
+        for ev, score in zip(evaluations, [None, "3.000", "3.000", None, "4.500", "2.000", "3.000"]):
+            Evaluation.objects.filter(id=ev.id).update(final_score=score)
+        qs = Evaluation.objects.filter(period=self.period)
+
+        for direction in ("asc", "desc"):
+            expected = [
+                ev.id for ev in qs.order_by(*keyset_ordering("final_score", direction == "asc"))
+            ]
+            seen = []
+            page = period_report_page(qs, "score", direction, "", 3)
+            self.assertFalse(page.prev_cursor)
+            while True:
+                seen.extend(ev.id for ev in page.rows)
+                if not page.next_cursor:
+                    break
+                page = period_report_page(qs, "score", direction, page.next_cursor, 3)
+            self.assertEqual(seen, expected)
+
+            back = period_report_page(qs, "score", direction, page.prev_cursor, 3)
+            self.assertEqual([ev.id for ev in back.rows], expected[3:6])
+
+        # Un cambio en filas ya vistas no desplaza la pagina siguiente.
+        page = period_report_page(qs, "employee", "asc", "", 3)
+        Evaluation.objects.filter(id=evaluations[0].id).delete()
+        page = period_report_page(qs, "employee", "asc", page.next_cursor, 3)
+        self.assertEqual([ev.employee.dni for ev in page.rows], ["DNI03", "DNI04", "DNI05"])
+        # Un cursor de otro orden se ignora: primera pagina.
+        other = period_report_page(qs, "status", "asc", page.next_cursor, 3)
+        self.assertFalse(other.prev_cursor)
 
     def test_xlsx_limits(self):
         emp, ev = self._make_employee_eval("Alice", "DNI1", self.manager)
@@ -105,7 +251,9 @@ class ReportExportsTests(TestCase):
             dummy.count.return_value = 50001
             mocked.return_value = dummy
             resp = self.client.get(url)
-            self.assertEqual(resp.status_code, 400)
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn(b"Continuar de todos modos", resp.content)
+            self.assertIn(b"Generar en segundo plano", resp.content)
 
         with mock.patch("apps.evaluations.views.EvaluationItem.objects.filter") as mocked:
             dummy = mock.Mock()
@@ -116,6 +264,156 @@ class ReportExportsTests(TestCase):
             self.assertEqual(resp.status_code, 200)
             self.assertIn(b"Continuar de todos modos", resp.content)
 
+    def test_xlsx_stats_grouped_by_block(self):
+        emp, ev = self._make_employee_eval("Alice", "DNI1", self.manager)
+        for order, (block, value) in enumerate([("A", 3), ("A", 5), ("B", 2)], start=1):
+            EvaluationItem.objects.create(
+                evaluation=ev,
+                section_title=f"Bloque {block}",
+                block_code=block,
+                question_text=f"Q{order}",
+                question_type="SCALE_1_5",
+                is_required=True,
+                display_order=order,
+                value_scale=value,
+            )
+
+        self.client.force_login(self.manager)
+        resp = self.client.get(reverse("report_period_export_xlsx", args=[self.period.id]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        wb = openpyxl.load_workbook(BytesIO(resp.getvalue()))
+        resp.close()
+        self.assertEqual(wb.sheetnames, ["Resumen", "Detalle", "Stats"])
+        self.assertEqual(wb["Resumen"].max_row, 2)
+        detail = list(wb["Detalle"].iter_rows(min_row=2, values_only=True))
+        self.assertEqual([r[6] for r in detail], ["Q1", "Q2", "Q3"])
+        rows = list(wb["Stats"].iter_rows(min_row=2, values_only=True))
+        self.assertEqual(rows, [("P99", "A", 4, 3, 5, 1), ("P99", "B", 2, 2, 2, 1)])
+        # Misma implementacion que el informe de periodo.
+        stats = position_block_stats(Evaluation.objects.filter(period=self.period))
+        self.assertEqual(rows, [tuple(r[key] for key in STATS_HEADER) for r in stats])
+
+    def test_period_stats_json(self):
+        _, ev1 = self._make_employee_eval("Alice", "DNI1", self.manager)
+        _, ev2 = self._make_employee_eval("Bob", "DNI2", self.manager)
+        for ev, values in ((ev1, [2, 4]), (ev2, [5])):
+            for order, value in enumerate(values, start=1):
+                EvaluationItem.objects.create(
+                    evaluation=ev,
+                    section_title="Bloque A",
+                    block_code="A",
+                    question_text=f"Q{order}",
+                    question_type="SCALE_1_5",
+                    is_required=True,
+                    display_order=order,
+                    value_scale=value,
+                )
+        EvaluationItem.objects.create(
+            evaluation=ev1,
+            section_title="Bloque A",
+            block_code="A",
+            question_text="Sin contestar",
+            question_type="SCALE_1_5",
+            is_required=False,
+            display_order=3,
+        )
+
+        with self.assertNumQueries(1):
+            stats = position_block_stats(Evaluation.objects.filter(period=self.period))
+        self.assertEqual(
+            stats,
+            [{
+                "position_code": "P99",
+                "block": "A",
+                "avg_score": 3.67,
+                "min_score": 2,
+                "max_score": 5,
+                "evaluations_count": 2,
+            }],
+        )
+
+        self.client.force_login(self.manager)
+        url = reverse("report_period_stats_json", args=[self.period.id])
+        resp = self.client.get(url, {"q": "Alice"})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data["filters"]["q"], "Alice")
+        self.assertEqual(data["stats"][0]["avg_score"], 3.0)
+        self.assertEqual(data["stats"][0]["evaluations_count"], 1)
+
+    def test_period_totals_single_query_cached(self):
+        _, ev1 = self._make_employee_eval("Alice", "DNI1", self.manager)
+        self._make_employee_eval("Bob", "DNI2", self.manager)
+        self._make_employee_eval("Carol", "DNI3", self.hr_admin)
+        cache.clear()
+        role_names(self.manager)
+
+        # Version del periodo + una agregacion; con cache caliente solo la version.
+        with self.assertNumQueries(2):
+            totals = period_totals(self.period, self.manager, {"q": "Alice"})
+        self.assertEqual(
+            totals, {"DRAFT": 2, "SUBMITTED": 0, "FINAL": 0, "TOTAL": 2, "FILTERED": 1}
+        )
+        with self.assertNumQueries(1):
+            period_totals(self.period, self.manager, {"q": "Alice"})
+        self.assertEqual(period_totals(self.period, self.hr_admin, {})["TOTAL"], 3)
+
+        ev1.set_status(Evaluation.Status.SUBMITTED)
+        with self.captureOnCommitCallbacks(execute=True):
+            ev1.save(update_fields=["status", "submitted_at", "status_changed_at", "updated_at"])
+        totals = period_totals(self.period, self.manager, {"q": "Alice"})
+        self.assertEqual(totals["SUBMITTED"], 1)
+        self.assertEqual(totals["DRAFT"], 1)
+
+        self.client.force_login(self.manager)
+        resp = self.client.get(reverse("report_period_detail", args=[self.period.id]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "SUBMITTED=1")
+        self.assertContains(resp, "Mostrando 2 resultados")
+
+    def test_period_version_bumped_by_other_process_invalidates_pages(self):
+        self._make_employee_eval("Alice", "DNI1", self.manager)
+        _, ev2 = self._make_employee_eval("Bob", "DNI2", self.manager)
+        ev2.set_status(Evaluation.Status.FINAL)
+        ev2.save(update_fields=["status", "finalized_at", "status_changed_at", "updated_at"])
+        self.client.force_login(self.manager)
+        url = reverse("report_period_detail", args=[self.period.id])
+        params = {"status": "DRAFT"}
+        self.assertEqual(len(self.client.get(url, params).context["evaluations"]), 1)
+
+        # Otro worker reabre la evaluacion y sube la version sin tocar esta cache.
+        Evaluation.objects.filter(pk=ev2.pk).update(status=Evaluation.Status.DRAFT)
+        self.assertEqual(len(self.client.get(url, params).context["evaluations"]), 1)
+        EvaluationPeriod.objects.filter(pk=self.period.pk).update(report_version=F("report_version") + 1)
+        resp = self.client.get(url, params)
+        self.assertEqual(sorted(ev.employee.dni for ev in resp.context["evaluations"]), ["DNI1", "DNI2"])
+
+    def test_period_version_bumped_by_other_process_invalidates_totals(self):
+        _, ev1 = self._make_employee_eval("Alice", "DNI1", self.manager)
+        self.assertEqual(period_totals(self.period, self.manager, {})["DRAFT"], 1)
+
+        # Otro worker guarda la evaluacion: su cache local no es la nuestra, la version si.
+        Evaluation.objects.filter(pk=ev1.pk).update(status=Evaluation.Status.FINAL)
+        self.assertEqual(period_totals(self.period, self.manager, {})["DRAFT"], 1)
+        EvaluationPeriod.objects.filter(pk=self.period.pk).update(report_version=F("report_version") + 1)
+        self.assertEqual(period_totals(self.period, self.manager, {})["FINAL"], 1)
+
+    def test_period_version_bumped_once_on_commit(self):
+        _, ev1 = self._make_employee_eval("Alice", "DNI1", self.manager)
+        _, ev2 = self._make_employee_eval("Bob", "DNI2", self.manager)
+        before = period_report_version(self.period.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            for ev in (ev1, ev2):
+                ev.set_status(Evaluation.Status.SUBMITTED)
+                ev.save(update_fields=["status", "submitted_at", "status_changed_at", "updated_at"])
+            self.assertEqual(period_report_version(self.period.pk), before)
+        bumps = [c for c in callbacks if c.commit_key == ("period_report_version", self.period.pk)]
+        self.assertEqual(len(bumps), 1)
+        bumps[0]()
+        self.assertNotEqual(period_report_version(self.period.pk), before)
+
     def test_xlsx_confirm_preserves_querystring(self):
         emp, ev = self._make_employee_eval("Alice", "DNI1", self.manager)
         EvaluationItem.objects.create(
@@ -153,6 +451,70 @@ class ReportExportsTests(TestCase):
                 self.assertIn(f"{key}={val}", content)
 
 
+    def test_background_export_job(self):
+        emp, ev = self._make_employee_eval("Alice", "DNI1", self.manager)
+        self._make_employee_eval("Bob", "DNI2", self.manager)
+        EvaluationItem.objects.create(
+            evaluation=ev,
+            section_title="Bloque A",
+            question_text="Q1",
+            question_type="SCALE_1_5",
+            is_required=True,
+            display_order=1,
+            value_scale=4,
+        )
+
+        self.client.force_login(self.manager)
+        resp = self.client.post(
+            reverse("export_job_create", args=[self.period.id]),
+            {"kind": "CSV_SUMMARY", "query_params": "q=Alice&export_scope=filtered&page=3"},
+        )
+        self.assertRedirects(resp, reverse("export_job_list"))
+        job = ExportJob.objects.get()
+        self.assertEqual(job.query_params, "q=Alice")
+        self.assertEqual(job.status, ExportJob.Status.PENDING)
+
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            call_command("run_export_jobs", "--once", stdout=StringIO())
+            job.refresh_from_db()
+            self.assertEqual(job.status, ExportJob.Status.DONE)
+            self.assertEqual(job.rows_total, 1)
+
+            data = self.client.get(reverse("export_job_list"), {"format": "json"}).json()
+            self.assertEqual(data["jobs"][0]["progress"], 100)
+
+            resp = self.client.get(reverse("export_job_download", args=[job.id]))
+            content = b"".join(resp.streaming_content).decode("utf-8")
+            resp.close()
+            self.assertIn("DNI1", content)
+            self.assertNotIn("DNI2", content)
+
+            ExportJob.objects.filter(id=job.id).update(created_at=timezone.now() - timedelta(days=30))
+            self.assertEqual(cleanup_export_jobs(), 1)
+            self.assertFalse(os.listdir(os.path.join(media, "exports")))
+
+    def test_abandoned_export_job_is_retried_then_failed(self):
+        job = ExportJob.objects.create(
+            requested_by=self.manager, period=self.period, kind=ExportJob.Kind.CSV_SUMMARY
+        )
+        self.assertEqual(claim_next_job().id, job.id)
+        self.assertIsNone(claim_next_job())
+
+        # El worker muere: sin latido mas alla de la concesion vuelve a la cola.
+        long_ago = timezone.now() - timedelta(hours=2)
+        ExportJob.objects.filter(id=job.id).update(heartbeat_at=long_ago)
+        claimed = claim_next_job()
+        self.assertEqual((claimed.id, claimed.attempts), (job.id, 2))
+
+        ExportJob.objects.filter(id=job.id).update(
+            heartbeat_at=long_ago, created_at=timezone.now() - timedelta(days=30)
+        )
+        self.assertIsNone(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.FAILED)
+        self.assertEqual(cleanup_export_jobs(), 1)
+
+
 class EvaluationHistoryTests(TestCase):
     def setUp(self):
         User = get_user_model()
@@ -296,7 +658,7 @@ class EvaluationAlertsTests(TestCase):
         emp_draft = self._make_employee("Emp Draft", "A002")
         emp_submitted = self._make_employee("Emp Sub", "A003")
 
-        Evaluation.objects.create(
+        ev_draft = Evaluation.objects.create(
             employee=emp_draft,
             evaluator=self.manager,
             period=period,
@@ -304,6 +666,23 @@ class EvaluationAlertsTests(TestCase):
             frozen_position_code=self.position.code,
             frozen_position_name=self.position.name,
         )
+        EvaluationItem.objects.create(
+            evaluation=ev_draft,
+            section_title="Bloque A",
+            question_text="Q1",
+            question_type="SCALE_1_5",
+            is_required=True,
+            display_order=1,
+        )
+        EvaluationItem.objects.create(
+            evaluation=ev_draft,
+            section_title="Bloque A",
+            question_text="Q2",
+            question_type="TEXT",
+            is_required=True,
+            display_order=2,
+            value_text="   ",
+        )
         Evaluation.objects.create(
             employee=emp_submitted,
             evaluator=self.manager,
@@ -328,7 +707,40 @@ class EvaluationAlertsTests(TestCase):
 
         codes_sub = {a["code"] for a in alerts[emp_submitted.id]}
         self.assertIn("BLOCKED", codes_sub)
-        self.assertIn("MISSING_REQUIRED", codes_sub)
+        self.assertNotIn("MISSING_REQUIRED", codes_sub)
+
+        totals = resp.context["alert_totals"]
+        self.assertEqual(totals["NOT_STARTED"], 1)
+        self.assertEqual(totals["DRAFT"], 1)
+        self.assertEqual(totals["MISSING_REQUIRED"], 1)
+        self.assertEqual(totals["BLOCKED"], 1)
+        self.assertEqual(totals["TOTAL"], 3)
+
+        resp = self.client.get(reverse("my_team"), {"alert": "MISSING_REQUIRED"})
+        self.assertEqual([e.id for e in resp.context["employees"]], [emp_draft.id])
+        self.assertIn("Faltan obligatorios (2)", resp.content.decode("utf-8"))
+
+    def test_my_team_paginates(self):
+        today = timezone.now().date()
+        EvaluationPeriod.objects.create(
+            name="PeriodoPag",
+            start_date=today.replace(day=1),
+            end_date=today.replace(day=28),
+        )
+        for i in range(30):
+            self._make_employee(f"Emp {i:02d}", f"P{i:03d}")
+
+        self.client.force_login(self.manager)
+        resp = self.client.get(reverse("my_team"), {"page_size": "25", "page": "2"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.context["employees"]), 5)
+        self.assertEqual(resp.context["alert_totals"]["NOT_STARTED"], 30)
+
+        # El paginador reutiliza el total de la agregacion de alertas: sin COUNT aparte.
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse("my_team"), {"page_size": "25", "alert": "NOT_STARTED"})
+        self.assertEqual(resp.context["page_obj"].paginator.num_pages, 2)
+        self.assertFalse([q for q in queries.captured_queries if "__count" in q["sql"]])
 
     def test_alert_overdue(self):
         past = timezone.now().date().replace(year=2024, month=1, day=15)
@@ -355,3 +767,351 @@ class EvaluationAlertsTests(TestCase):
         codes = {a["code"] for a in alerts[emp.id]}
         self.assertIn("OVERDUE", codes)
         self.assertNotIn("DRAFT", codes)
+
+
+class AnswerPersistenceTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.manager = User.objects.create_user(username="mgr_answers", password="x")
+        Group.objects.get_or_create(name=MANAGER)[0].user_set.add(self.manager)
+
+        self.department = Department.objects.create(name="DeptAns")
+        self.position = Position.objects.create(
+            code="P96",
+            name="Pos",
+            department=self.department,
+            professional_group="GP1",
+        )
+        self.template = EvaluationTemplate.objects.create(
+            name="P96 v1",
+            base_code="P96",
+            version=1,
+            is_active=True,
+        )
+        self.period = EvaluationPeriod.objects.create(
+            name="2025 Ans",
+            start_date="2025-01-01",
+            end_date="2025-12-31",
+        )
+        self.employee = Employee.objects.create(
+            full_name="Ans Emp",
+            dni="ANS1",
+            evaluation_position=self.position,
+            manager=self.manager,
+        )
+        self.evaluation = Evaluation.objects.create(
+            employee=self.employee,
+            evaluator=self.manager,
+            period=self.period,
+            template=self.template,
+            status=Evaluation.Status.DRAFT,
+            frozen_position_code=self.position.code,
+            frozen_position_name=self.position.name,
+        )
+        self.scale = EvaluationItem.objects.create(
+            evaluation=self.evaluation,
+            section_title="Bloque A",
+            question_text="Q1",
+            question_type="SCALE_1_5",
+            is_required=True,
+            display_order=1,
+            value_scale=3,
+        )
+        self.yes_no = EvaluationItem.objects.create(
+            evaluation=self.evaluation,
+            section_title="Bloque A",
+            question_text="Q2",
+            question_type="YES_NO",
+            is_required=False,
+            display_order=2,
+        )
+        self.text = EvaluationItem.objects.create(
+            evaluation=self.evaluation,
+            section_title="Bloque B",
+            question_text="Q3",
+            question_type="TEXT",
+            is_required=False,
+            display_order=3,
+            value_text="igual",
+        )
+
+    def test_save_answers_writes_only_changed_items(self):
+        items = list(self.evaluation.items.all())
+        data = {
+            f"q_{self.scale.id}": "3",
+            f"q_{self.yes_no.id}": "1",
+            f"q_{self.text.id}": "igual",
+        }
+        with self.assertNumQueries(3):
+            changed = save_answers(items, data)
+        self.assertEqual(changed, 1)
+        self.yes_no.refresh_from_db()
+        self.assertIs(self.yes_no.value_yes_no, True)
+
+    def test_save_answers_noop_without_changes(self):
+        items = list(self.evaluation.items.all())
+        with self.assertNumQueries(0):
+            changed = save_answers(items, {f"q_{self.scale.id}": "3"})
+        self.assertEqual(changed, 0)
+
+    def test_evaluate_employee_post_saves_answers(self):
+        self.client.force_login(self.manager)
+        url = reverse("evaluate_employee", args=[self.employee.id, self.period.id])
+        resp = self.client.post(
+            url,
+            {
+                "action": "save",
+                f"q_{self.scale.id}": "5",
+                f"q_{self.text.id}": "nuevo",
+            },
+        )
+        self.assertEqual(resp.status_code, 302)
+        self.scale.refresh_from_db()
+        self.text.refresh_from_db()
+        self.assertEqual(self.scale.value_scale, 5)
+        self.assertEqual(self.text.value_text, "nuevo")
+
+    def test_post_refreshes_summary(self):
+        self.client.force_login(self.manager)
+        url = reverse("evaluate_employee", args=[self.employee.id, self.period.id])
+        self.client.post(url, {"action": "save", f"q_{self.scale.id}": "5"})
+
+        summary = EvaluationSummary.objects.get(evaluation=self.evaluation)
+        self.assertEqual(summary.items_count, 3)
+        self.assertEqual(summary.answered_count, 2)
+        self.assertEqual(summary.required_missing_count, 0)
+        self.assertEqual(summary.final_score, 5)
+        self.assertIsNotNone(summary.last_answer_at)
+
+    def test_rebuild_summaries_command(self):
+        out = StringIO()
+        call_command("rebuild_summaries", str(self.period.id), stdout=out)
+        summary = EvaluationSummary.objects.get(evaluation=self.evaluation)
+        self.assertEqual(summary.answered_count, 2)
+        self.assertEqual(summary.final_score, 3)
+        self.assertIsNone(summary.last_answer_at)
+        self.assertIn("Resumenes reconstruidos: 1", out.getvalue())
+
+    def test_backfill_block_codes(self):
+        out = StringIO()
+        call_command("backfill_block_codes", "--apply", stdout=out)
+        codes = dict(self.evaluation.items.values_list("question_text", "block_code"))
+        self.assertEqual(codes, {"Q1": "A", "Q2": "A", "Q3": "B"})
+        self.assertIn("items actualizados: 3", out.getvalue())
+
+    def test_new_evaluation_items_from_template_snapshot(self):
+        section = TemplateSection.objects.create(
+            template=self.template, title="Bloque A - Uno (60%)", order=1
+        )
+        TemplateQuestion.objects.create(section=section, text="Q-A2", order=2)
+        TemplateQuestion.objects.create(section=section, text="Q-A1", order=1, help_text="Ayuda A1")
+        new_emp = Employee.objects.create(
+            full_name="Nuevo Emp",
+            dni="ANS2",
+            evaluation_position=self.position,
+            manager=self.manager,
+        )
+
+        self.client.force_login(self.manager)
+        resp = self.client.get(reverse("evaluate_employee", args=[new_emp.id, self.period.id]))
+        self.assertEqual(resp.status_code, 200)
+        ev = Evaluation.objects.get(employee=new_emp, period=self.period)
+        items = list(ev.items.order_by("display_order"))
+        self.assertEqual([i.question_text for i in items], ["Q-A1", "Q-A2"])
+        self.assertEqual({i.block_code for i in items}, {"A"})
+        self.assertContains(resp, "Ayuda A1")
+
+    def test_open_period_provision(self):
+        section = TemplateSection.objects.create(template=self.template, title="Bloque A - Uno", order=1)
+        TemplateQuestion.objects.create(section=section, text="Q-P1", order=1, is_required=True)
+        TemplateQuestion.objects.create(section=section, text="Q-P2", order=2, is_required=False)
+        for n in range(3):
+            Employee.objects.create(
+                full_name=f"Prov {n}",
+                dni=f"PROV{n}",
+                evaluation_position=self.position,
+                manager=self.manager if n else None,
+            )
+
+        out = StringIO()
+        call_command("open_period", str(self.period.id), "--provision", stdout=out)
+        self.assertIn("DRY-RUN: 3 evaluaciones por crear (1 empleados sin manager)", out.getvalue())
+        self.assertEqual(Evaluation.objects.filter(period=self.period).count(), 1)
+
+        out = StringIO()
+        call_command(
+            "open_period", str(self.period.id), "--provision", "--apply", "--chunk-size", "2", stdout=out
+        )
+        self.assertIn("Evaluaciones creadas: 2", out.getvalue())
+        self.assertIn("Omitidas (sin plantilla activa, sin evaluador o ya creadas): 1", out.getvalue())
+
+        ev = Evaluation.objects.get(period=self.period, employee__dni="PROV1")
+        self.assertEqual(ev.evaluator, self.manager)
+        self.assertEqual(ev.template, self.template)
+        texts = ev.items.order_by("display_order").values_list("question_text", flat=True)
+        self.assertEqual(list(texts), ["Q-P1", "Q-P2"])
+        self.assertEqual(ev.summary.required_missing_count, 1)
+
+        # Reanudable: solo crea lo que falta.
+        out = StringIO()
+        call_command(
+            "open_period", str(self.period.id), "--provision", "--apply", "--evaluator", "mgr_answers", stdout=out
+        )
+        self.assertIn("Evaluaciones creadas: 1", out.getvalue())
+        self.assertEqual(Evaluation.objects.filter(period=self.period).count(), 4)
+
+    def test_provision_skips_evaluations_created_concurrently(self):
+        section = TemplateSection.objects.create(template=self.template, title="Bloque A - Uno", order=1)
+        TemplateQuestion.objects.create(section=section, text="Q-P1", order=1)
+        for n in range(2):
+            Employee.objects.create(
+                full_name=f"Prov {n}", dni=f"PROV{n}", evaluation_position=self.position, manager=self.manager
+            )
+        # Candidatos leidos antes de que la vista creara la evaluacion de self.employee.
+        candidates = Employee.objects.filter(is_active=True, evaluation_position__isnull=False)
+        with mock.patch(
+            "apps.evaluations.services.provisioning.provisioning_candidates", return_value=candidates
+        ), mock.patch(
+            "apps.evaluations.services.provisioning.get_template_snapshot", wraps=get_template_snapshot
+        ) as snapshot_calls:
+            self.assertEqual(list(provision_period(self.period)), [(2, 1)])
+        self.assertEqual(snapshot_calls.call_count, 1)
+
+        self.assertFalse(self.evaluation.items.filter(question_text="Q-P1").exists())
+        created = Evaluation.objects.filter(period=self.period, employee__dni__startswith="PROV")
+        self.assertEqual([ev.items.count() for ev in created], [1, 1])
+        self.assertEqual(EvaluationSummary.objects.filter(evaluation__in=created).count(), 2)
+
+    def test_autosave_writes_only_touched_items(self):
+        self.client.force_login(self.manager)
+        url = reverse("evaluation_autosave", args=[self.evaluation.id])
+        payload = {"answers": {str(self.scale.id): 5, str(self.yes_no.id): True}}
+        resp = self.client.post(url, json.dumps(payload), content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data["changed"], 2)
+        self.assertEqual(data["final_score"], 5.0)
+        self.scale.refresh_from_db()
+        self.yes_no.refresh_from_db()
+        self.assertEqual(self.scale.value_scale, 5)
+        self.assertTrue(self.yes_no.value_yes_no)
+
+        resp = self.client.post(
+            url, json.dumps({"answers": {str(self.scale.id): "9"}}), content_type="application/json"
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn(str(self.scale.id), resp.json()["errors"])
+
+        self.period.is_closed = True
+        self.period.save(update_fields=["is_closed"])
+        resp = self.client.post(
+            url, json.dumps({"answers": {str(self.scale.id): "1"}}), content_type="application/json"
+        )
+        self.assertEqual(resp.status_code, 403)
+        self.scale.refresh_from_db()
+        self.assertEqual(self.scale.value_scale, 5)
+
+    def test_evaluate_conditional_get(self):
+        self.client.force_login(self.manager)
+        url = reverse("evaluate_employee", args=[self.employee.id, self.period.id])
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp["ETag"]
+        # Solo ETag: una fecha no refleja cambios de permisos o de bloqueo del periodo.
+        self.assertNotIn("Last-Modified", resp)
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(resp.status_code, 200)
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        save_answers([self.scale], {f"q_{self.scale.id}": "5"})
+        refresh_summary(self.evaluation)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+        history_url = reverse("evaluation_history_view", args=[self.evaluation.id])
+        resp = self.client.get(history_url)
+        resp = self.client.get(history_url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_evaluate_page_groups_items_by_block(self):
+        EvaluationItem.objects.create(
+            evaluation=self.evaluation,
+            section_title="Competencias",
+            question_text="Q9",
+            question_type="TEXT",
+            display_order=9,
+        )
+        self.client.force_login(self.manager)
+        resp = self.client.get(reverse("evaluate_employee", args=[self.employee.id, self.period.id]))
+        blocks = resp.context["blocks"]
+        self.assertEqual([b["code"] for b in blocks], ["A", "B", "UNK"])
+        self.assertEqual([s["title"] for s in blocks[0]["sections"]], ["Bloque A"])
+        self.assertEqual(
+            [i.question_text for i in blocks[0]["sections"][0]["items"]], ["Q1", "Q2"]
+        )
+        self.assertFalse(any(i.is_missing for b in blocks for s in b["sections"] for i in s["items"]))
+        self.assertContains(resp, "<h3>Bloque B</h3>", html=False)
+        self.assertContains(resp, "<h3>Sin bloque</h3>", html=False)
+
+    def test_items_csv_streams_rows(self):
+        self.client.force_login(self.manager)
+        resp = self.client.get(reverse("report_period_export_items_csv", args=[self.period.id]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        with self.assertLogs("apps.evaluations.views", level="INFO") as logs:
+            rows = list(csv.reader(StringIO(resp.getvalue().decode("utf-8").lstrip("\ufeff"))))
+        self.assertEqual(rows[0][0], "period")
+        self.assertEqual([r[6] for r in rows[1:]], ["Q1", "Q2", "Q3"])
+        self.assertEqual(rows[1][9], "3")
+        self.assertEqual(logs.records[0].rows, 3)
+
+    def test_items_export_compressed_formats(self):
+        self.client.force_login(self.manager)
+        url = reverse("report_period_export_items_csv", args=[self.period.id])
+
+        resp = self.client.get(url, {"format": "csv.gz"})
+        self.assertEqual(resp["Content-Type"], "application/gzip")
+        self.assertIn("items.csv.gz", resp["Content-Disposition"])
+        with self.assertLogs("apps.evaluations.views", level="INFO") as logs:
+            text = gzip.decompress(resp.getvalue()).decode("utf-8").lstrip("\ufeff")
+        self.assertEqual([r[6] for r in list(csv.reader(StringIO(text)))[1:]], ["Q1", "Q2", "Q3"])
+        self.assertEqual((logs.records[0].rows, logs.records[0].format), (3, "csv.gz"))
+
+        resp = self.client.get(url, {"format": "ndjson.gz"})
+        lines = gzip.decompress(resp.getvalue()).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line)["question_text"] for line in lines], ["Q1", "Q2", "Q3"])
+
+        resp = self.client.get(url, {"format": "ndjson"})
+        self.assertEqual(json.loads(resp.getvalue().decode("utf-8").splitlines()[0])["answer_value"], "3")
+        self.assertEqual(self.client.get(url, {"format": "xml"}).status_code, 400)
+
+    def test_periods_zip_bundle_with_manifest(self):
+        other = EvaluationPeriod.objects.create(name="2026 Ans", start_date="2026-01-01", end_date="2026-12-31")
+        self.client.force_login(self.manager)
+        url = reverse("report_periods_export_zip")
+
+        resp = self.client.get(url, {"periods": [self.period.id, other.id], "q": "ans"})
+        self.assertTrue(resp.streaming)
+        with self.assertLogs("apps.evaluations.views", level="INFO") as logs:
+            archive = zipfile.ZipFile(BytesIO(resp.getvalue()))
+        self.assertEqual(
+            archive.namelist(),
+            [
+                f"period_{self.period.id}_summary.csv",
+                f"period_{self.period.id}_items.csv",
+                f"period_{other.id}_summary.csv",
+                f"period_{other.id}_items.csv",
+                "manifest.json",
+            ],
+        )
+        manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(manifest["periods"], ["2025 Ans", "2026 Ans"])
+        self.assertEqual([f["rows"] for f in manifest["files"]], [1, 3, 0, 0])
+        items = archive.read(f"period_{self.period.id}_items.csv")
+        self.assertEqual(manifest["files"][1]["sha256"], hashlib.sha256(items).hexdigest())
+        self.assertEqual(logs.records[0].rows, 4)
+
+        self.assertEqual(self.client.get(url).status_code, 400)
@@ -4,11 +4,18 @@ from . import views
 urlpatterns = [
     path("my-team/", views.my_team, name="my_team"),
     path("evaluate/<int:employee_id>/<int:period_id>/", views.evaluate_employee, name="evaluate_employee"),
+    path("evaluation/<int:evaluation_id>/answers/", views.evaluation_autosave, name="evaluation_autosave"),
     path("evaluation/<int:evaluation_id>/history/", views.evaluation_history_view, name="evaluation_history_view"),
     path("reports/period/", views.report_period, name="report_period"),
     path("reports/period/<int:period_id>/", views.report_period, name="report_period_detail"),
     path("reports/period/<int:period_id>/export.csv", views.report_period_export_csv, name="report_period_export_csv"),
     path("reports/period/<int:period_id>/export_items.csv", views.report_period_export_items_csv, name="report_period_export_items_csv"),
     path("reports/period/<int:period_id>/export.xlsx", views.report_period_export_xlsx, name="report_period_export_xlsx"),
+    path("reports/period/<int:period_id>/stats.json", views.report_period_stats_json, name="report_period_stats_json"),
+    path("reports/period/<int:period_id>/export-jobs/", views.export_job_create, name="export_job_create"),
+    path("reports/export_bundle.zip", views.report_periods_export_zip, name="report_periods_export_zip"),
+    path("reports/trend.json", views.report_score_trend_json, name="report_score_trend_json"),
+    path("reports/export-jobs/", views.export_job_list, name="export_job_list"),
+    path("reports/export-jobs/<int:job_id>/download/", views.export_job_download, name="export_job_download"),
     path("reports/system/", views.report_system, name="report_system"),
 ]
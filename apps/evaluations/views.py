@@ -1,21 +1,37 @@
 ﻿import csv
+import hashlib
 import io
+import json
 import logging
+import os
+import tempfile
 import time
-import re
-from collections import Counter, defaultdict
+from collections import Counter
 from datetime import datetime
 
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
-from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render, redirect
 from django.db.models import Count, Max
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from django.http import QueryDict
 from django.utils import timezone
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.html import escape
+from django.utils.http import quote_etag
+from django.utils.functional import cached_property
 from django.utils.text import Truncator
 
 from apps.core.permissions import can_evaluate, is_hr_admin, is_manager
@@ -26,15 +42,52 @@ from apps.evaluations.models import (
     Evaluation,
     EvaluationScore,
     EvaluationItem,
+    ExportJob,
     ReportFilterPreset,
 )
-from apps.templates_eval.models import (
-    EvaluationTemplate,
-    TemplateActive,
-    TemplateAssignment,
-    TemplateQuestion,
+from apps.evaluations.selectors import (
+    ALERT_CODES,
+    TREND_FILTERS,
+    alert_conditions,
+    alert_counts,
+    has_trend_filter,
+    period_report_page,
+    period_report_queryset,
+    team_overview_queryset,
+    trend_queryset,
+    visibility_scope,
+)
+from apps.evaluations.services.answers import answer_error, save_answers
+from apps.evaluations.services.dashboard import period_position_stats, period_report_results
+from apps.evaluations.services.export_jobs import enqueue_export, export_retention_days
+from apps.evaluations.services.exports import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    ITEM_HEADER,
+    SUMMARY_HEADER,
+    SUMMARY_VALUES,
+    bundle_files,
+    item_rows,
+    stream_export,
+    stream_zip,
+    summary_rows,
+    write_period_workbook,
+)
+from apps.evaluations.services.provisioning import create_items_from_template
+from apps.evaluations.services.stats import score_trend
+from apps.evaluations.services.summary import refresh_summary, summary_scores
+from apps.evaluations.services.scores import (
+    compute_final_score,
+    is_item_complete,
+    item_block_code,
+)
+from apps.templates_eval.models import TemplateQuestion, UNKNOWN_BLOCK
+from apps.templates_eval.services import (
+    get_template_registry,
+    get_template_snapshot,
+    resolve_active_template,
+    snapshot_generation,
 )
-from apps.templates_eval.services import resolve_active_template
 
 try:
     import openpyxl
@@ -44,16 +97,6 @@ except Exception:  # pragma: no cover
 logger = logging.getLogger(__name__)
 
 
-def compute_final_score(items):
-    scores = []
-    for item in items:
-        if item.question_type == TemplateQuestion.SCALE_1_5 and item.value_scale is not None:
-            scores.append(item.value_scale)
-    if not scores:
-        return None
-    return round(sum(scores) / len(scores), 2)
-
-
 def can_edit_evaluation(user, evaluation: Evaluation) -> bool:
     if evaluation.status == Evaluation.Status.DRAFT:
         return is_manager(user)
@@ -90,108 +133,75 @@ def resolve_default_period():
     return EvaluationPeriod.objects.order_by("-end_date", "-start_date", "-id").first()
 
 
-def item_answer_as_text(item) -> str:
-    if item.question_type == TemplateQuestion.SCALE_1_5:
-        return "" if item.value_scale is None else str(item.value_scale)
-    if item.question_type == TemplateQuestion.YES_NO:
-        if item.value_yes_no is None:
-            return ""
-        return "YES" if item.value_yes_no else "NO"
-    if item.question_type == TemplateQuestion.TEXT:
-        return item.value_text or ""
-    return ""
-
-
-BLOCK_RE = re.compile(r"bloque\\s+([a-e])\\b", re.IGNORECASE)
-
+def attach_help_texts(items, template) -> None:
+    if template is None:
+        return
+    snapshot = get_template_snapshot(template)
+    help_by_question = {
+        (section.title, q.text): q.help_text
+        for section in snapshot.sections
+        for q in section.questions
+    }
+    for item in items:
+        item.help_text = help_by_question.get((item.section_title, item.question_text), "")
+
+
+def evaluation_etag(evaluation, *flags) -> str:
+    """
+    ETag de la pagina de una evaluacion: estado y marcas de tiempo de la evaluacion y de su
+    resumen (que se refresca con cada cambio de respuestas), mas los flags del usuario que
+    alteran la pagina (permisos, bloqueo del periodo). Sin Last-Modified: una fecha no
+    recoge esos flags y If-Modified-Since devolveria 304 con permisos ya cambiados.
+    """
+    summary = getattr(evaluation, "summary", None)
+    parts = [
+        evaluation.id,
+        evaluation.status,
+        evaluation.updated_at,
+        evaluation.status_changed_at,
+        summary.updated_at if summary else None,
+        evaluation.template_id,
+        snapshot_generation(),
+        timezone.localdate(),
+        *flags,
+    ]
+    return quote_etag(hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest())
 
-def block_from_section(title: str) -> str:
-    m = BLOCK_RE.search(title or "")
-    return m.group(1).upper() if m else "UNK"
 
+def with_etag(response, etag):
+    response["ETag"] = etag
+    # Siempre revalidar: el contenido depende del usuario y de su estado de permisos.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-def create_items_from_template(evaluation: Evaluation, template) -> None:
-    items = []
-    order = 1
-    sections = template.sections.prefetch_related("questions").order_by("order", "id")
-    for section in sections:
-        questions = section.questions.order_by("order", "id")
-        for q in questions:
-            is_required = getattr(q, "is_required", None)
-            if is_required is None:
-                is_required = q.required
-            items.append(
-                EvaluationItem(
-                    evaluation=evaluation,
-                    section_title=section.title,
-                    question_text=q.text,
-                    question_type=q.question_type,
-                    is_required=bool(is_required),
-                    display_order=order,
-                )
-            )
-            order += 1
-    if items:
-        EvaluationItem.objects.bulk_create(items)
-
-
-def compute_block_scores(items):
-    by_block = defaultdict(list)
-    for item in items:
-        if item.question_type != TemplateQuestion.SCALE_1_5:
-            continue
-        if item.value_scale is None:
-            continue
-        by_block[block_from_section(item.section_title)].append(item.value_scale)
 
-    scores = {}
-    for block, values in by_block.items():
-        scores[block] = round(sum(values) / len(values), 2) if values else None
-    return scores
+def report_page_size(request) -> int:
+    page_size = request.GET.get("page_size") or "25"
+    if page_size not in {"25", "50", "100"}:
+        page_size = "25"
+    return int(page_size)
 
 
-def build_period_report_queryset(request, period, user):
-    employees = employees_visible_to(user)
-    qs = (
-        Evaluation.objects.filter(period=period, employee__in=employees)
-        .select_related("employee", "period")
+def report_page(request, qs, applied_filters):
+    """Pagina (por cursor) del informe de periodo segun page_size/cursor del GET."""
+    return period_report_page(
+        qs,
+        applied_filters["sort"],
+        applied_filters["dir"],
+        request.GET.get("cursor") or "",
+        report_page_size(request),
     )
-    status = (request.GET.get("status") or "").strip().upper()
-    if status in {Evaluation.Status.DRAFT, Evaluation.Status.SUBMITTED, Evaluation.Status.FINAL}:
-        qs = qs.filter(status=status)
-
-    q = (request.GET.get("q") or "").strip()
-    if q:
-        qs = qs.filter(
-            models.Q(employee__full_name__icontains=q)
-            | models.Q(employee__dni__icontains=q)
-        )
 
-    sort_map = {
-        "employee": "employee__full_name",
-        "status": "status",
-        "score": "final_score",
-        "updated": "status_changed_at",
-        "submitted": "submitted_at",
-        "finalized": "finalized_at",
-    }
-    sort = (request.GET.get("sort") or "employee").strip().lower()
-    direction = (request.GET.get("dir") or "asc").strip().lower()
-    sort_field = sort_map.get(sort, "employee__full_name")
-    if direction not in {"asc", "desc"}:
-        direction = "asc"
-    if direction == "desc":
-        sort_field = f"-{sort_field}"
 
-    qs = qs.order_by(sort_field, "employee__id")
-    return qs, {"status": status, "q": q, "sort": sort, "dir": direction}
+def build_period_report_queryset(request, period, user):
+    return period_report_queryset(period, user, request.GET)
 
 
 def get_block_codes(items):
     seen = set()
     ordered = []
     for item in items:
-        code = block_from_section(item.section_title)
+        code = item_block_code(item)
         if code not in seen:
             ordered.append(code)
             seen.add(code)
@@ -203,6 +213,43 @@ def get_block_codes(items):
     return ordered_sorted
 
 
+def group_items(items, missing_required=frozenset()) -> list:
+    """
+    Items agrupados para la plantilla: bloques (orden de get_block_codes), secciones en
+    orden de aparicion e items, con `is_missing` calculado una sola vez.
+    """
+    blocks = {code: {"code": code, "sections": {}} for code in get_block_codes(items)}
+    for item in items:
+        item.is_missing = item.id in missing_required
+        sections = blocks[item_block_code(item)]["sections"]
+        sections.setdefault(item.section_title, []).append(item)
+    return [
+        {
+            "code": block["code"],
+            "label": "Sin bloque" if block["code"] in ("", UNKNOWN_BLOCK) else f"Bloque {block['code']}",
+            "sections": [
+                {"title": title, "items": section_items}
+                for title, section_items in block["sections"].items()
+            ],
+        }
+        for block in blocks.values()
+    ]
+
+
+def background_export_form(request, period, kind: str) -> str:
+    """Formulario HTML que encola el export actual (filtros del GET) como ExportJob."""
+    query_params = build_querystring(
+        request, exclude={"page", "cursor", "page_size", "export_scope", "confirm"}
+    )
+    return (
+        f'<form method="post" action="{reverse("export_job_create", args=[period.id])}">'
+        f'<input type="hidden" name="csrfmiddlewaretoken" value="{get_token(request)}">'
+        f'<input type="hidden" name="kind" value="{kind}">'
+        f'<input type="hidden" name="query_params" value="{escape(query_params)}">'
+        '<button type="submit">Generar en segundo plano</button></form>'
+    )
+
+
 def build_querystring(request, *, exclude=None, overrides=None) -> str:
     exclude = set(exclude or [])
     qd = QueryDict("", mutable=True)
@@ -240,6 +287,18 @@ def user_role_label(user) -> str:
 
 
 
+class CountedPaginator(Paginator):
+    """Paginator con el total ya conocido (p.ej. de una agregacion): no lanza otro COUNT."""
+
+    def __init__(self, object_list, per_page, *, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+
+    @cached_property
+    def count(self):
+        return self.known_count
+
+
 @login_required
 def my_team(request):
     if not can_evaluate(request.user):
@@ -248,7 +307,7 @@ def my_team(request):
     employees = (
         employees_visible_to(request.user)
         .select_related("evaluation_position", "manager")
-        .order_by("full_name")
+        .order_by("full_name", "id")
     )
 
     current_period = (
@@ -256,22 +315,41 @@ def my_team(request):
         .order_by("-start_date")
         .first()
     )
-    eval_by_employee_id = {}
+
+    alert_filter = (request.GET.get("alert") or "").strip().upper()
+    if alert_filter not in ALERT_CODES:
+        alert_filter = ""
+    alert_totals = {}
+    today = timezone.now().date()
     if current_period:
-        evals = (
-            Evaluation.objects
-            .filter(period=current_period, employee__in=employees)
-            .only("id", "employee_id", "status", "final_score", "overall_comment")
+        employees = team_overview_queryset(employees, current_period)
+        conditions = alert_conditions(
+            current_period,
+            today=today,
+            user_can_edit_drafts=is_manager(request.user),
         )
-        eval_by_employee_id = {ev.employee_id: ev for ev in evals}
+        alert_totals = alert_counts(employees, conditions)
+        if alert_filter:
+            employees = employees.filter(conditions[alert_filter])
+
+    page_size = request.GET.get("page_size") or "50"
+    if page_size not in {"25", "50", "100"}:
+        page_size = "50"
+    if alert_totals:
+        # El total (o el de la alerta filtrada) sale de la misma agregacion que los contadores.
+        total = alert_totals[alert_filter] if alert_filter else alert_totals["TOTAL"]
+        paginator = CountedPaginator(employees, int(page_size), count=total)
+    else:
+        paginator = Paginator(employees, int(page_size))
+    page_obj = paginator.get_page(request.GET.get("page") or "1")
+    page_employees = list(page_obj.object_list)
 
     alerts_by_employee_id = {}
-    today = timezone.now().date()
     if current_period:
-        for e in employees:
-            ev = eval_by_employee_id.get(e.id)
+        period_overdue = bool(current_period.end_date and today > current_period.end_date)
+        for e in page_employees:
             alerts = []
-            if not ev:
+            if e.ev_id is None:
                 alerts.append(
                     {
                         "code": "NOT_STARTED",
@@ -280,8 +358,7 @@ def my_team(request):
                     }
                 )
             else:
-                is_sent = ev.status in {Evaluation.Status.SUBMITTED, Evaluation.Status.FINAL}
-                is_overdue = current_period.end_date and today > current_period.end_date and not is_sent
+                is_overdue = period_overdue and e.ev_status == Evaluation.Status.DRAFT
                 if is_overdue:
                     alerts.append(
                         {
@@ -290,7 +367,7 @@ def my_team(request):
                             "text": "Vencida",
                         }
                     )
-                if ev.status == Evaluation.Status.DRAFT and not is_overdue:
+                if e.ev_status == Evaluation.Status.DRAFT and not is_overdue:
                     alerts.append(
                         {
                             "code": "DRAFT",
@@ -298,15 +375,15 @@ def my_team(request):
                             "text": "Borrador",
                         }
                     )
-                if not (ev.overall_comment or "").strip():
+                if e.missing_required:
                     alerts.append(
                         {
                             "code": "MISSING_REQUIRED",
                             "severity": "warning",
-                            "text": "Faltan obligatorios",
+                            "text": f"Faltan obligatorios ({e.missing_required})",
                         }
                     )
-                if not can_edit_evaluation(request.user, ev):
+                if not can_edit_evaluation(request.user, Evaluation(status=e.ev_status)):
                     alerts.append(
                         {
                             "code": "BLOCKED",
@@ -316,33 +393,31 @@ def my_team(request):
                     )
 
             for a in alerts:
-                a["action_url"] = (
-                    f"/evaluate/{e.id}/{current_period.id}/" if current_period else ""
-                )
+                a["action_url"] = f"/evaluate/{e.id}/{current_period.id}/"
             alerts_by_employee_id[e.id] = alerts
 
-    position_ids = [e.evaluation_position_id for e in employees if e.evaluation_position_id]
-
-    assignments = (
-        TemplateAssignment.objects
-        .select_related("template", "position")
-        .filter(position_id__in=position_ids, template__is_active=True)
-        .order_by("position_id", "-is_default", "-template__version")
-    )
-
-    template_by_position_id = {}
-    for a in assignments:
-        template_by_position_id.setdefault(a.position_id, a.template)
+    assigned = get_template_registry().assigned_by_position_id
+    template_by_position_id = {
+        e.evaluation_position_id: assigned[e.evaluation_position_id]
+        for e in page_employees
+        if e.evaluation_position_id in assigned
+    }
 
     return render(
         request,
         "evaluations/my_team.html",
         {
-            "employees": employees,
+            "employees": page_employees,
             "current_period": current_period,
             "template_by_position_id": template_by_position_id,
-            "eval_by_employee_id": eval_by_employee_id,
             "alerts_by_employee_id": alerts_by_employee_id,
+            "alert_totals": alert_totals,
+            "alert_filter": alert_filter,
+            "alert_codes": ALERT_CODES,
+            "page_obj": page_obj,
+            "page_size": int(page_size),
+            "base_qs": build_querystring(request, exclude={"page"}),
+            "filter_qs": build_querystring(request, exclude={"page", "alert"}),
 
         },
     )
@@ -403,7 +478,11 @@ def evaluate_employee(request, employee_id: int, period_id: int):
             },
         )
 
-    evaluation = Evaluation.objects.filter(employee=employee, period=period).first()
+    evaluation = (
+        Evaluation.objects.filter(employee=employee, period=period)
+        .select_related("summary")
+        .first()
+    )
     created = False
     if evaluation is None:
         if period_locked and not (override and override_allowed):
@@ -449,10 +528,42 @@ def evaluate_employee(request, employee_id: int, period_id: int):
 
     template = evaluation.template
     if created and template:
-        create_items_from_template(evaluation, template)
+        with transaction.atomic():
+            create_items_from_template(evaluation, template)
+            refresh_summary(evaluation)
+
+    error = None
+    editable = can_edit_evaluation(request.user, evaluation)
+    can_finalize = is_hr_admin(request.user)
+    if period_locked and not (override and override_allowed):
+        editable = False
+
+    etag = None
+    if request.method == "GET" and not created:
+        history_stamp = (
+            Evaluation.objects.filter(employee=employee)
+            .exclude(id=evaluation.id)
+            .aggregate(n=Count("id"), last=Max("updated_at"))
+        )
+        etag = evaluation_etag(
+            evaluation,
+            request.user.pk,
+            editable,
+            can_finalize,
+            override,
+            override_allowed,
+            period_locked,
+            history_stamp["n"],
+            history_stamp["last"],
+            employee.updated_at,
+            period.updated_at,
+        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
     items = list(evaluation.items.all().order_by("display_order", "id"))
-    block_codes = get_block_codes(items)
-    blocks = [{"code": code} for code in block_codes]
+    blocks = group_items(items)
 
     history_qs = (
         Evaluation.objects.filter(employee=employee)
@@ -474,22 +585,6 @@ def evaluate_employee(request, employee_id: int, period_id: int):
             }
         )
 
-    error = None
-    editable = can_edit_evaluation(request.user, evaluation)
-    can_finalize = is_hr_admin(request.user)
-    if period_locked and not (override and override_allowed):
-        editable = False
-
-    def is_item_complete(item) -> bool:
-        qtype = item.question_type
-        if qtype == TemplateQuestion.SCALE_1_5:
-            return item.value_scale is not None
-        if qtype == TemplateQuestion.YES_NO:
-            return item.value_yes_no is not None
-        if qtype == TemplateQuestion.TEXT:
-            return bool((item.value_text or "").strip())
-        return False
-
     def get_missing_required_item_ids(items) -> set:
         missing_required = set()
         for item in items:
@@ -516,6 +611,7 @@ def evaluate_employee(request, employee_id: int, period_id: int):
                     "created": created,
                     "template": template,
                     "items": items,
+                    "blocks": blocks,
                     "missing_required": set(),
                     "can_close": can_finalize,
                     "editable": editable,
@@ -590,9 +686,11 @@ def evaluate_employee(request, employee_id: int, period_id: int):
                     },
                 )
             evaluation.set_status(Evaluation.Status.FINAL)
-            evaluation.save(
-                update_fields=["status", "finalized_at", "status_changed_at"]
-            )
+            with transaction.atomic():
+                evaluation.save(
+                    update_fields=["status", "finalized_at", "status_changed_at", "updated_at"]
+                )
+                refresh_summary(evaluation, items)
             return redirect("evaluate_employee", employee_id=employee.id, period_id=period.id)
 
         if action == "reopen":
@@ -661,118 +759,101 @@ def evaluate_employee(request, employee_id: int, period_id: int):
                     },
                 )
             evaluation.set_status(Evaluation.Status.DRAFT, reason=reason)
-            evaluation.save(
-                update_fields=["status", "reopened_at", "reopen_reason", "status_changed_at"]
-            )
+            with transaction.atomic():
+                evaluation.save(
+                    update_fields=["status", "reopened_at", "reopen_reason", "status_changed_at", "updated_at"]
+                )
+                refresh_summary(evaluation, items)
             return redirect("evaluate_employee", employee_id=employee.id, period_id=period.id)
 
-        previous_status = evaluation.status
-
-        if action in ("save", "submit") and editable:
-            comment = request.POST.get("evaluator_comment", "").strip()
-            if evaluation.evaluator_comment != comment:
-                evaluation.evaluator_comment = comment
-            overall_comment = (request.POST.get("overall_comment") or "").strip()
-            if evaluation.overall_comment != overall_comment:
-                evaluation.overall_comment = overall_comment
-
-            # 1) Guardar respuestas
-            for item in items:
-                key = f"q_{item.id}"
-                if key not in request.POST:
-                    continue
-
-                val = request.POST.get(key)
-
-                if item.question_type == TemplateQuestion.SCALE_1_5:
-                    item.value_scale = int(val) if val else None
-                    item.value_yes_no = None
-                    item.value_text = None
-
-                elif item.question_type == TemplateQuestion.YES_NO:
-                    item.value_yes_no = True if val == "1" else False
-                    item.value_scale = None
-                    item.value_text = None
-
-                elif item.question_type == TemplateQuestion.TEXT:
-                    item.value_text = val or ""
-                    item.value_scale = None
-                    item.value_yes_no = None
-
-                item.save()
-
-        # 2) Si action=submit, cambiar estado
-        final_score_set = False
-        if action == "submit":
-            if not editable:
-                return render(
-                    request,
-                    "evaluations/evaluate_employee.html",
-                    {
-                        "employee": employee,
-                        "period": period,
-                        "period_locked": period_locked,
-                        "override_allowed": override_allowed,
-                        "override": override,
-                        "evaluation": evaluation,
-                        "created": created,
-                        "template": template,
-                        "items": items,
-                        "blocks": blocks,
-                        "missing_required": set(),
-                        "can_close": can_finalize,
-                        "editable": editable,
-                        "error": "No tienes permisos para enviar esta evaluacion.",
-                    },
-                )
-            if evaluation.status != Evaluation.Status.DRAFT:
-                return redirect("evaluate_employee", employee_id=employee.id, period_id=period.id)
-            missing = []
-            for item in items:
-                if not item.is_required:
-                    continue
-                if not is_item_complete(item):
-                    missing.append((item.section_title, item.question_text))
-
-            if missing:
-                lines = [f"- {sec}: {q}" for sec, q in missing[:15]]
-                suffix = "" if len(missing) <= 15 else f"\n(...y {len(missing) - 15} mas)"
-                error = (
-                    "No se puede enviar. Faltan respuestas obligatorias:\n"
-                    + "\n".join(lines)
-                    + suffix
+        with transaction.atomic():
+            previous_status = evaluation.status
+            changed_count = 0
+
+            if action in ("save", "submit") and editable:
+                comment = request.POST.get("evaluator_comment", "").strip()
+                if evaluation.evaluator_comment != comment:
+                    evaluation.evaluator_comment = comment
+                overall_comment = (request.POST.get("overall_comment") or "").strip()
+                if evaluation.overall_comment != overall_comment:
+                    evaluation.overall_comment = overall_comment
+
+                # 1) Guardar respuestas
+                changed_count = save_answers(items, request.POST)
+
+            # 2) Si action=submit, cambiar estado
+            final_score_set = False
+            if action == "submit":
+                if not editable:
+                    return render(
+                        request,
+                        "evaluations/evaluate_employee.html",
+                        {
+                            "employee": employee,
+                            "period": period,
+                            "period_locked": period_locked,
+                            "override_allowed": override_allowed,
+                            "override": override,
+                            "evaluation": evaluation,
+                            "created": created,
+                            "template": template,
+                            "items": items,
+                            "blocks": blocks,
+                            "missing_required": set(),
+                            "can_close": can_finalize,
+                            "editable": editable,
+                            "error": "No tienes permisos para enviar esta evaluacion.",
+                        },
+                    )
+                if evaluation.status != Evaluation.Status.DRAFT:
+                    return redirect("evaluate_employee", employee_id=employee.id, period_id=period.id)
+                missing = []
+                for item in items:
+                    if not item.is_required:
+                        continue
+                    if not is_item_complete(item):
+                        missing.append((item.section_title, item.question_text))
+
+                if missing:
+                    lines = [f"- {sec}: {q}" for sec, q in missing[:15]]
+                    suffix = "" if len(missing) <= 15 else f"\n(...y {len(missing) - 15} mas)"
+                    error = (
+                        "No se puede enviar. Faltan respuestas obligatorias:\n"
+                        + "\n".join(lines)
+                        + suffix
+                    )
+                else:
+                    final = compute_final_score(items)
+                    evaluation.final_score = final
+                    final_score_set = True
+                    evaluation.set_status(Evaluation.Status.SUBMITTED)
+
+            update_fields = []
+            if action in ("save", "submit") and editable:
+                update_fields.append("evaluator_comment")
+                update_fields.append("overall_comment")
+            if evaluation.status != previous_status:
+                update_fields.extend(
+                    ["status", "submitted_at", "finalized_at", "reopened_at", "reopen_reason", "status_changed_at"]
                 )
-            else:
-                final = compute_final_score(items)
-                evaluation.final_score = final
-                final_score_set = True
-                evaluation.set_status(Evaluation.Status.SUBMITTED)
-
-        update_fields = []
-        if action in ("save", "submit") and editable:
-            update_fields.append("evaluator_comment")
-            update_fields.append("overall_comment")
-        if evaluation.status != previous_status:
-            update_fields.extend(
-                ["status", "submitted_at", "finalized_at", "reopened_at", "reopen_reason", "status_changed_at"]
-            )
-        if final_score_set:
-            update_fields.append("final_score")
-        if update_fields:
-            evaluation.save(update_fields=update_fields)
+            if final_score_set:
+                update_fields.append("final_score")
+            if update_fields:
+                evaluation.save(update_fields=update_fields + ["updated_at"])
+            if changed_count or evaluation.status != previous_status:
+                refresh_summary(evaluation, items, answered=changed_count > 0)
 
         if error is None:
             return redirect("evaluate_employee", employee_id=employee.id, period_id=period.id)
 
     items = list(evaluation.items.all().order_by("display_order", "id"))
-    block_codes = get_block_codes(items)
-    blocks = [{"code": code} for code in block_codes]
+    attach_help_texts(items, template)
     if evaluation.status == Evaluation.Status.DRAFT and editable:
         missing_required = get_missing_required_item_ids(items)
     else:
         missing_required = set()
-    score_total = compute_final_score(items)
-    block_scores = compute_block_scores(items)
+    blocks = group_items(items, missing_required)
+    score_total, block_scores = summary_scores(evaluation, items)
     pending_required_count = len(missing_required)
     today = timezone.now().date()
     is_overdue = (
@@ -782,7 +863,7 @@ def evaluate_employee(request, employee_id: int, period_id: int):
     )
     is_incomplete = pending_required_count > 0 or not (evaluation.overall_comment or "").strip()
 
-    return render(
+    response = render(
         request,
         "evaluations/evaluate_employee.html",
         {
@@ -811,6 +892,83 @@ def evaluate_employee(request, employee_id: int, period_id: int):
 
         },
     )
+    if etag and error is None:
+        with_etag(response, etag)
+    return response
+
+
+def json_answer_value(value) -> str:
+    if value is None:
+        return ""
+    if value is True:
+        return "1"
+    if value is False:
+        return "0"
+    return value if isinstance(value, str) else str(value)
+
+
+@login_required
+def evaluation_autosave(request, evaluation_id: int):
+    """
+    Guardado incremental: recibe {"answers": {item_id: valor}, "override": bool} y escribe
+    solo los items tocados, con las mismas reglas de permiso, bloqueo y tipo que el POST
+    de evaluate_employee.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    if not can_evaluate(request.user):
+        raise PermissionDenied
+
+    evaluation = (
+        Evaluation.objects.filter(id=evaluation_id)
+        .select_related("period")
+        .first()
+    )
+    if not evaluation or not employees_visible_to(request.user).filter(id=evaluation.employee_id).exists():
+        raise PermissionDenied
+
+    try:
+        payload = json.loads(request.body or b"{}")
+        answers = payload.get("answers") or {}
+        answers = {int(k): json_answer_value(v) for k, v in answers.items()}
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({"ok": False, "error": "JSON no valido."}, status=400)
+
+    override = payload.get("override") in (True, "1", 1)
+    if evaluation.period.is_closed and not (override and can_override_period_lock(request.user)):
+        return JsonResponse({"ok": False, "error": "El periodo esta cerrado."}, status=403)
+    if not can_edit_evaluation(request.user, evaluation):
+        return JsonResponse(
+            {"ok": False, "error": "Esta evaluacion no es editable en su estado actual."}, status=403
+        )
+
+    items = list(evaluation.items.filter(id__in=answers.keys()))
+    errors = {}
+    if len(items) != len(answers):
+        found = {item.id for item in items}
+        errors.update({str(i): "Item no encontrado." for i in answers if i not in found})
+    for item in items:
+        msg = answer_error(item, answers[item.id])
+        if msg:
+            errors[str(item.id)] = msg
+    if errors:
+        return JsonResponse({"ok": False, "errors": errors}, status=400)
+
+    with transaction.atomic():
+        changed_count = save_answers(items, {str(k): v for k, v in answers.items()}, prefix="")
+        if changed_count:
+            summary = refresh_summary(evaluation, answered=True)
+        else:
+            summary = getattr(evaluation, "summary", None)
+
+    data = {"ok": True, "changed": changed_count}
+    if summary is not None:
+        data.update(
+            answered_count=summary.answered_count,
+            required_missing_count=summary.required_missing_count,
+            final_score=None if summary.final_score is None else float(summary.final_score),
+        )
+    return JsonResponse(data)
 
 
 @login_required
@@ -820,7 +978,11 @@ def evaluation_history_view(request, evaluation_id: int):
     if not can_evaluate(request.user):
         raise PermissionDenied
 
-    ev = Evaluation.objects.select_related("employee", "period").filter(id=evaluation_id).first()
+    ev = (
+        Evaluation.objects.select_related("employee", "period", "summary", "template")
+        .filter(id=evaluation_id)
+        .first()
+    )
     if not ev:
         raise PermissionDenied
 
@@ -828,14 +990,18 @@ def evaluation_history_view(request, evaluation_id: int):
     if not visible:
         raise PermissionDenied
 
+    etag = evaluation_etag(ev, ev.employee.updated_at, ev.period.updated_at)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
     items = list(ev.items.all().order_by("display_order", "id"))
-    block_codes = get_block_codes(items)
-    blocks = [{"code": code} for code in block_codes]
-    score_total = compute_final_score(items)
-    block_scores = compute_block_scores(items)
+    attach_help_texts(items, ev.template)
+    blocks = group_items(items)
+    score_total, block_scores = summary_scores(ev, items)
     pending_required_count = 0
 
-    return render(
+    response = render(
         request,
         "evaluations/evaluate_employee.html",
         {
@@ -860,6 +1026,7 @@ def evaluation_history_view(request, evaluation_id: int):
             "error": None,
         },
     )
+    return with_etag(response, etag)
 
 
 @login_required
@@ -878,7 +1045,7 @@ def report_period(request, period_id: int | None = None):
                     overrides["period"] = str(preset_period)
                 query = build_querystring(
                     request,
-                    exclude={"page", "export_scope"},
+                    exclude={"page", "cursor", "export_scope"},
                     overrides=overrides,
                 )
                 ReportFilterPreset.objects.create(
@@ -922,40 +1089,24 @@ def report_period(request, period_id: int | None = None):
             },
         )
 
-    employees = employees_visible_to(request.user)
-    base_qs = (
-        Evaluation.objects.filter(period=period, employee__in=employees)
-        .select_related("employee", "period")
+    page, totals, applied_filters = period_report_results(
+        period,
+        request.user,
+        request.GET,
+        normalize_filters(request),
+        page_size=report_page_size(request),
     )
-
-    totals = {row["status"]: row["count"] for row in base_qs.values("status").annotate(count=Count("id"))}
-    totals_default = {
-        "DRAFT": totals.get(Evaluation.Status.DRAFT, 0),
-        "SUBMITTED": totals.get(Evaluation.Status.SUBMITTED, 0),
-        "FINAL": totals.get(Evaluation.Status.FINAL, 0),
-        "TOTAL": base_qs.count(),
-    }
-
-    qs, applied_filters = build_period_report_queryset(request, period, request.user)
+    totals_default = {key: totals[key] for key in ("DRAFT", "SUBMITTED", "FINAL", "TOTAL")}
     status_filter = applied_filters["status"]
     search = applied_filters["q"]
     sort = applied_filters["sort"]
     direction = applied_filters["dir"]
 
-    page_size = request.GET.get("page_size") or "25"
-    if page_size not in {"25", "50", "100"}:
-        page_size = "25"
-    page_number = request.GET.get("page") or "1"
-    paginator = Paginator(qs, int(page_size))
-    page_obj = paginator.get_page(page_number)
-    evaluations = list(page_obj.object_list)
-    filtered_count = paginator.count
-
-    base_qs = build_querystring(request, exclude={"page"})
-    sort_qs = build_querystring(request, exclude={"page", "sort", "dir"})
+    base_qs = build_querystring(request, exclude={"page", "cursor"})
+    sort_qs = build_querystring(request, exclude={"page", "cursor", "sort", "dir"})
     export_qs_filtered = build_querystring(
         request,
-        exclude={"page", "export_scope"},
+        exclude={"page", "cursor", "export_scope"},
         overrides={"export_scope": "filtered"},
     )
     export_qs_page = build_querystring(
@@ -971,19 +1122,20 @@ def report_period(request, period_id: int | None = None):
             "periods": periods,
             "period": period,
             "totals": totals_default,
-            "evaluations": evaluations,
+            "evaluations": page.rows,
             "status_filter": status_filter,
             "search": search,
-            "filtered_count": filtered_count,
+            "filtered_count": totals["FILTERED"],
             "show_period_selector": show_period_selector,
-            "page_obj": page_obj,
-            "page_size": int(page_size),
+            "page": page,
+            "page_size": report_page_size(request),
             "sort": sort,
             "dir": direction,
             "base_qs": base_qs,
             "sort_qs": sort_qs,
             "export_qs_filtered": export_qs_filtered,
             "export_qs_page": export_qs_page,
+            "position_stats": period_position_stats(period, request.user, request.GET),
             "presets": ReportFilterPreset.objects.filter(
                 scope="period_dashboard"
             ).filter(
@@ -1004,71 +1156,43 @@ def report_period_export_csv(request, period_id: int):
     if not period:
         raise PermissionDenied
 
-    qs, _ = build_period_report_queryset(request, period, request.user)
+    export_format = (request.GET.get("format") or "csv").strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"format debe ser uno de: {', '.join(EXPORT_FORMATS)}")
+
+    qs, applied_filters = build_period_report_queryset(request, period, request.user)
     export_scope = (request.GET.get("export_scope") or "filtered").strip().lower()
+    values_qs = qs.values_list(*SUMMARY_VALUES)
     if export_scope == "page":
-        page_size = request.GET.get("page_size") or "25"
-        if page_size not in {"25", "50", "100"}:
-            page_size = "25"
-        page_number = request.GET.get("page") or "1"
-        paginator = Paginator(qs, int(page_size))
-        page_obj = paginator.get_page(page_number)
-        qs = page_obj.object_list
+        page_ids = [ev.id for ev in report_page(request, qs, applied_filters).rows]
+        values = values_qs.filter(id__in=page_ids)
+    else:
+        values = values_qs.iterator(chunk_size=EXPORT_CHUNK_SIZE)
 
     start = time.monotonic()
-    output = io.StringIO()
-    output.write("\ufeff")
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "period_name",
-            "employee_dni",
-            "employee_full_name",
-            "position_code",
-            "status",
-            "score_total",
-            "overall_comment",
-            "submitted_at",
-            "finalized_at",
-            "reopened_at",
-        ]
-    )
-    evals = list(qs)
-
-    row_count = 0
-    for ev in evals:
-        writer.writerow(
-            [
-                period.name,
-                ev.employee.dni,
-                ev.employee.full_name,
-                ev.frozen_position_code,
-                ev.status,
-                ev.final_score or "",
-                ev.overall_comment or "",
-                ev.submitted_at or "",
-                ev.finalized_at or "",
-                ev.reopened_at or "",
-            ]
+
+    def log_export(row_count):
+        logger.info(
+            "report_export",
+            extra={
+                "event": "report_export",
+                "export_type": "csv_summary",
+                "format": export_format,
+                "period_id": period.id,
+                "export_scope": export_scope,
+                "rows": row_count,
+                "user_id": request.user.id,
+                "user_role": user_role_label(request.user),
+                "filters": normalize_filters(request),
+                "duration_ms": int((time.monotonic() - start) * 1000),
+            },
         )
-        row_count += 1
 
-    resp = HttpResponse(output.getvalue(), content_type="text/csv; charset=utf-8")
-    resp["Content-Disposition"] = f'attachment; filename="period_{period.id}_summary.csv"'
-    logger.info(
-        "report_export",
-        extra={
-            "event": "report_export",
-            "export_type": "csv_summary",
-            "period_id": period.id,
-            "export_scope": export_scope,
-            "rows": row_count,
-            "user_id": request.user.id,
-            "user_role": user_role_label(request.user),
-            "filters": normalize_filters(request),
-            "duration_ms": int((time.monotonic() - start) * 1000),
-        },
+    chunks, content_type, extension = stream_export(
+        export_format, SUMMARY_HEADER, summary_rows(values, period), on_done=log_export
     )
+    resp = StreamingHttpResponse(chunks, content_type=content_type)
+    resp["Content-Disposition"] = f'attachment; filename="period_{period.id}_summary.{extension}"'
     return resp
 
 
@@ -1081,77 +1205,94 @@ def report_period_export_items_csv(request, period_id: int):
     if not period:
         raise PermissionDenied
 
-    qs, _ = build_period_report_queryset(request, period, request.user)
+    export_format = (request.GET.get("format") or "csv").strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"format debe ser uno de: {', '.join(EXPORT_FORMATS)}")
+
+    qs, applied_filters = build_period_report_queryset(request, period, request.user)
     export_scope = (request.GET.get("export_scope") or "filtered").strip().lower()
     if export_scope == "page":
-        page_size = request.GET.get("page_size") or "25"
-        if page_size not in {"25", "50", "100"}:
-            page_size = "25"
-        page_number = request.GET.get("page") or "1"
-        paginator = Paginator(qs, int(page_size))
-        page_obj = paginator.get_page(page_number)
-        eval_ids = [ev.id for ev in page_obj.object_list]
+        eval_ids = [ev.id for ev in report_page(request, qs, applied_filters).rows]
     else:
         eval_ids = qs.values_list("id", flat=True)
-    items_qs = EvaluationItem.objects.filter(evaluation_id__in=eval_ids).select_related(
-        "evaluation", "evaluation__employee"
-    )
 
     start = time.monotonic()
-    output = io.StringIO()
-    output.write("\ufeff")
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "period",
-            "employee_dni",
-            "employee_full_name",
-            "position_code",
-            "evaluation_status",
-            "section",
-            "question_text",
-            "question_type",
-            "is_required",
-            "answer_value",
-            "display_order",
-        ]
-    )
-    row_count = 0
-    for item in items_qs.order_by("evaluation_id", "display_order", "id"):
-        ev = item.evaluation
-        writer.writerow(
-            [
-                period.name,
-                ev.employee.dni,
-                ev.employee.full_name,
-                ev.frozen_position_code,
-                ev.status,
-                item.section_title,
-                item.question_text,
-                item.question_type,
-                int(item.is_required),
-                item_answer_as_text(item),
-                item.display_order,
-            ]
+
+    def log_export(row_count):
+        logger.info(
+            "report_export",
+            extra={
+                "event": "report_export",
+                "export_type": "csv_items",
+                "format": export_format,
+                "period_id": period.id,
+                "export_scope": export_scope,
+                "rows": row_count,
+                "user_id": request.user.id,
+                "user_role": user_role_label(request.user),
+                "filters": normalize_filters(request),
+                "duration_ms": int((time.monotonic() - start) * 1000),
+            },
         )
-        row_count += 1
 
-    resp = HttpResponse(output.getvalue(), content_type="text/csv; charset=utf-8")
-    resp["Content-Disposition"] = f'attachment; filename="period_{period.id}_items.csv"'
-    logger.info(
-        "report_export",
-        extra={
-            "event": "report_export",
-            "export_type": "csv_items",
-            "period_id": period.id,
-            "export_scope": export_scope,
-            "rows": row_count,
-            "user_id": request.user.id,
-            "user_role": user_role_label(request.user),
-            "filters": normalize_filters(request),
-            "duration_ms": int((time.monotonic() - start) * 1000),
-        },
+    chunks, content_type, extension = stream_export(
+        export_format, ITEM_HEADER, item_rows(eval_ids, period), on_done=log_export
     )
+    resp = StreamingHttpResponse(chunks, content_type=content_type)
+    resp["Content-Disposition"] = f'attachment; filename="period_{period.id}_items.{extension}"'
+    return resp
+
+
+@login_required
+def report_periods_export_zip(request):
+    """
+    ZIP con el CSV resumen y el de items de cada periodo de ?periods= (repetible), con los
+    mismos filtros que el informe de periodo, y un manifest.json con filas y sha256.
+    Los periodos se exportan uno tras otro en streaming.
+    """
+    if not can_view_reports(request.user):
+        raise PermissionDenied
+
+    period_ids = [p for p in request.GET.getlist("periods") if p.isdigit()]
+    periods = list(EvaluationPeriod.objects.filter(id__in=period_ids).order_by("start_date", "id"))
+    if not periods:
+        return HttpResponseBadRequest("Indica al menos un periodo en ?periods=")
+
+    filters = normalize_filters(request)
+    manifest = {"generated_at": timezone.now(), "filters": filters, "periods": [p.name for p in periods]}
+    start = time.monotonic()
+
+    def exports():
+        for period in periods:
+            qs, _ = build_period_report_queryset(request, period, request.user)
+            values = qs.values_list(*SUMMARY_VALUES).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            extra = {"period_id": period.id, "period_name": period.name}
+            yield f"period_{period.id}_summary.csv", SUMMARY_HEADER, summary_rows(values, period), extra
+            yield (
+                f"period_{period.id}_items.csv",
+                ITEM_HEADER,
+                item_rows(qs.values_list("id", flat=True), period),
+                extra,
+            )
+
+    def stream():
+        yield from stream_zip(bundle_files(exports(), manifest))
+        logger.info(
+            "report_export",
+            extra={
+                "event": "report_export",
+                "export_type": "zip_bundle",
+                "period_ids": [p.id for p in periods],
+                "rows": sum(f["rows"] for f in manifest["files"]),
+                "user_id": request.user.id,
+                "user_role": user_role_label(request.user),
+                "filters": filters,
+                "duration_ms": int((time.monotonic() - start) * 1000),
+            },
+        )
+
+    resp = StreamingHttpResponse(stream(), content_type="application/zip")
+    resp["Content-Disposition"] = 'attachment; filename="periods_export.zip"'
     return resp
 
 
@@ -1166,45 +1307,17 @@ def report_period_export_xlsx(request, period_id: int):
     if not period:
         raise PermissionDenied
 
-    eval_qs, _ = build_period_report_queryset(request, period, request.user)
+    eval_qs, applied_filters = build_period_report_queryset(request, period, request.user)
     export_scope = (request.GET.get("export_scope") or "filtered").strip().lower()
     if export_scope == "page":
-        page_size = request.GET.get("page_size") or "25"
-        if page_size not in {"25", "50", "100"}:
-            page_size = "25"
-        page_number = request.GET.get("page") or "1"
-        paginator = Paginator(eval_qs, int(page_size))
-        page_obj = paginator.get_page(page_number)
-        eval_qs = page_obj.object_list
-        eval_ids = [ev.id for ev in eval_qs]
+        eval_ids = [ev.id for ev in report_page(request, eval_qs, applied_filters).rows]
+        eval_qs = eval_qs.filter(id__in=eval_ids)
     else:
         eval_ids = eval_qs.values_list("id", flat=True)
     start = time.monotonic()
-    items_qs = EvaluationItem.objects.filter(evaluation_id__in=eval_ids).select_related(
-        "evaluation", "evaluation__employee"
-    )
-    items_count = items_qs.count()
-    if items_count > 50000:
-        logger.info(
-            "report_export",
-            extra={
-                "event": "report_export",
-                "export_type": "xlsx_blocked",
-                "period_id": period.id,
-                "export_scope": export_scope,
-                "items_count": items_count,
-                "user_id": request.user.id,
-                "user_role": user_role_label(request.user),
-                "filters": normalize_filters(request),
-                "duration_ms": int((time.monotonic() - start) * 1000),
-            },
-        )
-        return HttpResponse(
-            "Demasiados registros para XLSX. Usa CSV.",
-            status=400,
-            content_type="text/plain; charset=utf-8",
-        )
+    items_count = EvaluationItem.objects.filter(evaluation_id__in=eval_ids).count()
     if items_count > 10000 and request.GET.get("confirm") != "1":
+        background_form = background_export_form(request, period, ExportJob.Kind.XLSX)
         link = f"{reverse('report_period_export_xlsx', args=[period.id])}?" + build_querystring(
             request,
             overrides={"confirm": "1"},
@@ -1224,126 +1337,20 @@ def report_period_export_xlsx(request, period_id: int):
             },
         )
         return HttpResponse(
-            f'XLSX con {items_count} items. <a href="{link}">Continuar de todos modos</a>',
+            f'XLSX con {items_count} items. <a href="{link}">Continuar de todos modos</a> {background_form}',
             content_type="text/html; charset=utf-8",
         )
 
-    def to_naive(value):
-        if value is None:
-            return ""
-        if timezone.is_aware(value):
-            return timezone.make_naive(value)
-        return value
-
-    wb = openpyxl.Workbook()
-    ws_summary = wb.active
-    ws_summary.title = "Resumen"
-    ws_summary.append(
-        [
-            "period_name",
-            "employee_dni",
-            "employee_full_name",
-            "position_code",
-            "status",
-            "score_total",
-            "overall_comment",
-            "submitted_at",
-            "finalized_at",
-            "reopened_at",
-        ]
-    )
-    evals = list(eval_qs)
-    for ev in evals:
-        ws_summary.append(
-            [
-                period.name,
-                ev.employee.dni,
-                ev.employee.full_name,
-                ev.frozen_position_code,
-                ev.status,
-                ev.final_score or "",
-                ev.overall_comment or "",
-                to_naive(ev.submitted_at),
-                to_naive(ev.finalized_at),
-                to_naive(ev.reopened_at),
-            ]
-        )
-
-    ws_detail = wb.create_sheet("Detalle")
-    ws_detail.append(
-        [
-            "period",
-            "employee_dni",
-            "employee_full_name",
-            "position_code",
-            "evaluation_status",
-            "section",
-            "question_text",
-            "question_type",
-            "is_required",
-            "answer_value",
-            "display_order",
-        ]
-    )
-    for item in items_qs.order_by("evaluation_id", "display_order", "id"):
-        ev = item.evaluation
-        ws_detail.append(
-            [
-                period.name,
-                ev.employee.dni,
-                ev.employee.full_name,
-                ev.frozen_position_code,
-                ev.status,
-                item.section_title,
-                item.question_text,
-                item.question_type,
-                int(item.is_required),
-                item_answer_as_text(item),
-                item.display_order,
-            ]
-        )
-
-    ws_stats = wb.create_sheet("Stats")
-    ws_stats.append(
-        [
-            "position_code",
-            "block",
-            "avg_score",
-            "min_score",
-            "max_score",
-            "evaluations_count",
-        ]
-    )
-    stats = defaultdict(list)
-    evals_by_pos = defaultdict(set)
-    for item in items_qs:
-        if item.question_type != TemplateQuestion.SCALE_1_5 or item.value_scale is None:
-            continue
-        ev = item.evaluation
-        block = block_from_section(item.section_title)
-        key = (ev.frozen_position_code, block)
-        stats[key].append(item.value_scale)
-        evals_by_pos[key].add(ev.id)
-
-    for (pos_code, block), values in sorted(stats.items()):
-        ws_stats.append(
-            [
-                pos_code,
-                block,
-                round(sum(values) / len(values), 2) if values else "",
-                min(values) if values else "",
-                max(values) if values else "",
-                len(evals_by_pos[(pos_code, block)]),
-            ]
-        )
-
-    output = io.BytesIO()
-    wb.save(output)
-    resp = HttpResponse(
-        output.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet; charset=utf-8",
+    # Fichero temporal anonimo: se borra al cerrarlo FileResponse tras enviarlo.
+    output = tempfile.TemporaryFile()
+    write_period_workbook(output, period, eval_qs, eval_ids)
+    output.seek(0)
+    resp = FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"period_{period.id}.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
-    resp["Content-Disposition"] = f'attachment; filename="period_{period.id}.xlsx"'
     logger.info(
         "report_export",
         extra={
@@ -1361,31 +1368,139 @@ def report_period_export_xlsx(request, period_id: int):
     return resp
 
 
+@login_required
+def report_period_stats_json(request, period_id: int):
+    if not can_view_reports(request.user):
+        raise PermissionDenied
+
+    period = EvaluationPeriod.objects.filter(id=period_id).first()
+    if not period:
+        raise PermissionDenied
+
+    _, applied_filters = build_period_report_queryset(request, period, request.user)
+    return JsonResponse(
+        {
+            "period": {"id": period.id, "name": period.name},
+            "filters": applied_filters,
+            "stats": period_position_stats(period, request.user, request.GET),
+        }
+    )
+
+
+@login_required
+def report_score_trend_json(request):
+    """Evolucion de puntuaciones por periodo: ?employee=<id> o filtros department/position/q."""
+    if not can_view_reports(request.user):
+        raise PermissionDenied
+    # Sin filtros RRHH pediria todas las evaluaciones de todos los periodos.
+    if visibility_scope(request.user) == "all" and not has_trend_filter(request.GET):
+        return HttpResponseBadRequest(f"Indica al menos un filtro: {', '.join(TREND_FILTERS)}")
+
+    return JsonResponse(score_trend(trend_queryset(request.user, request.GET)))
+
+
+@login_required
+def export_job_create(request, period_id: int):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    if not can_view_reports(request.user):
+        raise PermissionDenied
+
+    period = EvaluationPeriod.objects.filter(id=period_id).first()
+    if not period:
+        raise PermissionDenied
+
+    kind = request.POST.get("kind")
+    if kind not in ExportJob.Kind.values:
+        return HttpResponse("Tipo de export no valido.", status=400, content_type="text/plain; charset=utf-8")
+
+    params = QueryDict((request.POST.get("query_params") or "").lstrip("?"), mutable=True)
+    for key in ("page", "cursor", "page_size", "export_scope", "confirm"):
+        params.pop(key, None)
+    enqueue_export(request.user, period, kind, params.urlencode())
+    return redirect("export_job_list")
+
+
+@login_required
+def export_job_list(request):
+    if not can_view_reports(request.user):
+        raise PermissionDenied
+
+    jobs = list(
+        ExportJob.objects.filter(requested_by=request.user)
+        .select_related("period")
+        .order_by("-created_at", "-id")[:50]
+    )
+    if request.GET.get("format") == "json":
+        return JsonResponse(
+            {
+                "jobs": [
+                    {
+                        "id": job.id,
+                        "period": job.period.name,
+                        "kind": job.kind,
+                        "status": job.status,
+                        "rows_done": job.rows_done,
+                        "rows_total": job.rows_total,
+                        "progress": job.progress_percent,
+                        "download_url": (
+                            reverse("export_job_download", args=[job.id])
+                            if job.status == ExportJob.Status.DONE
+                            else None
+                        ),
+                    }
+                    for job in jobs
+                ]
+            }
+        )
+
+    in_progress = any(
+        job.status in (ExportJob.Status.PENDING, ExportJob.Status.RUNNING) for job in jobs
+    )
+    return render(
+        request,
+        "evaluations/export_jobs.html",
+        {
+            "jobs": jobs,
+            "in_progress": in_progress,
+            "retention_days": export_retention_days(),
+        },
+    )
+
+
+@login_required
+def export_job_download(request, job_id: int):
+    job = ExportJob.objects.filter(id=job_id).first()
+    if not job or not (job.requested_by_id == request.user.id or is_hr_admin(request.user)):
+        raise PermissionDenied
+    if job.status != ExportJob.Status.DONE or not job.file:
+        raise Http404("El export no esta disponible.")
+    return FileResponse(job.file.open("rb"), as_attachment=True, filename=os.path.basename(job.file.name))
+
+
 @login_required
 def report_system(request):
     if not is_hr_admin(request.user):
         raise PermissionDenied
 
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    actives = TemplateActive.objects.select_related("template").all()
-    active_templates = [a.template for a in actives if a.template_id]
+    registry = get_template_registry()
+    active_templates = list(registry.pinned_by_base_code.values())
     active_count = len(active_templates)
     active_base_codes = {t.base_code for t in active_templates if t.base_code}
 
     positions = list(Position.objects.all())
     position_count = len(positions)
 
-    assignments = TemplateAssignment.objects.select_related("template").all()
-    assign_map = {a.position_id: a.template.base_code for a in assignments}
+    assign_map = {
+        position_id: t.base_code
+        for position_id, t in registry.assignment_by_position_id.items()
+    }
     correct_assignments = sum(
         1 for p in positions if assign_map.get(p.id) in active_base_codes
     )
 
-    latest_versions = (
-        EvaluationTemplate.objects.values("base_code")
-        .annotate(latest=Max("version"))
-    )
-    latest_map = {r["base_code"]: r["latest"] for r in latest_versions}
+    latest_map = registry.latest_version_by_base_code
 
     outdated = []
     for t in active_templates:
@@ -1408,11 +1523,7 @@ def report_system(request):
     ]
 
     position_codes = {p.code for p in positions}
-    all_template_base_codes = set(
-        EvaluationTemplate.objects.exclude(base_code="")
-        .values_list("base_code", flat=True)
-        .distinct()
-    )
+    all_template_base_codes = {bc for bc in latest_map if bc}
     legacy_base_codes = sorted(all_template_base_codes - position_codes)
 
     unexpected_types = [t for t in q_types if t != "SCALE_1_5"]
@@ -3,6 +3,7 @@ from .models import Department, Position, Employee
 
 # NUEVO
 from apps.core.permissions import can_manage_employees
+from apps.org.selectors import employee_search_q
 
 
 @admin.register(Department)
@@ -29,6 +30,12 @@ class EmployeeAdmin(admin.ModelAdmin):
     )
     list_filter = ("is_active", "evaluation_position")
     search_fields = ("full_name", "dni")
+    search_help_text = "Nombre (sin importar acentos) o DNI."
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(employee_search_q(search_term)), False
 
     # NUEVO
     def get_queryset(self, request):
@@ -6,6 +6,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
 from apps.org.models import Employee, Position  # ajusta si tu import real difiere
+from apps.org.services import canonical_dni, normalize_search_text
 
 
 REQUIRED_COLUMNS = {"dni", "full_name", "evaluation_position_code"}
@@ -142,6 +143,9 @@ class Command(BaseCommand):
         if emp.evaluation_position_id != position.id:
             emp.evaluation_position = position
             changed = True
+        if emp.search_name != normalize_search_text(full_name) or emp.search_dni != canonical_dni(dni):
+            # Columnas de busqueda desactualizadas (p.ej. tras un update masivo): save() las recalcula.
+            changed = True
 
         if not changed:
             return RowResult(action="skip", dni=dni, message="no changes")
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:25
+
+import re
+import unicodedata
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+# Copias congeladas de apps.org.services: la migracion no debe cambiar si esas funciones cambian.
+def normalize_search_text(value) -> str:
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+def canonical_dni(value) -> str:
+    return re.sub(r"[^0-9A-Z]", "", str(value or "").upper())
+
+
+def fill_search_columns(apps, schema_editor):
+    Employee = apps.get_model("org", "Employee")
+    batch = []
+    for emp in Employee.objects.only("id", "full_name", "dni").iterator(chunk_size=1000):
+        emp.search_name = normalize_search_text(emp.full_name)
+        emp.search_dni = canonical_dni(emp.dni)
+        batch.append(emp)
+        if len(batch) >= 1000:
+            Employee.objects.bulk_update(batch, ["search_name", "search_dni"])
+            batch = []
+    if batch:
+        Employee.objects.bulk_update(batch, ["search_name", "search_dni"])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # En PostgreSQL: indices GIN de trigramas para busquedas "contiene" (pg_trgm la crea
+    # TrigramExtension). En el resto de motores se usan los indices btree (busqueda por prefijo).
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS org_employee_search_name_trgm "
+        "ON org_employee USING gin (search_name gin_trgm_ops)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS org_employee_search_dni_trgm "
+        "ON org_employee USING gin (search_dni gin_trgm_ops)"
+    )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS org_employee_search_name_trgm")
+    schema_editor.execute("DROP INDEX IF EXISTS org_employee_search_dni_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_dni',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+        # No-op fuera de PostgreSQL o si pg_trgm ya existe; crearla requiere superusuario o
+        # un rol con CREATE en la base de datos (extension "trusted", PostgreSQL 13+).
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
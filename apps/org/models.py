@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.db import models
 from apps.core.models import TimeStampedModel
+from apps.org.services import canonical_dni, normalize_search_text
 
 
 class Department(TimeStampedModel):
@@ -41,6 +42,10 @@ class Employee(TimeStampedModel):
         settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="team"
     )
 
+    # Columnas de busqueda (ver apps.org.selectors.employee_search_q); se recalculan en save().
+    search_name = models.CharField(max_length=200, blank=True, default="", editable=False, db_index=True)
+    search_dni = models.CharField(max_length=16, blank=True, default="", editable=False, db_index=True)
+
     class Meta:
         indexes = [
             models.Index(fields=["is_active"]),
@@ -49,3 +54,11 @@ class Employee(TimeStampedModel):
 
     def __str__(self) -> str:
         return f"{self.full_name} ({self.dni})"
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_search_text(self.full_name)
+        self.search_dni = canonical_dni(self.dni)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"full_name", "dni"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "search_name", "search_dni"}
+        super().save(*args, **kwargs)
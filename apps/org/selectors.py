@@ -1,9 +1,47 @@
-from django.db.models import QuerySet
+from django.db import connection
+from django.db.models import Q, QuerySet
 from apps.org.models import Employee
+from apps.org.services import canonical_dni, normalize_search_text
 from apps.core.permissions import can_manage_employees
 
+# Mayor que cualquier caracter normalizado: cota superior de los rangos por prefijo.
+PREFIX_UPPER_BOUND = "\U0010ffff"
+
 def employees_visible_to(user) -> QuerySet[Employee]:
     qs = Employee.objects.all()
     if can_manage_employees(user):
         return qs
     return qs.filter(manager=user, is_active=True)
+
+
+def prefix_q(field: str, value: str) -> Q:
+    # Rango en lugar de LIKE: usa el indice btree en cualquier motor.
+    return Q(**{f"{field}__gte": value, f"{field}__lt": value + PREFIX_UPPER_BOUND})
+
+
+def employee_search_q(q: str, prefix: str = "") -> Q:
+    """
+    Filtro de busqueda de empleados por nombre (sin acentos ni mayusculas) o DNI canonico.
+    `prefix` es la ruta hasta Employee (p.ej. "employee__").
+
+    PostgreSQL: cada palabra "contenida" en el nombre (indice GIN de trigramas).
+    Otros motores: cada palabra es el inicio del nombre (rango sobre el indice btree) o de
+    alguna de sus palabras ("garcia" encuentra "ana garcia"); el DNI, por prefijo.
+    """
+    name = normalize_search_text(q)
+    dni = canonical_dni(q)
+    if not name:
+        return Q()
+    if connection.vendor == "postgresql":
+        by_name = Q()
+        for token in name.split():
+            by_name &= Q(**{f"{prefix}search_name__contains": token})
+        by_dni = Q(**{f"{prefix}search_dni__contains": dni}) if dni else None
+    else:
+        by_name = Q()
+        for token in name.split():
+            by_name &= prefix_q(f"{prefix}search_name", token) | Q(
+                **{f"{prefix}search_name__contains": f" {token}"}
+            )
+        by_dni = prefix_q(f"{prefix}search_dni", dni) if dni else None
+    return by_name | by_dni if by_dni is not None else by_name
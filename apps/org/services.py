@@ -0,0 +1,14 @@
+import re
+import unicodedata
+
+
+def normalize_search_text(value) -> str:
+    """Minusculas, sin acentos y con espacios simples: 'Muñoz  Pérez' -> 'munoz perez'."""
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+def canonical_dni(value) -> str:
+    """DNI sin separadores y en mayusculas: '12.345.678-z' -> '12345678Z'."""
+    return re.sub(r"[^0-9A-Z]", "", str(value or "").upper())
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.core.permissions import HR, MANAGER
+from apps.org.models import Employee
+from apps.org.selectors import employee_search_q
+from apps.org.services import canonical_dni, normalize_search_text
+
+
+class EmployeeSearchTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.manager = User.objects.create_user(username="mgr", password="x")
+        self.hr = User.objects.create_user(username="hr", password="x")
+        Group.objects.get_or_create(name=MANAGER)[0].user_set.add(self.manager)
+        Group.objects.get_or_create(name=HR)[0].user_set.add(self.hr)
+
+        self.munoz = Employee.objects.create(full_name="Muñoz Pérez, José", dni="12.345.678-z", manager=self.manager)
+        self.other = Employee.objects.create(full_name="Martín Gómez, Ana", dni="87654321X", manager=self.hr)
+
+    def test_search_columns_maintained_on_save(self):
+        self.assertEqual(normalize_search_text("  Muñoz  PÉREZ "), "munoz perez")
+        self.assertEqual(canonical_dni("12.345.678-z"), "12345678Z")
+        self.assertEqual(self.munoz.search_name, "munoz perez, jose")
+        self.assertEqual(self.munoz.search_dni, "12345678Z")
+
+        self.munoz.full_name = "Núñez Ruiz, José"
+        self.munoz.save(update_fields=["full_name"])
+        self.munoz.refresh_from_db()
+        self.assertEqual(self.munoz.search_name, "nunez ruiz, jose")
+
+    def test_accent_insensitive_search(self):
+        def found(q):
+            return list(Employee.objects.filter(employee_search_q(q)).values_list("id", flat=True))
+
+        self.assertEqual(found("munoz"), [self.munoz.id])
+        self.assertEqual(found("MUÑOZ pérez"), [self.munoz.id])
+        self.assertEqual(found("12345678"), [self.munoz.id])
+        self.assertEqual(found("12.345.678-Z"), [self.munoz.id])
+        self.assertEqual(found("gomez garcia"), [])
+
+    def test_search_by_any_word_of_the_name(self):
+        def found(q):
+            return list(Employee.objects.filter(employee_search_q(q)).values_list("id", flat=True))
+
+        # Segundo apellido o nombre, no solo el inicio de full_name.
+        self.assertEqual(found("perez"), [self.munoz.id])
+        self.assertEqual(found("jose"), [self.munoz.id])
+        self.assertEqual(found("ana gom"), [self.other.id])
+        self.assertEqual(found("ana munoz"), [])
+
+    def test_typeahead_respects_visibility(self):
+        self.client.force_login(self.manager)
+        url = reverse("employee_search")
+        data = self.client.get(url, {"q": "mu"}).json()
+        self.assertEqual([r["id"] for r in data["results"]], [self.munoz.id])
+        self.assertEqual(self.client.get(url, {"q": "mart"}).json()["results"], [])
+        self.assertEqual(self.client.get(url, {"q": "m"}).json()["results"], [])
+
+        self.client.force_login(self.hr)
+        data = self.client.get(url, {"q": "mart"}).json()
+        self.assertEqual([r["dni"] for r in data["results"]], ["87654321X"])
+
+    def test_admin_search_uses_normalized_columns(self):
+        admin_user = get_user_model().objects.create_superuser(username="root", password="x")
+        self.client.force_login(admin_user)
+        resp = self.client.get(reverse("admin:org_employee_changelist"), {"q": "munoz"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "12.345.678-z")
+        self.assertNotContains(resp, "87654321X")
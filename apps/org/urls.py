@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path("_health", views.health, name="health"),
+    path("employees/search/", views.employee_search, name="employee_search"),
 ]
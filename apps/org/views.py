@@ -1,5 +1,43 @@
-from django.http import HttpResponse
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
+
+from apps.core.permissions import can_evaluate
+from apps.org.selectors import employee_search_q, employees_visible_to
+
+TYPEAHEAD_LIMIT = 10
 
 
 def health(request):
     return HttpResponse('ok')
+
+
+@login_required
+def employee_search(request):
+    """Typeahead de empleados visibles para el usuario: ?q=<nombre o DNI>."""
+    if not can_evaluate(request.user):
+        raise PermissionDenied
+
+    q = (request.GET.get("q") or "").strip()
+    if len(q) < 2:
+        return JsonResponse({"results": []})
+
+    rows = (
+        employees_visible_to(request.user)
+        .filter(employee_search_q(q))
+        .order_by("search_name", "id")
+        .values("id", "full_name", "dni", "evaluation_position__code")[:TYPEAHEAD_LIMIT]
+    )
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": row["id"],
+                    "full_name": row["full_name"],
+                    "dni": row["dni"],
+                    "position_code": row["evaluation_position__code"] or "",
+                }
+                for row in rows
+            ]
+        }
+    )
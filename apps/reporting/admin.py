@@ -1 +1,33 @@
 from django.contrib import admin
+
+from .models import AnswerFact, PeriodCube, PositionDim, QuestionDim, RefreshWatermark
+
+
+@admin.register(PositionDim)
+class PositionDimAdmin(admin.ModelAdmin):
+    list_display = ("code", "name", "department", "professional_group")
+    search_fields = ("code", "name")
+
+
+@admin.register(QuestionDim)
+class QuestionDimAdmin(admin.ModelAdmin):
+    list_display = ("block_code", "question_text", "fingerprint")
+    search_fields = ("question_text",)
+
+
+@admin.register(AnswerFact)
+class AnswerFactAdmin(admin.ModelAdmin):
+    list_display = ("period", "position_code", "block_code", "question", "score")
+    list_filter = ("period", "block_code", "professional_group")
+    list_select_related = ("period", "question")
+
+
+@admin.register(RefreshWatermark)
+class RefreshWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("name", "value", "updated_at")
+
+
+@admin.register(PeriodCube)
+class PeriodCubeAdmin(admin.ModelAdmin):
+    list_display = ("period", "version", "computed_version", "computed_at")
+    readonly_fields = ("version", "computed_version", "computed_at", "data")
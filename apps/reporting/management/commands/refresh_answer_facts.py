@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.reporting.services import refresh_answer_facts
+
+
+class Command(BaseCommand):
+    help = (
+        "Actualiza la tabla de hechos AnswerFact con las evaluaciones cambiadas desde la ultima "
+        "ejecucion (menos un margen de 5 minutos). Los cambios de departamento o grupo de un "
+        "puesto se aplican a sus hechos en cada ejecucion. --full solo hace falta para purgar "
+        "hechos de items borrados o reconstruir la tabla."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recalcula todas las evaluaciones.")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Evaluaciones por lote. Por defecto 500.")
+
+    def handle(self, *args, **options):
+        done = 0
+        for done in refresh_answer_facts(full=options["full"], chunk_size=options["chunk_size"]):
+            self.stdout.write(f"  evaluaciones: {done}")
+        self.stdout.write(self.style.SUCCESS(f"Hechos actualizados para {done} evaluaciones."))
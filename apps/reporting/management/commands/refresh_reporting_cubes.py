@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.reporting.services import refresh_period_cubes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los agregados del cuadro de mando de los periodos con cambios pendientes o "
+        "caducados. El cuadro de mando sirve el ultimo calculo y solo recalcula por su cuenta "
+        "pasado CUBE_MAX_STALENESS: programa este comando (cron) o dejalo con --watch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recalcula todos los periodos.")
+        parser.add_argument("--watch", action="store_true", help="Queda en bucle recalculando lo pendiente.")
+        parser.add_argument("--sleep", type=float, default=60.0, help="Segundos entre pasadas. Por defecto 60.")
+
+    def handle(self, *args, **options):
+        full = options["full"]
+        while True:
+            count = 0
+            for period in refresh_period_cubes(full=full):
+                count += 1
+                self.stdout.write(f"  {period.name}")
+            self.stdout.write(self.style.SUCCESS(f"Cubos recalculados: {count}."))
+            if not options["watch"]:
+                return
+            full = False
+            time.sleep(options["sleep"])
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('evaluations', '0014_evaluation_keyset_indexes'),
+        ('org', '0002_employee_search_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionDim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('block_code', models.CharField(blank=True, default='', max_length=10)),
+                ('question_text', models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RefreshWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=40, unique=True)),
+                ('value', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PositionDim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=8, unique=True)),
+                ('name', models.CharField(blank=True, default='', max_length=160)),
+                ('professional_group', models.CharField(blank=True, default='', max_length=32)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='org.department')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnswerFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.BigIntegerField(unique=True)),
+                ('professional_group', models.CharField(blank=True, default='', max_length=32)),
+                ('position_code', models.CharField(max_length=8)),
+                ('block_code', models.CharField(blank=True, default='', max_length=10)),
+                ('score', models.PositiveSmallIntegerField()),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='org.department')),
+                ('evaluation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_facts', to='evaluations.evaluation')),
+                ('evaluator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_facts', to='evaluations.evaluationperiod')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='facts', to='reporting.questiondim')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'department', 'block_code', 'score'], name='fact_period_dept_block_idx'), models.Index(fields=['period', 'position_code', 'block_code', 'score'], name='fact_period_pos_block_idx'), models.Index(fields=['period', 'professional_group', 'score'], name='fact_period_group_idx'), models.Index(fields=['period', 'question', 'score'], name='fact_period_question_idx')],
+            },
+        ),
+    ]
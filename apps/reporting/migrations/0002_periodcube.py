@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evaluations', '0014_evaluation_keyset_indexes'),
+        ('reporting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodCube',
+            fields=[
+                ('period', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reporting_cube', serialize=False, to='evaluations.evaluationperiod')),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('computed_version', models.IntegerField(default=-1)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+                ('data', models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+    ]
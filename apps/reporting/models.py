@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.db import models
+
+from apps.evaluations.models import Evaluation, EvaluationPeriod
+from apps.org.models import Department
+
+
+class PositionDim(models.Model):
+    """Dimension puesto (por codigo congelado), con su departamento y grupo profesional."""
+
+    code = models.CharField(max_length=8, unique=True)
+    name = models.CharField(max_length=160, blank=True, default="")
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True)
+    professional_group = models.CharField(max_length=32, blank=True, default="")
+
+    def __str__(self) -> str:
+        return self.code
+
+
+class QuestionDim(models.Model):
+    """Dimension pregunta: huella de (bloque, tipo, texto) comun a todas las versiones de plantilla."""
+
+    fingerprint = models.CharField(max_length=40, unique=True)
+    block_code = models.CharField(max_length=10, blank=True, default="")
+    question_text = models.TextField()
+
+    def __str__(self) -> str:
+        return f"{self.block_code} {self.question_text[:60]}"
+
+
+class AnswerFact(models.Model):
+    """Una fila por respuesta SCALE_1_5 contestada. Se rellena con refresh_answer_facts."""
+
+    item_id = models.BigIntegerField(unique=True)
+    evaluation = models.ForeignKey(Evaluation, on_delete=models.CASCADE, related_name="answer_facts")
+    period = models.ForeignKey(EvaluationPeriod, on_delete=models.CASCADE, related_name="answer_facts")
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True)
+    professional_group = models.CharField(max_length=32, blank=True, default="")
+    position_code = models.CharField(max_length=8)
+    block_code = models.CharField(max_length=10, blank=True, default="")
+    question = models.ForeignKey(QuestionDim, on_delete=models.PROTECT, related_name="facts")
+    evaluator = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    score = models.PositiveSmallIntegerField()
+
+    class Meta:
+        # Indices estrechos: filtro por periodo + eje de agrupacion + score al final,
+        # de modo que AVG/COUNT se resuelven solo con el indice.
+        indexes = [
+            models.Index(fields=["period", "department", "block_code", "score"], name="fact_period_dept_block_idx"),
+            models.Index(fields=["period", "position_code", "block_code", "score"], name="fact_period_pos_block_idx"),
+            models.Index(fields=["period", "professional_group", "score"], name="fact_period_group_idx"),
+            models.Index(fields=["period", "question", "score"], name="fact_period_question_idx"),
+        ]
+
+
+class RefreshWatermark(models.Model):
+    """Hasta donde (updated_at) se ha procesado cada tabla derivada."""
+
+    name = models.CharField(max_length=40, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.value}"
+
+
+class PeriodCube(models.Model):
+    """
+    Agregados del cuadro de mando de un periodo (JSON). `version` sube con cada cambio de
+    estado en el periodo; el cubo esta al dia si computed_version == version.
+    """
+
+    period = models.OneToOneField(
+        EvaluationPeriod, on_delete=models.CASCADE, primary_key=True, related_name="reporting_cube"
+    )
+    version = models.PositiveIntegerField(default=0)
+    computed_version = models.IntegerField(default=-1)
+    computed_at = models.DateTimeField(null=True, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+
+    @property
+    def is_stale(self) -> bool:
+        return self.computed_version != self.version
+
+    def __str__(self) -> str:
+        return f"Cubo {self.period_id} v{self.computed_version}/{self.version}"
@@ -0,0 +1,414 @@
+import hashlib
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.utils import timezone
+
+from apps.core.transactions import on_commit_once
+from apps.evaluations.models import Evaluation, EvaluationItem, EvaluationPeriod
+from apps.evaluations.services.stats import position_block_stats
+from apps.org.models import Position
+from apps.reporting.models import AnswerFact, PeriodCube, PositionDim, QuestionDim, RefreshWatermark
+from apps.templates_eval.models import UNKNOWN_BLOCK, TemplateQuestion
+
+
+ANSWER_FACTS_WATERMARK = "answer_facts"
+
+# Margen al guardar la marca de agua: una transaccion que empezo antes del refresco y hace
+# commit despues queda con updated_at anterior a `started`; se relee en la siguiente pasada.
+WATERMARK_SAFETY_MARGIN = timedelta(minutes=5)
+
+FACT_GROUPS = {
+    "department": "department__name",
+    "professional_group": "professional_group",
+    "position": "position_code",
+    "block": "block_code",
+}
+
+
+def question_fingerprint(block_code: str, question_type: str, question_text: str) -> str:
+    text = " ".join((question_text or "").split())
+    return hashlib.sha1(f"{block_code}|{question_type}|{text}".encode("utf-8")).hexdigest()
+
+
+def refresh_position_dims() -> dict:
+    """
+    Sincroniza PositionDim con Position (tabla pequena). Devuelve {codigo: PositionDim}.
+    Si cambia el departamento o el grupo de un puesto se corrigen sus hechos ya cargados.
+    """
+    dims = {dim.code: dim for dim in PositionDim.objects.all()}
+    changed = []
+    for position in Position.objects.all():
+        dim = dims.get(position.code)
+        if dim is None:
+            dim = dims[position.code] = PositionDim(code=position.code)
+        values = (position.name, position.department_id, position.professional_group)
+        if dim.pk is None or (dim.name, dim.department_id, dim.professional_group) != values:
+            regrouped = dim.pk is not None and (dim.department_id, dim.professional_group) != values[1:]
+            dim.name, dim.department_id, dim.professional_group = values
+            changed.append((dim, regrouped))
+    for dim, regrouped in changed:
+        dim.save()
+        if regrouped:
+            AnswerFact.objects.filter(position_code=dim.code).update(
+                department_id=dim.department_id, professional_group=dim.professional_group
+            )
+    return dims
+
+
+def question_dims(keys) -> dict:
+    """{fingerprint: QuestionDim} para `keys` = {fingerprint: (block_code, texto)}, creando las que falten."""
+    existing = {q.fingerprint: q for q in QuestionDim.objects.filter(fingerprint__in=keys)}
+    missing = [
+        QuestionDim(fingerprint=fp, block_code=block, question_text=text)
+        for fp, (block, text) in keys.items()
+        if fp not in existing
+    ]
+    if missing:
+        QuestionDim.objects.bulk_create(missing, ignore_conflicts=True)
+        existing = {q.fingerprint: q for q in QuestionDim.objects.filter(fingerprint__in=keys)}
+    return existing
+
+
+def build_answer_facts(evaluation_ids, positions) -> list:
+    rows = (
+        EvaluationItem.objects.filter(
+            evaluation_id__in=evaluation_ids,
+            question_type=TemplateQuestion.SCALE_1_5,
+            value_scale__isnull=False,
+        )
+        .order_by("id")
+        .values_list(
+            "id",
+            "evaluation_id",
+            "evaluation__period_id",
+            "evaluation__frozen_position_code",
+            "evaluation__evaluator_id",
+            "block_code",
+            "question_type",
+            "question_text",
+            "value_scale",
+        )
+    )
+    rows = list(rows)
+    keys = {}
+    for _, _, _, _, _, block_code, question_type, text, _ in rows:
+        keys.setdefault(question_fingerprint(block_code, question_type, text), (block_code, text))
+    questions = question_dims(keys)
+
+    facts = []
+    for item_id, evaluation_id, period_id, position_code, evaluator_id, block_code, question_type, text, score in rows:
+        position = positions.get(position_code)
+        facts.append(
+            AnswerFact(
+                item_id=item_id,
+                evaluation_id=evaluation_id,
+                period_id=period_id,
+                department_id=position.department_id if position else None,
+                professional_group=position.professional_group if position else "",
+                position_code=position_code,
+                block_code=block_code,
+                question=questions[question_fingerprint(block_code, question_type, text)],
+                evaluator_id=evaluator_id,
+                score=score,
+            )
+        )
+    return facts
+
+
+def refresh_answer_facts(*, full: bool = False, chunk_size: int = 500):
+    """
+    Recalcula AnswerFact de las evaluaciones cambiadas desde la ultima marca de agua
+    (Evaluation.updated_at o EvaluationSummary.updated_at, que cambia al guardar respuestas).
+    Con `full=True` recalcula todas. Genera el numero de evaluaciones procesadas tras cada lote.
+
+    Las filas de cada evaluacion se sustituyen completas, asi que repetir un lote es inocuo.
+    Las preguntas (QuestionDim) van por huella del texto y no cambian; los puestos se
+    corrigen en refresh_position_dims.
+    """
+    # Se toma la marca antes de leer, menos el margen: lo que cambie durante el refresco (o
+    # haga commit tarde) entra en el siguiente.
+    started = timezone.now()
+    watermark, _ = RefreshWatermark.objects.get_or_create(name=ANSWER_FACTS_WATERMARK)
+    changed = Evaluation.objects.all()
+    if not full and watermark.value is not None:
+        changed = changed.filter(
+            Q(updated_at__gt=watermark.value) | Q(summary__updated_at__gt=watermark.value)
+        )
+    evaluation_ids = list(changed.order_by("id").values_list("id", flat=True).distinct())
+
+    positions = refresh_position_dims()
+    done = 0
+    for start in range(0, len(evaluation_ids), chunk_size):
+        chunk_ids = evaluation_ids[start:start + chunk_size]
+        with transaction.atomic():
+            AnswerFact.objects.filter(evaluation_id__in=chunk_ids).delete()
+            AnswerFact.objects.bulk_create(build_answer_facts(chunk_ids, positions), batch_size=1000)
+        done += len(chunk_ids)
+        yield done
+
+    if full:
+        # Hechos de items que ya no existen (p.ej. plantilla regenerada) en evaluaciones sin cambios.
+        AnswerFact.objects.exclude(item_id__in=EvaluationItem.objects.values("id")).delete()
+    watermark.value = started - WATERMARK_SAFETY_MARGIN
+    watermark.save(update_fields=["value", "updated_at"])
+
+
+def fact_score_stats(period, by: str) -> list[dict]:
+    """AVG/MIN/MAX/COUNT de las respuestas del periodo agrupadas por `by` (clave de FACT_GROUPS)."""
+    field = FACT_GROUPS[by]
+    rows = (
+        AnswerFact.objects.filter(period=period)
+        .values(field)
+        .annotate(
+            avg_score=Avg("score"),
+            min_score=Min("score"),
+            max_score=Max("score"),
+            answers_count=Count("score"),
+        )
+        .order_by(field)
+    )
+    return [
+        {
+            "key": row[field] or "",
+            "avg_score": round(float(row["avg_score"]), 2),
+            "min_score": row["min_score"],
+            "max_score": row["max_score"],
+            "answers_count": row["answers_count"],
+        }
+        for row in rows
+    ]
+
+
+NO_DEPARTMENT = "(sin departamento)"
+NO_MANAGER = "(sin manager)"
+
+# Tramos de puntuacion final [desde, hasta) para la distribucion; el ultimo incluye 5.
+SCORE_BUCKETS = [(1.0, 1.5), (1.5, 2.0), (2.0, 2.5), (2.5, 3.0), (3.0, 3.5), (3.5, 4.0), (4.0, 4.5), (4.5, 5.01)]
+
+DONE_STATUSES = (Evaluation.Status.SUBMITTED, Evaluation.Status.FINAL)
+
+
+def completion_counts(evaluations, *group_fields) -> list[dict]:
+    rows = (
+        evaluations.values(*group_fields)
+        .annotate(
+            total=Count("id"),
+            draft=Count("id", filter=Q(status=Evaluation.Status.DRAFT)),
+            submitted=Count("id", filter=Q(status=Evaluation.Status.SUBMITTED)),
+            final=Count("id", filter=Q(status=Evaluation.Status.FINAL)),
+        )
+        .order_by(*group_fields)
+    )
+    result = []
+    for row in rows:
+        done = row["submitted"] + row["final"]
+        row["completion_percent"] = round(100 * done / row["total"], 1) if row["total"] else 0.0
+        result.append(row)
+    return result
+
+
+def block_heatmap(evaluations) -> dict:
+    """
+    Media por puesto y bloque de las respuestas 1-5 de las evaluaciones enviadas o cerradas:
+    la consulta GROUP BY de position_block_stats mas un recuento de evaluaciones por puesto.
+    """
+    done = evaluations.filter(status__in=DONE_STATUSES)
+    counts = dict(
+        done.values_list("frozen_position_code").annotate(n=Count("id")).order_by("frozen_position_code")
+    )
+    cells = {}
+    for row in position_block_stats(done):
+        cells.setdefault(row["position_code"], {})[row["block"]] = row["avg_score"]
+
+    blocks = sorted({block for position in cells.values() for block in position})
+    return {
+        "blocks": blocks,
+        "rows": [
+            {
+                "position_code": code,
+                "evaluations": counts[code],
+                "cells": [cells.get(code, {}).get(b) for b in blocks],
+            }
+            for code in sorted(counts)
+        ],
+    }
+
+
+def score_distribution(evaluations) -> dict:
+    """Numero de evaluaciones enviadas o cerradas por tramo de puntuacion final (una consulta)."""
+    done = evaluations.filter(status__in=DONE_STATUSES)
+    aggregates = {
+        f"b{i}": Count(
+            "id", filter=Q(summary__final_score__gte=low, summary__final_score__lt=high)
+        )
+        for i, (low, high) in enumerate(SCORE_BUCKETS)
+    }
+    aggregates["without_score"] = Count("id", filter=Q(summary__final_score__isnull=True))
+    counts = done.aggregate(**aggregates)
+    buckets = [
+        {"from": low, "to": min(high, 5.0), "count": counts[f"b{i}"]}
+        for i, (low, high) in enumerate(SCORE_BUCKETS)
+    ]
+    return {"buckets": buckets, "without_score": counts["without_score"]}
+
+
+def build_period_cube(period) -> dict:
+    evaluations = Evaluation.objects.filter(period=period)
+    by_department = completion_counts(
+        evaluations.annotate(department=F("employee__evaluation_position__department__name")),
+        "department",
+    )
+    for row in by_department:
+        row["department"] = row["department"] or NO_DEPARTMENT
+    by_manager = completion_counts(
+        evaluations.annotate(manager_id=F("employee__manager_id"), manager=F("employee__manager__username")),
+        "manager_id",
+        "manager",
+    )
+    for row in by_manager:
+        row["manager"] = row["manager"] or NO_MANAGER
+    return {
+        "completion_by_department": by_department,
+        "completion_by_manager": by_manager,
+        "block_heatmap": block_heatmap(evaluations),
+        "score_distribution": score_distribution(evaluations),
+    }
+
+
+# Un cubo desactualizado se sirve tal cual hasta CUBE_MAX_STALENESS desde su calculo; el
+# recalculo normal lo hace refresh_reporting_cubes (--watch o cron), no la peticion.
+# CUBE_TTL acota lo que no marca el cubo (renombrar departamentos, puestos o usuarios).
+CUBE_MAX_STALENESS = timedelta(minutes=15)
+CUBE_TTL = timedelta(hours=6)
+
+
+def write_period_cube_stale(period_id) -> None:
+    PeriodCube.objects.filter(period_id=period_id).update(version=F("version") + 1)
+
+
+def mark_period_cube_stale(period_id) -> None:
+    # Al hacer commit y una vez por transaccion y periodo. Un recalculo concurrente que leyo
+    # la version anterior deja el cubo marcado como desactualizado.
+    on_commit_once(("period_cube", period_id), write_period_cube_stale, period_id)
+
+
+def recompute_period_cube(period) -> dict:
+    cube, _ = PeriodCube.objects.get_or_create(period=period)
+    version = cube.version
+    data = build_period_cube(period)
+    PeriodCube.objects.filter(pk=cube.pk).update(
+        data=data, computed_version=version, computed_at=timezone.now()
+    )
+    return data
+
+
+def current_period_cube(period) -> PeriodCube:
+    """
+    Cubo del cuadro de mando de `period` con el ultimo calculo, aunque este desactualizado.
+    Solo se recalcula aqui si nunca se calculo o si supera CUBE_MAX_STALENESS / CUBE_TTL.
+    """
+    cube = PeriodCube.objects.filter(period=period).first()
+    if cube is not None and cube.computed_at is not None:
+        age = timezone.now() - cube.computed_at
+        limit = CUBE_TTL if cube.computed_version == cube.version else CUBE_MAX_STALENESS
+        if age < limit:
+            return cube
+    recompute_period_cube(period)
+    return PeriodCube.objects.get(period=period)
+
+
+def period_cube(period) -> dict:
+    return current_period_cube(period).data
+
+
+def refresh_period_cubes(*, full: bool = False):
+    """Recalcula los cubos desactualizados (o todos con `full`). Genera el periodo recalculado."""
+    periods = EvaluationPeriod.objects.order_by("id")
+    if not full:
+        periods = periods.filter(
+            Q(reporting_cube__isnull=True)
+            | Q(reporting_cube__computed_at__isnull=True)
+            | Q(reporting_cube__computed_at__lt=timezone.now() - CUBE_TTL)
+            | ~Q(reporting_cube__computed_version=F("reporting_cube__version"))
+        )
+    for period in periods.iterator():
+        recompute_period_cube(period)
+        yield period
+
+
+HISTOGRAM_CACHE_TIMEOUT = 60 * 60
+
+# Ejes del histograma: (columna de EvaluationItem, nombre en la respuesta).
+HISTOGRAM_GROUPS = {
+    "question": (("block_code", "block"), ("question_text", "question")),
+    "block": (("block_code", "block"),),
+    "position": (("evaluation__frozen_position_code", "position_code"),),
+}
+
+
+def period_cube_version(period) -> int:
+    # El cubo se crea aqui si no existe: sin fila, mark_period_cube_stale no tendria nada que subir.
+    cube, _ = PeriodCube.objects.get_or_create(period=period)
+    return cube.version
+
+
+def question_histogram(period, by: str) -> list[dict]:
+    """
+    Numero de respuestas 1..5 de las evaluaciones enviadas o cerradas de `period`, agrupadas
+    segun HISTOGRAM_GROUPS[by] en un solo GROUP BY con conteos condicionales. Cacheado por
+    version del cubo del periodo.
+    """
+    key = f"reporting:question_histogram:{period.pk}:{period_cube_version(period)}:{by}"
+    rows = cache.get(key)
+    if rows is not None:
+        return rows
+
+    fields = [field for field, _ in HISTOGRAM_GROUPS[by]]
+    aggregates = {f"s{score}": Count("id", filter=Q(value_scale=score)) for score in range(1, 6)}
+    qs = (
+        EvaluationItem.objects.filter(
+            evaluation__period=period,
+            evaluation__status__in=DONE_STATUSES,
+            question_type=TemplateQuestion.SCALE_1_5,
+            value_scale__isnull=False,
+        )
+        .values(*fields)
+        .annotate(**aggregates)
+        .order_by(*fields)
+    )
+    rows = []
+    for row in qs:
+        counts = [row[f"s{score}"] for score in range(1, 6)]
+        answers = sum(counts)
+        result = {name: row[field] for field, name in HISTOGRAM_GROUPS[by]}
+        if "block" in result:
+            result["block"] = result["block"] or UNKNOWN_BLOCK
+        result.update(
+            counts=counts,
+            answers=answers,
+            avg_score=round(sum(s * c for s, c in enumerate(counts, start=1)) / answers, 2),
+        )
+        rows.append(result)
+    cache.set(key, rows, HISTOGRAM_CACHE_TIMEOUT)
+    return rows
+
+
+def compare_histograms(period, other, by: str) -> list[dict]:
+    """Histogramas de dos periodos alineados por clave; sin respuestas en uno, sus conteos van a cero."""
+    names = [name for _, name in HISTOGRAM_GROUPS[by]]
+    empty = {"counts": [0] * 5, "answers": 0, "avg_score": None}
+    sides = [
+        {tuple(row[n] for n in names): row for row in question_histogram(p, by)}
+        for p in (period, other)
+    ]
+    return [
+        {
+            **dict(zip(names, key)),
+            "current": {k: sides[0].get(key, empty)[k] for k in empty},
+            "compared": {k: sides[1].get(key, empty)[k] for k in empty},
+        }
+        for key in sorted(set(sides[0]) | set(sides[1]))
+    ]
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.evaluations.models import Evaluation
+from apps.evaluations.signals import period_evaluations_changed
+from apps.org.models import Employee
+from apps.reporting.services import mark_period_cube_stale
+
+# Campos de Evaluation que cambian los agregados del cuadro de mando.
+CUBE_FIELDS = frozenset({"status", "final_score", "employee", "frozen_position_code"})
+
+# Campos de Employee por los que se agrupa la completitud (departamento via puesto, manager).
+EMPLOYEE_CUBE_FIELDS = frozenset({"evaluation_position", "manager"})
+
+
+@receiver(post_save, sender=Evaluation)
+def mark_cube_stale_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and not CUBE_FIELDS & set(update_fields):
+        return
+    mark_period_cube_stale(instance.period_id)
+
+
+@receiver(post_delete, sender=Evaluation)
+def mark_cube_stale_on_delete(sender, instance, **kwargs):
+    mark_period_cube_stale(instance.period_id)
+
+
+@receiver(period_evaluations_changed)
+def mark_cube_stale_on_bulk_change(sender, period_id, **kwargs):
+    mark_period_cube_stale(period_id)
+
+
+@receiver(post_save, sender=Employee)
+def mark_cubes_stale_on_employee_save(sender, instance, created, update_fields=None, **kwargs):
+    # Un empleado nuevo no tiene evaluaciones; los demas cambios solo afectan a sus periodos.
+    if created or (update_fields is not None and not EMPLOYEE_CUBE_FIELDS & set(update_fields)):
+        return
+    period_ids = Evaluation.objects.filter(employee=instance).values_list("period_id", flat=True).distinct()
+    for period_id in period_ids:
+        mark_period_cube_stale(period_id)
@@ -0,0 +1,204 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.permissions import HR
+from apps.evaluations.models import Evaluation, EvaluationItem, EvaluationPeriod, EvaluationSummary
+from apps.evaluations.services.summary import refresh_summary
+from apps.org.models import Department, Employee, Position
+from apps.reporting.models import AnswerFact, PeriodCube, QuestionDim
+from apps.reporting.services import (
+    CUBE_MAX_STALENESS,
+    period_cube,
+    question_histogram,
+    refresh_answer_facts,
+)
+
+
+class AnswerFactTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.hr = User.objects.create_user(username="hr", password="x")
+        Group.objects.get_or_create(name=HR)[0].user_set.add(self.hr)
+
+        self.sales = Department.objects.create(name="Ventas")
+        self.ops = Department.objects.create(name="Operaciones")
+        Position.objects.create(code="P01", name="Comercial", department=self.sales, professional_group="GP2")
+        Position.objects.create(code="P02", name="Operario", department=self.ops, professional_group="GP4")
+        self.period = EvaluationPeriod.objects.create(name="2025", start_date="2025-01-01", end_date="2025-12-31")
+
+        self.evaluations = []
+        for dni, code, scores in (("D1", "P01", [4, 2]), ("D2", "P02", [5, None])):
+            emp = Employee.objects.create(full_name=dni, dni=dni)
+            with self.captureOnCommitCallbacks(execute=True):
+                ev = Evaluation.objects.create(
+                    employee=emp,
+                    evaluator=self.hr,
+                    period=self.period,
+                    frozen_position_code=code,
+                    frozen_position_name=code,
+                )
+            for order, score in enumerate(scores, start=1):
+                EvaluationItem.objects.create(
+                    evaluation=ev,
+                    section_title="Bloque A",
+                    block_code="A",
+                    question_text=f"Pregunta  {order}",
+                    question_type="SCALE_1_5",
+                    display_order=order,
+                    value_scale=score,
+                )
+            refresh_summary(ev)
+            self.evaluations.append(ev)
+
+    def test_incremental_refresh(self):
+        # Datos guardados antes del margen de seguridad de la marca de agua.
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Evaluation.objects.update(updated_at=an_hour_ago)
+        EvaluationSummary.objects.update(updated_at=an_hour_ago)
+        self.assertEqual(list(refresh_answer_facts()), [2])
+        self.assertEqual(AnswerFact.objects.count(), 3)
+        self.assertEqual(QuestionDim.objects.count(), 2)
+        fact = AnswerFact.objects.get(evaluation=self.evaluations[0], score=4)
+        self.assertEqual((fact.department_id, fact.professional_group), (self.sales.id, "GP2"))
+
+        # Sin cambios no se procesa nada.
+        self.assertEqual(list(refresh_answer_facts()), [])
+
+        ev = self.evaluations[1]
+        ev.items.filter(value_scale__isnull=True).update(value_scale=3)
+        refresh_summary(ev)
+        self.assertEqual(list(refresh_answer_facts()), [1])
+        self.assertEqual(AnswerFact.objects.filter(evaluation=ev).count(), 2)
+        self.assertEqual(AnswerFact.objects.count(), 4)
+
+        # Cambiar el departamento de un puesto corrige sus hechos sin --full.
+        Position.objects.filter(code="P01").update(department=self.ops)
+        Evaluation.objects.update(updated_at=an_hour_ago)
+        EvaluationSummary.objects.update(updated_at=an_hour_ago)
+        self.assertEqual(list(refresh_answer_facts()), [])
+        self.assertEqual(
+            set(AnswerFact.objects.filter(position_code="P01").values_list("department_id", flat=True)),
+            {self.ops.id},
+        )
+
+    def test_fact_stats_endpoint(self):
+        list(refresh_answer_facts())
+        self.client.force_login(self.hr)
+        url = reverse("reporting_fact_stats", args=[self.period.id])
+
+        data = self.client.get(url, {"by": "department"}).json()
+        self.assertEqual(
+            [(r["key"], r["avg_score"], r["answers_count"]) for r in data["rows"]],
+            [("Operaciones", 5.0, 1), ("Ventas", 3.0, 2)],
+        )
+        data = self.client.get(url, {"by": "professional_group"}).json()
+        self.assertEqual([r["key"] for r in data["rows"]], ["GP2", "GP4"])
+        self.assertEqual(self.client.get(url, {"by": "evaluator"}).status_code, 400)
+
+    def test_period_cube_recomputed_on_status_change(self):
+        Employee.objects.filter(dni="D1").update(
+            evaluation_position=Position.objects.get(code="P01"), manager=self.hr
+        )
+        cube = period_cube(self.period)
+        self.assertEqual(cube["completion_by_department"][1]["department"], "Ventas")
+        self.assertEqual(cube["completion_by_manager"][1]["manager"], "hr")
+        self.assertEqual(cube["block_heatmap"]["rows"], [])
+
+        # Cubo al dia: una sola lectura.
+        with self.assertNumQueries(1):
+            period_cube(self.period)
+
+        ev = self.evaluations[0]
+        ev.status = Evaluation.Status.SUBMITTED
+        with self.captureOnCommitCallbacks(execute=True):
+            ev.save(update_fields=["status", "updated_at"])
+        stored = PeriodCube.objects.get(period=self.period)
+        self.assertTrue(stored.is_stale)
+
+        # Mientras no lo recalcule el comando se sirve el ultimo calculo.
+        self.client.force_login(self.hr)
+        url = reverse("reporting_completion", args=[self.period.id])
+        ventas = next(r for r in self.client.get(url).json()["by_department"] if r["department"] == "Ventas")
+        self.assertEqual(ventas["submitted"], 0)
+        response = self.client.get(reverse("reporting_dashboard"), {"period": self.period.id})
+        self.assertContains(response, "cambios pendientes")
+
+        call_command("refresh_reporting_cubes", stdout=StringIO())
+        self.assertFalse(PeriodCube.objects.get(period=self.period).is_stale)
+        ventas = next(r for r in self.client.get(url).json()["by_department"] if r["department"] == "Ventas")
+        self.assertEqual((ventas["submitted"], ventas["completion_percent"]), (1, 100.0))
+
+        data = self.client.get(reverse("reporting_heatmap", args=[self.period.id])).json()
+        self.assertEqual(data["blocks"], ["A"])
+        self.assertEqual(data["rows"], [{"position_code": "P01", "evaluations": 1, "cells": [3.0]}])
+
+        data = self.client.get(reverse("reporting_distribution", args=[self.period.id])).json()
+        self.assertEqual([b["count"] for b in data["buckets"]], [0, 0, 0, 0, 1, 0, 0, 0])
+
+        response = self.client.get(reverse("reporting_dashboard"), {"period": self.period.id})
+        self.assertContains(response, "Ventas")
+        self.assertNotContains(response, "cambios pendientes")
+
+    def test_period_cube_stale_on_employee_change(self):
+        period_cube(self.period)
+        employee = Employee.objects.get(dni="D1")
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.full_name = "Otro nombre"
+            employee.save(update_fields=["full_name", "updated_at"])
+        self.assertFalse(PeriodCube.objects.get(period=self.period).is_stale)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.manager = self.hr
+            employee.save()
+        self.assertTrue(PeriodCube.objects.get(period=self.period).is_stale)
+
+        # Pasado CUBE_MAX_STALENESS la propia lectura recalcula.
+        PeriodCube.objects.filter(period=self.period).update(
+            computed_at=timezone.now() - CUBE_MAX_STALENESS - timedelta(minutes=1)
+        )
+        cube = period_cube(self.period)
+        self.assertIn("hr", [row["manager"] for row in cube["completion_by_manager"]])
+        self.assertFalse(PeriodCube.objects.get(period=self.period).is_stale)
+
+    def test_question_histogram_and_compare(self):
+        cache.clear()
+        Evaluation.objects.filter(pk=self.evaluations[0].pk).update(status=Evaluation.Status.SUBMITTED)
+        self.assertEqual(
+            question_histogram(self.period, "question"),
+            [
+                {"block": "A", "question": "Pregunta  1", "counts": [0, 0, 0, 1, 0], "answers": 1, "avg_score": 4.0},
+                {"block": "A", "question": "Pregunta  2", "counts": [0, 1, 0, 0, 0], "answers": 1, "avg_score": 2.0},
+            ],
+        )
+        self.assertEqual(question_histogram(self.period, "block")[0]["answers"], 2)
+
+        # Cacheado por version del cubo: .update() no la sube y el resultado no cambia.
+        Evaluation.objects.filter(pk=self.evaluations[1].pk).update(status=Evaluation.Status.FINAL)
+        with self.assertNumQueries(1):
+            self.assertEqual(question_histogram(self.period, "block")[0]["answers"], 2)
+
+        ev = self.evaluations[1]
+        ev.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            ev.save(update_fields=["status", "updated_at"])
+        self.assertEqual(question_histogram(self.period, "block")[0]["counts"], [0, 1, 0, 1, 1])
+
+        previous = EvaluationPeriod.objects.create(name="2024", start_date="2024-01-01", end_date="2024-12-31")
+        self.client.force_login(self.hr)
+        url = reverse("reporting_histogram", args=[self.period.id])
+        data = self.client.get(url, {"by": "position", "compare": previous.id}).json()
+        self.assertEqual(data["compared_period"]["name"], "2024")
+        self.assertEqual(
+            [(r["position_code"], r["current"]["answers"], r["compared"]["answers"]) for r in data["rows"]],
+            [("P01", 2, 0), ("P02", 1, 0)],
+        )
+        self.assertEqual(self.client.get(url, {"by": "evaluator"}).status_code, 400)
+
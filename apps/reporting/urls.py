@@ -3,4 +3,10 @@ from . import views
 
 urlpatterns = [
     path("_health", views.health, name="health"),
+    path("reporting/", views.dashboard, name="reporting_dashboard"),
+    path("reporting/period/<int:period_id>/completion.json", views.completion_json, name="reporting_completion"),
+    path("reporting/period/<int:period_id>/heatmap.json", views.heatmap_json, name="reporting_heatmap"),
+    path("reporting/period/<int:period_id>/distribution.json", views.distribution_json, name="reporting_distribution"),
+    path("reporting/period/<int:period_id>/histogram.json", views.histogram_json, name="reporting_histogram"),
+    path("reporting/period/<int:period_id>/facts.json", views.fact_stats_json, name="reporting_fact_stats"),
 ]
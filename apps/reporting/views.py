@@ -1,5 +1,150 @@
-from django.http import HttpResponse
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import render
+
+from apps.core.permissions import can_view_reporting
+from apps.evaluations.models import EvaluationPeriod
+from apps.reporting.models import RefreshWatermark
+from apps.reporting.services import (
+    ANSWER_FACTS_WATERMARK,
+    FACT_GROUPS,
+    HISTOGRAM_GROUPS,
+    compare_histograms,
+    current_period_cube,
+    fact_score_stats,
+    period_cube,
+    question_histogram,
+)
 
 
 def health(request):
     return HttpResponse('ok')
+
+
+def reporting_period_or_403(user, period_id):
+    if not can_view_reporting(user):
+        raise PermissionDenied
+    period = EvaluationPeriod.objects.filter(id=period_id).first()
+    if not period:
+        raise PermissionDenied
+    return period
+
+
+def heatmap_color(value) -> str:
+    # 1 rojo -> 3 amarillo -> 5 verde.
+    if value is None:
+        return "#f1f5f9"
+    hue = round(max(0.0, min(1.0, (value - 1) / 4)) * 120)
+    return f"hsl({hue}, 70%, 80%)"
+
+
+@login_required
+def dashboard(request):
+    """Cuadro de mando de un periodo (?period=), servido desde el cubo precalculado."""
+    if not can_view_reporting(request.user):
+        raise PermissionDenied
+
+    periods = list(EvaluationPeriod.objects.order_by("-end_date", "-start_date", "-id"))
+    period = None
+    period_id = request.GET.get("period")
+    if period_id and period_id.isdigit():
+        period = next((p for p in periods if p.id == int(period_id)), None)
+    if period is None and periods:
+        period = periods[0]
+
+    stored_cube = current_period_cube(period) if period else None
+    cube = stored_cube.data if stored_cube else None
+    heatmap_rows = []
+    if cube:
+        heatmap_rows = [
+            {
+                "position_code": row["position_code"],
+                "evaluations": row["evaluations"],
+                "cells": [{"value": v, "color": heatmap_color(v)} for v in row["cells"]],
+            }
+            for row in cube["block_heatmap"]["rows"]
+        ]
+    return render(
+        request,
+        "reporting/dashboard.html",
+        {
+            "periods": periods,
+            "period": period,
+            "cube": cube,
+            "stored_cube": stored_cube,
+            "heatmap_rows": heatmap_rows,
+        },
+    )
+
+
+@login_required
+def completion_json(request, period_id: int):
+    period = reporting_period_or_403(request.user, period_id)
+    cube = period_cube(period)
+    return JsonResponse(
+        {
+            "period": {"id": period.id, "name": period.name},
+            "by_department": cube["completion_by_department"],
+            "by_manager": cube["completion_by_manager"],
+        }
+    )
+
+
+@login_required
+def heatmap_json(request, period_id: int):
+    period = reporting_period_or_403(request.user, period_id)
+    return JsonResponse({"period": {"id": period.id, "name": period.name}, **period_cube(period)["block_heatmap"]})
+
+
+@login_required
+def distribution_json(request, period_id: int):
+    period = reporting_period_or_403(request.user, period_id)
+    return JsonResponse(
+        {"period": {"id": period.id, "name": period.name}, **period_cube(period)["score_distribution"]}
+    )
+
+
+@login_required
+def histogram_json(request, period_id: int):
+    """
+    Respuestas 1..5 por ?by=question|block|position. Con ?compare=<periodo> devuelve los
+    dos periodos alineados por clave (current / compared).
+    """
+    period = reporting_period_or_403(request.user, period_id)
+
+    by = request.GET.get("by") or "question"
+    if by not in HISTOGRAM_GROUPS:
+        return JsonResponse({"error": f"by debe ser uno de: {', '.join(HISTOGRAM_GROUPS)}"}, status=400)
+
+    payload = {"period": {"id": period.id, "name": period.name}, "by": by}
+    compare_id = request.GET.get("compare") or ""
+    if compare_id:
+        if not compare_id.isdigit():
+            return JsonResponse({"error": "compare debe ser el id de un periodo"}, status=400)
+        other = reporting_period_or_403(request.user, int(compare_id))
+        payload["compared_period"] = {"id": other.id, "name": other.name}
+        payload["rows"] = compare_histograms(period, other, by)
+    else:
+        payload["rows"] = question_histogram(period, by)
+    return JsonResponse(payload)
+
+
+@login_required
+def fact_stats_json(request, period_id: int):
+    """Puntuaciones del periodo agrupadas por ?by=department|professional_group|position|block."""
+    period = reporting_period_or_403(request.user, period_id)
+
+    by = request.GET.get("by") or "department"
+    if by not in FACT_GROUPS:
+        return JsonResponse({"error": f"by debe ser uno de: {', '.join(FACT_GROUPS)}"}, status=400)
+
+    watermark = RefreshWatermark.objects.filter(name=ANSWER_FACTS_WATERMARK).values_list("value", flat=True).first()
+    return JsonResponse(
+        {
+            "period": {"id": period.id, "name": period.name},
+            "by": by,
+            "refreshed_at": watermark,
+            "rows": fact_score_stats(period, by),
+        }
+    )
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class TemplatesEvalConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.templates_eval"
+
+    def ready(self):
+        from apps.templates_eval import signals  # noqa: F401
@@ -1,11 +1,14 @@
 import hashlib
 import json
+from decimal import Decimal
 from pathlib import Path
 
 from django.apps import apps
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+from apps.templates_eval.services import invalidate_template_registry
+
 
 BLOCK_ORDER = {"A": 1, "B": 2, "C": 3, "D": 4, "E": 5}
 
@@ -159,6 +162,8 @@ class Command(BaseCommand):
                         .exclude(pk=tpl.pk)
                         .update(is_active=False)
                     )
+                    # update() no emite post_save; el sello se guarda con el resto del import.
+                    invalidate_template_registry()
 
             total_sections = 0
             total_questions = 0
@@ -190,10 +195,13 @@ class Command(BaseCommand):
                     total_questions += len(items)
                     continue
 
+                weight = b.get("weight_percent")
                 section = TemplateSection.objects.create(
                     template=tpl,
                     title=sec_title,
                     order=sec_order,
+                    block_code=code,
+                    weight_percent=Decimal(str(weight)) if weight is not None else None,
                 )
                 total_sections += 1
 
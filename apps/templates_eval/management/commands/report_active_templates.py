@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from django.core.management.base import BaseCommand
-from django.db.models import Count, Max
+from django.db.models import Count
 
-from apps.templates_eval.models import EvaluationTemplate, TemplateActive, TemplateQuestion
+from apps.templates_eval.models import TemplateQuestion
+from apps.templates_eval.services import get_template_registry
 
 
 class Command(BaseCommand):
@@ -25,11 +26,12 @@ class Command(BaseCommand):
         base_code = (options["base_code"] or "").strip().upper()
         as_csv = bool(options["csv"])
 
-        actives_qs = TemplateActive.objects.select_related("template").all()
+        registry = get_template_registry()
+        pinned = registry.pinned_by_base_code
         if base_code:
-            actives_qs = actives_qs.filter(base_code=base_code)
+            pinned = {bc: t for bc, t in pinned.items() if bc == base_code}
 
-        active_templates = [a.template for a in actives_qs if a.template_id]
+        active_templates = list(pinned.values())
         template_ids = [t.id for t in active_templates]
         if not template_ids:
             self.stdout.write("No hay plantillas activas para el filtro dado.")
@@ -42,17 +44,10 @@ class Command(BaseCommand):
         )
         count_map = {row["section__template_id"]: row["total"] for row in q_counts}
 
-        latest_by_base = (
-            EvaluationTemplate.objects.values("base_code")
-            .annotate(latest_version=Max("version"))
-        )
-        latest_map = {row["base_code"]: row["latest_version"] for row in latest_by_base}
+        latest_map = registry.latest_version_by_base_code
 
         rows = []
-        for a in actives_qs:
-            t = a.template
-            if not t:
-                continue
+        for t in active_templates:
             total_q = count_map.get(t.id, 0)
             latest_v = latest_map.get(t.base_code)
             rows.append(
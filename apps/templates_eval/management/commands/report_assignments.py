@@ -3,7 +3,7 @@ from __future__ import annotations
 from django.core.management.base import BaseCommand
 
 from apps.org.models import Position
-from apps.templates_eval.models import EvaluationTemplate, TemplateActive, TemplateAssignment
+from apps.templates_eval.services import get_template_registry
 
 
 class Command(BaseCommand):
@@ -18,9 +18,12 @@ class Command(BaseCommand):
         as_csv = bool(options["csv"])
 
         positions = list(Position.objects.all().order_by("code"))
-        assignments = TemplateAssignment.objects.select_related("template", "position").all()
-        assign_map = {a.position_id: a.template.base_code for a in assignments}
-        active_set = set(TemplateActive.objects.values_list("base_code", flat=True))
+        registry = get_template_registry()
+        assign_map = {
+            position_id: t.base_code
+            for position_id, t in registry.assignment_by_position_id.items()
+        }
+        active_set = set(registry.pinned_by_base_code)
 
         rows = []
         missing_assignment = 0
@@ -49,9 +52,7 @@ class Command(BaseCommand):
                 )
 
         position_codes = {p.code for p in positions}
-        template_base_codes = set(
-            EvaluationTemplate.objects.exclude(base_code="").values_list("base_code", flat=True).distinct()
-        )
+        template_base_codes = {bc for bc in registry.latest_version_by_base_code if bc}
         base_codes_without_position = sorted(template_base_codes - position_codes)
 
         if as_csv:
@@ -4,15 +4,10 @@ from collections import Counter
 from datetime import datetime
 
 from django.core.management.base import BaseCommand
-from django.db.models import Max
 
 from apps.org.models import Position
-from apps.templates_eval.models import (
-    EvaluationTemplate,
-    TemplateActive,
-    TemplateAssignment,
-    TemplateQuestion,
-)
+from apps.templates_eval.models import TemplateQuestion
+from apps.templates_eval.services import get_template_registry
 
 
 class Command(BaseCommand):
@@ -26,25 +21,23 @@ class Command(BaseCommand):
 
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        actives = TemplateActive.objects.select_related("template").all()
-        active_templates = [a.template for a in actives if a.template_id]
+        registry = get_template_registry()
+        active_templates = list(registry.pinned_by_base_code.values())
         active_count = len(active_templates)
         active_base_codes = {t.base_code for t in active_templates if t.base_code}
 
         positions = list(Position.objects.all())
         position_count = len(positions)
 
-        assignments = TemplateAssignment.objects.select_related("template").all()
-        assign_map = {a.position_id: a.template.base_code for a in assignments}
+        assign_map = {
+            position_id: t.base_code
+            for position_id, t in registry.assignment_by_position_id.items()
+        }
         correct_assignments = sum(
             1 for p in positions if assign_map.get(p.id) in active_base_codes
         )
 
-        latest_versions = (
-            EvaluationTemplate.objects.values("base_code")
-            .annotate(latest=Max("version"))
-        )
-        latest_map = {r["base_code"]: r["latest"] for r in latest_versions}
+        latest_map = registry.latest_version_by_base_code
 
         outdated = []
         for t in active_templates:
@@ -67,11 +60,7 @@ class Command(BaseCommand):
         ]
 
         position_codes = {p.code for p in positions}
-        all_template_base_codes = set(
-            EvaluationTemplate.objects.exclude(base_code="")
-            .values_list("base_code", flat=True)
-            .distinct()
-        )
+        all_template_base_codes = {bc for bc in latest_map if bc}
         legacy_base_codes = sorted(all_template_base_codes - position_codes)
 
         unexpected_types = [t for t in q_types if t != "SCALE_1_5"]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_eval', '0005_evaluationtemplate_base_code_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templatesection',
+            name='block_code',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='templatesection',
+            name='weight_percent',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+    ]
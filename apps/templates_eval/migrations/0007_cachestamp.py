@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_eval', '0006_templatesection_block_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheStamp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=40, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,7 +1,29 @@
+import re
+from decimal import Decimal, InvalidOperation
+
 from django.db import models
 from django.utils import timezone
 
 
+BLOCK_RE = re.compile(r"bloque\s+([a-e])\b", re.IGNORECASE)
+WEIGHT_RE = re.compile(r"\((\d+(?:[.,]\d+)?)\s*%\)")
+UNKNOWN_BLOCK = "UNK"
+
+
+def block_code_from_title(title: str) -> str:
+    m = BLOCK_RE.search(title or "")
+    return m.group(1).upper() if m else UNKNOWN_BLOCK
+
+
+def block_weight_from_title(title: str):
+    m = WEIGHT_RE.search(title or "")
+    if not m:
+        return None
+    try:
+        return Decimal(m.group(1).replace(",", "."))
+    except InvalidOperation:
+        return None
+
 
 class EvaluationTemplate(models.Model):
     name = models.CharField(max_length=200)
@@ -37,6 +59,8 @@ class TemplateSection(models.Model):
     template = models.ForeignKey(EvaluationTemplate, on_delete=models.CASCADE, related_name="sections")
     title = models.CharField(max_length=200)
     order = models.PositiveIntegerField(default=1)
+    block_code = models.CharField(max_length=10, blank=True, default="", db_index=True)
+    weight_percent = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
 
     class Meta:
         ordering = ["order"]
@@ -44,6 +68,14 @@ class TemplateSection(models.Model):
     def __str__(self):
         return f"{self.template}: {self.title}"
 
+    def save(self, *args, **kwargs):
+        # Importadores antiguos solo informan el titulo ("Bloque A - ... (40%)").
+        if not self.block_code:
+            self.block_code = block_code_from_title(self.title)
+        if self.weight_percent is None:
+            self.weight_percent = block_weight_from_title(self.title)
+        super().save(*args, **kwargs)
+
 
 class TemplateQuestion(models.Model):
     SCALE_1_5 = "SCALE_1_5"
@@ -91,3 +123,16 @@ class TemplateActive(models.Model):
 
     def __str__(self):
         return f"{self.base_code} -> {self.template.code}"
+
+
+class CacheStamp(models.Model):
+    """
+    Sello de version compartido por todos los procesos. Las copias en memoria (registro,
+    snapshots) se descartan cuando su sello deja de coincidir con el de esta tabla.
+    """
+
+    name = models.CharField(max_length=40, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.value}"
@@ -1,25 +1,248 @@
-from typing import Optional
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
 
-from apps.templates_eval.models import EvaluationTemplate
+from django.core.cache import cache
+
+from apps.core.transactions import on_commit_once, pending_on_commit
+from apps.templates_eval.models import (
+    CacheStamp,
+    EvaluationTemplate,
+    TemplateActive,
+    TemplateAssignment,
+    TemplateQuestion,
+    TemplateSection,
+)
+
+
+SNAPSHOT_CACHE_TIMEOUT = 24 * 60 * 60
+SNAPSHOT_GENERATION = "snapshots"
+REGISTRY_STAMP = "registry"
+
+
+def read_cache_stamp(name: str) -> int:
+    value = CacheStamp.objects.filter(name=name).values_list("value", flat=True).first()
+    if value is None:
+        # Sin sello: se crea uno nuevo para no reutilizar copias de una base de datos anterior.
+        value = CacheStamp.objects.get_or_create(name=name, defaults={"value": time.time_ns()})[0].value
+    return value
+
+
+def write_cache_stamp(name: str) -> None:
+    CacheStamp.objects.update_or_create(name=name, defaults={"value": time.time_ns()})
+
+
+def bump_cache_stamp(name: str) -> None:
+    # Al hacer commit y una vez por transaccion: importar N preguntas escribe el sello una vez.
+    on_commit_once(("cache_stamp", name), write_cache_stamp, name)
+
+
+def cache_stamp_pending(name: str) -> bool:
+    # Cambios sin commit en esta transaccion: lo que se lea ahora no se guarda bajo el sello
+    # actual (si la transaccion se deshace, el sello no cambia y la copia quedaria mala).
+    return pending_on_commit(("cache_stamp", name))
 
 
 def resolve_active_template(base_code: str) -> Optional[EvaluationTemplate]:
     base_code = (base_code or "").strip().upper()
     if not base_code:
         return None
+    return get_template_registry().active_by_base_code.get(base_code)
+
+
+def assigned_template_for_position(position_id) -> Optional[EvaluationTemplate]:
+    return get_template_registry().assigned_by_position_id.get(position_id)
 
-    active = (
-        EvaluationTemplate.objects
-        .filter(base_code=base_code, is_active=True)
-        .order_by("-version")
-        .first()
+
+@dataclass(frozen=True)
+class TemplateRegistry:
+    stamp: int
+    templates_by_id: Dict[int, EvaluationTemplate]
+    # Ultima version activa por base_code; si no hay ninguna activa, la ultima version.
+    active_by_base_code: Dict[str, EvaluationTemplate]
+    # Filas de TemplateActive (plantilla fijada por base_code).
+    pinned_by_base_code: Dict[str, EvaluationTemplate]
+    latest_version_by_base_code: Dict[str, int]
+    # Primera asignacion por posicion (is_default y version mas alta primero)...
+    assignment_by_position_id: Dict[int, EvaluationTemplate]
+    # ...y la primera cuya plantilla esta activa.
+    assigned_by_position_id: Dict[int, EvaluationTemplate]
+
+
+def build_template_registry(stamp: int = 0) -> TemplateRegistry:
+    templates = list(EvaluationTemplate.objects.order_by("base_code", "-version", "-id"))
+    templates_by_id = {t.id: t for t in templates}
+
+    active_by_base_code = {}
+    latest_by_base_code = {}
+    latest_version_by_base_code = {}
+    for t in templates:
+        code = (t.base_code or "").upper()
+        latest_by_base_code.setdefault(code, t)
+        latest_version_by_base_code.setdefault(t.base_code, t.version)
+        if t.is_active:
+            active_by_base_code.setdefault(code, t)
+    for code, t in latest_by_base_code.items():
+        active_by_base_code.setdefault(code, t)
+
+    pinned_by_base_code = {
+        base_code: templates_by_id[template_id]
+        for base_code, template_id in TemplateActive.objects.values_list("base_code", "template_id")
+        if template_id in templates_by_id
+    }
+
+    assignment_by_position_id = {}
+    assigned_by_position_id = {}
+    assignments = (
+        TemplateAssignment.objects
+        .order_by("position_id", "-is_default", "-template__version")
+        .values_list("position_id", "template_id")
     )
-    if active:
-        return active
-
-    return (
-        EvaluationTemplate.objects
-        .filter(base_code=base_code)
-        .order_by("-version")
-        .first()
+    for position_id, template_id in assignments:
+        t = templates_by_id.get(template_id)
+        if t is None:
+            continue
+        assignment_by_position_id.setdefault(position_id, t)
+        if t.is_active:
+            assigned_by_position_id.setdefault(position_id, t)
+
+    return TemplateRegistry(
+        stamp=stamp,
+        templates_by_id=templates_by_id,
+        active_by_base_code=active_by_base_code,
+        pinned_by_base_code=pinned_by_base_code,
+        latest_version_by_base_code=latest_version_by_base_code,
+        assignment_by_position_id=assignment_by_position_id,
+        assigned_by_position_id=assigned_by_position_id,
     )
+
+
+_registry = None
+
+
+def registry_stamp() -> int:
+    return read_cache_stamp(REGISTRY_STAMP)
+
+
+def invalidate_template_registry() -> None:
+    """Cambia el sello en base de datos al hacer commit: todos los procesos recargan el registro."""
+    global _registry
+    bump_cache_stamp(REGISTRY_STAMP)
+    _registry = None
+
+
+def get_template_registry() -> TemplateRegistry:
+    """
+    Registro en memoria de plantillas activas por base_code y asignadas por posicion.
+
+    Se carga en bloque (tres consultas) y se mantiene por proceso mientras el sello
+    REGISTRY_STAMP de CacheStamp no cambie; cada uso solo lee ese sello. Dentro de una
+    transaccion con cambios de plantillas pendientes se recarga sin guardarlo.
+    """
+    global _registry
+    stamp = registry_stamp()
+    if cache_stamp_pending(REGISTRY_STAMP):
+        return build_template_registry(stamp)
+    if _registry is None or _registry.stamp != stamp:
+        _registry = build_template_registry(stamp)
+    return _registry
+
+
+@dataclass(frozen=True)
+class QuestionSnapshot:
+    id: int
+    text: str
+    help_text: str
+    question_type: str
+    is_required: bool
+    order: int
+
+
+@dataclass(frozen=True)
+class SectionSnapshot:
+    id: int
+    title: str
+    order: int
+    block_code: str
+    weight_percent: Optional[Decimal]
+    questions: Tuple[QuestionSnapshot, ...]
+
+
+@dataclass(frozen=True)
+class TemplateSnapshot:
+    template_id: int
+    source_hash: str
+    sections: Tuple[SectionSnapshot, ...]
+
+    @property
+    def questions(self) -> Tuple[QuestionSnapshot, ...]:
+        return tuple(q for s in self.sections for q in s.questions)
+
+
+# Copia por proceso: (clave de cache, snapshot) por template_id.
+_local_snapshots = {}
+
+
+def build_template_snapshot(template_id: int, source_hash: str = "") -> TemplateSnapshot:
+    questions_by_section = {}
+    questions = (
+        TemplateQuestion.objects.filter(section__template_id=template_id)
+        .order_by("section_id", "order", "id")
+    )
+    for q in questions:
+        questions_by_section.setdefault(q.section_id, []).append(
+            QuestionSnapshot(
+                id=q.id,
+                text=q.text,
+                help_text=q.help_text,
+                question_type=q.question_type,
+                is_required=bool(q.is_required),
+                order=q.order,
+            )
+        )
+
+    sections = tuple(
+        SectionSnapshot(
+            id=s.id,
+            title=s.title,
+            order=s.order,
+            block_code=s.block_code,
+            weight_percent=s.weight_percent,
+            questions=tuple(questions_by_section.get(s.id, [])),
+        )
+        for s in TemplateSection.objects.filter(template_id=template_id).order_by("order", "id")
+    )
+    return TemplateSnapshot(template_id=template_id, source_hash=source_hash, sections=sections)
+
+
+def snapshot_generation() -> int:
+    return read_cache_stamp(SNAPSHOT_GENERATION)
+
+
+def bump_snapshot_generation() -> None:
+    bump_cache_stamp(SNAPSHOT_GENERATION)
+    _local_snapshots.clear()
+
+
+def get_template_snapshot(template: EvaluationTemplate) -> TemplateSnapshot:
+    """
+    Snapshot compilado (secciones y preguntas ordenadas) de una version de plantilla.
+
+    Se cachea por proceso y en la cache, por template id, source_hash y generacion.
+    Cualquier cambio en TemplateSection/TemplateQuestion cambia el sello de generacion
+    (CacheStamp), que se lee en cada uso.
+    """
+    if cache_stamp_pending(SNAPSHOT_GENERATION):
+        return build_template_snapshot(template.pk, template.source_hash)
+    key = f"templates_eval:snapshot:{template.pk}:{template.source_hash}:{snapshot_generation()}"
+    local = _local_snapshots.get(template.pk)
+    if local and local[0] == key:
+        return local[1]
+
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_template_snapshot(template.pk, template.source_hash)
+        cache.set(key, snapshot, SNAPSHOT_CACHE_TIMEOUT)
+    _local_snapshots[template.pk] = (key, snapshot)
+    return snapshot
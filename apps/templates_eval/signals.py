@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.templates_eval.models import (
+    EvaluationTemplate,
+    TemplateActive,
+    TemplateAssignment,
+    TemplateQuestion,
+    TemplateSection,
+)
+from apps.templates_eval.services import bump_snapshot_generation, invalidate_template_registry
+
+
+@receiver(post_save, sender=TemplateSection)
+@receiver(post_delete, sender=TemplateSection)
+@receiver(post_save, sender=TemplateQuestion)
+@receiver(post_delete, sender=TemplateQuestion)
+def invalidate_template_snapshots(sender, **kwargs):
+    bump_snapshot_generation()
+
+
+@receiver(post_save, sender=EvaluationTemplate)
+@receiver(post_delete, sender=EvaluationTemplate)
+@receiver(post_save, sender=TemplateActive)
+@receiver(post_delete, sender=TemplateActive)
+@receiver(post_save, sender=TemplateAssignment)
+@receiver(post_delete, sender=TemplateAssignment)
+def invalidate_registry(sender, **kwargs):
+    # El sello se escribe al hacer commit, una vez por transaccion (ver bump_cache_stamp).
+    invalidate_template_registry()
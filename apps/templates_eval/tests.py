@@ -0,0 +1,137 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase
+
+from apps.org.models import Department, Position
+from apps.templates_eval.models import (
+    CacheStamp,
+    EvaluationTemplate,
+    TemplateAssignment,
+    TemplateQuestion,
+    TemplateSection,
+    block_code_from_title,
+    block_weight_from_title,
+)
+from apps.templates_eval.services import (
+    REGISTRY_STAMP,
+    SNAPSHOT_GENERATION,
+    get_template_registry,
+    get_template_snapshot,
+    resolve_active_template,
+)
+
+
+class BlockCodeTests(TestCase):
+    def test_block_code_from_title(self):
+        self.assertEqual(block_code_from_title("Bloque A - Resultados (40%)"), "A")
+        self.assertEqual(block_code_from_title("bloque   c: Equipo"), "C")
+        self.assertEqual(block_code_from_title("Competencias"), "UNK")
+        self.assertEqual(block_weight_from_title("Bloque A - Resultados (40%)"), Decimal("40"))
+        self.assertIsNone(block_weight_from_title("Bloque A - Resultados"))
+
+    def test_section_save_derives_block(self):
+        tpl = EvaluationTemplate.objects.create(name="T", base_code="T01")
+        section = TemplateSection.objects.create(template=tpl, title="Bloque B - Gobierno (20%)")
+        self.assertEqual(section.block_code, "B")
+        self.assertEqual(section.weight_percent, Decimal("20"))
+
+        explicit = TemplateSection.objects.create(
+            template=tpl, title="Otro", block_code="E", weight_percent=Decimal("5")
+        )
+        self.assertEqual(explicit.block_code, "E")
+
+
+class TemplateSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tpl = EvaluationTemplate.objects.create(name="S", base_code="S01", source_hash="abc")
+            self.sec_b = TemplateSection.objects.create(template=self.tpl, title="Bloque B - Dos", order=2)
+            self.sec_a = TemplateSection.objects.create(template=self.tpl, title="Bloque A - Uno", order=1)
+            TemplateQuestion.objects.create(section=self.sec_a, text="A2", order=2, is_required=False)
+            TemplateQuestion.objects.create(section=self.sec_a, text="A1", order=1, help_text="ayuda")
+            TemplateQuestion.objects.create(section=self.sec_b, text="B1", order=1)
+
+    def test_snapshot_is_ordered_and_cached(self):
+        snapshot = get_template_snapshot(self.tpl)
+        self.assertEqual([s.block_code for s in snapshot.sections], ["A", "B"])
+        self.assertEqual([q.text for q in snapshot.questions], ["A1", "A2", "B1"])
+        self.assertEqual(snapshot.questions[0].help_text, "ayuda")
+        self.assertFalse(snapshot.questions[1].is_required)
+
+        # Solo se lee el sello de generacion.
+        with self.assertNumQueries(1):
+            self.assertIs(get_template_snapshot(self.tpl), snapshot)
+
+    def test_question_change_invalidates_snapshot(self):
+        get_template_snapshot(self.tpl)
+        TemplateQuestion.objects.create(section=self.sec_b, text="B2", order=2)
+        snapshot = get_template_snapshot(self.tpl)
+        self.assertEqual([q.text for q in snapshot.questions], ["A1", "A2", "B1", "B2"])
+
+    def test_generation_bumped_once_per_transaction(self):
+        get_template_snapshot(self.tpl)
+        before = CacheStamp.objects.get(name=SNAPSHOT_GENERATION).value
+        with self.captureOnCommitCallbacks() as callbacks:
+            for order in range(2, 5):
+                TemplateQuestion.objects.create(section=self.sec_b, text=f"B{order}", order=order)
+            # Sin commit: se ve el cambio pero no se cachea bajo el sello actual.
+            self.assertEqual(len(get_template_snapshot(self.tpl).questions), 6)
+            self.assertIsNot(get_template_snapshot(self.tpl), get_template_snapshot(self.tpl))
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(CacheStamp.objects.get(name=SNAPSHOT_GENERATION).value, before)
+        callbacks[0]()
+        self.assertNotEqual(CacheStamp.objects.get(name=SNAPSHOT_GENERATION).value, before)
+
+    def test_generation_changed_by_other_process_rebuilds_snapshot(self):
+        get_template_snapshot(self.tpl)
+        TemplateQuestion.objects.filter(text="B1").update(text="B1 editada")
+        CacheStamp.objects.filter(name=SNAPSHOT_GENERATION).update(value=F("value") + 1)
+        snapshot = get_template_snapshot(self.tpl)
+        self.assertEqual([q.text for q in snapshot.questions], ["A1", "A2", "B1 editada"])
+
+
+class TemplateRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        dept = Department.objects.create(name="Dept R")
+        self.position = Position.objects.create(
+            code="R01", name="Puesto R", department=dept, professional_group="GP1"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.v1 = EvaluationTemplate.objects.create(name="R", base_code="R01", version=1, is_active=True)
+            self.v2 = EvaluationTemplate.objects.create(name="R", base_code="R01", version=2, is_active=False)
+            TemplateAssignment.objects.create(template=self.v1, position=self.position)
+
+    def test_registry_is_cached_per_process(self):
+        self.assertEqual(resolve_active_template("r01"), self.v1)
+        # Cada uso solo lee el sello.
+        with self.assertNumQueries(2):
+            registry = get_template_registry()
+            self.assertEqual(resolve_active_template("R01"), self.v1)
+        self.assertEqual(registry.latest_version_by_base_code["R01"], 2)
+        self.assertEqual(registry.assigned_by_position_id[self.position.id], self.v1)
+
+    def test_template_change_invalidates_registry(self):
+        self.assertEqual(resolve_active_template("R01"), self.v1)
+        self.v1.is_active = False
+        self.v1.save(update_fields=["is_active"])
+        self.v2.is_active = True
+        self.v2.save(update_fields=["is_active"])
+
+        self.assertEqual(resolve_active_template("R01"), self.v2)
+        self.assertNotIn(self.position.id, get_template_registry().assigned_by_position_id)
+
+    def test_stamp_changed_by_other_process_reloads_registry(self):
+        self.assertEqual(resolve_active_template("R01"), self.v1)
+        # Otro proceso (import, otro worker) cambia los datos y el sello sin pasar por esta cache.
+        EvaluationTemplate.objects.filter(pk=self.v1.pk).update(is_active=False)
+        EvaluationTemplate.objects.filter(pk=self.v2.pk).update(is_active=True)
+        cache.clear()
+        self.assertEqual(resolve_active_template("R01"), self.v1)
+
+        CacheStamp.objects.filter(name=REGISTRY_STAMP).update(value=F("value") + 1)
+        self.assertEqual(resolve_active_template("R01"), self.v2)
+
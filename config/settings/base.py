@@ -78,6 +78,11 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Dias que se conservan los ficheros de ExportJob (run_export_jobs los limpia).
+EXPORT_JOB_RETENTION_DAYS = 7
+# Minutos sin latido tras los que un ExportJob RUNNING se da por abandonado (worker caido).
+EXPORT_JOB_LEASE_MINUTES = 30
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 LOGIN_URL = "login"